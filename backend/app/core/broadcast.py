@@ -0,0 +1,64 @@
+"""
+In-process publish/subscribe hub for pushing live updates to connected clients.
+
+Services publish JSON-serialisable messages to named topics (e.g. "portfolio:alice");
+each connected client owns a bounded queue subscribed to the topics it asked for.
+A slow client never blocks publishers: when its queue is full the oldest
+message is dropped.
+
+Publishing and subscribing must happen on the event loop thread.
+"""
+import asyncio
+from typing import Any, Dict, Iterable, Set
+
+
+class Broadcaster:
+    """Topic-based fan-out to per-subscriber bounded queues."""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._topics: Dict[str, Set[asyncio.Queue]] = {}
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, topics: Iterable[str]) -> asyncio.Queue:
+        """Return a new queue receiving (topic, message) tuples for the given topics."""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        queue.topics = set(topics)
+        for topic in queue.topics:
+            self._topics.setdefault(topic, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        for topic in getattr(queue, "topics", ()):
+            subscribers = self._topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._topics[topic]
+
+    def has_subscribers(self, topic: str) -> bool:
+        return topic in self._topics
+
+    def publish(self, topic: str, message: Any):
+        """Deliver a message to every subscriber of `topic` without waiting."""
+        self.published += 1
+        for queue in self._topics.get(topic, ()):
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait((topic, message))
+            self.delivered += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "topics": len(self._topics),
+            "subscriptions": sum(len(s) for s in self._topics.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+broadcaster = Broadcaster()
@@ -0,0 +1,268 @@
+"""
+Bounded, thread-safe TTL + LRU cache with stampede protection.
+
+Unlike SingleFlight (which coalesces async callers on the event loop), this cache
+is meant for blocking code running on the bulkhead thread pools: every operation
+takes a short internal lock, and get_or_compute() holds a per-key lock while the
+value is computed, so when an entry is missing or expired exactly one thread
+recomputes it and concurrent callers wait for and reuse its result.
+
+Entries expire `ttl` seconds after they were stored and the least recently used
+entry is evicted once `max_entries` is reached. refresh_ahead() recomputes entries
+that are about to expire (and were read since they were stored, or are otherwise
+wanted) while the old value keeps being served, so readers never wait for them.
+
+Usage:
+    cache = get_cache("stock_info", max_entries=4096, ttl=3600)
+    info = cache.get_or_compute(symbol, generate_info, symbol)
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+_MISSING = object()
+
+
+class _KeyLock:
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users = 0
+
+
+class TTLCache:
+    """LRU-bounded mapping whose entries expire after `ttl` seconds."""
+
+    def __init__(self, name: str, max_entries: int = 1024, ttl: float = 3600):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, _KeyLock] = {}
+        self._read: set = set()  # keys read since they were stored, for refresh_ahead()
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0        # found the value after waiting for another thread's computation
+        self.computes = 0
+        self.evictions = 0    # dropped by the size limit
+        self.expirations = 0  # dropped because the TTL passed
+        self.refreshes = 0    # recomputed ahead of expiry
+
+    # ---- plain mapping operations ----
+
+    def _lookup(self, key: Hashable, now: float) -> Any:
+        """Return the live value for key or _MISSING; caller holds self._lock."""
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        if entry[0] <= now:
+            del self._data[key]
+            self._read.discard(key)
+            self.expirations += 1
+            return _MISSING
+        self._data.move_to_end(key)
+        self._read.add(key)
+        return entry[1]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._lookup(key, time.monotonic())
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            self._read.discard(key)
+            while len(self._data) > self.max_entries:
+                evicted, _ = self._data.popitem(last=False)
+                self._read.discard(evicted)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable = None):
+        """Drop one entry, or all of them when no key is given."""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+                self._read.clear()
+            else:
+                self._data.pop(key, None)
+                self._read.discard(key)
+
+    def purge_expired(self) -> int:
+        """Drop every expired entry; returns how many were dropped."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [k for k, (expires_at, _) in self._data.items() if expires_at <= now]
+            for key in expired:
+                del self._data[key]
+                self._read.discard(key)
+            self.expirations += len(expired)
+        return len(expired)
+
+    def __len__(self):
+        return len(self._data)
+
+    # ---- compute-once ----
+
+    def _acquire(self, key: Hashable) -> _KeyLock:
+        with self._lock:
+            key_lock = self._key_locks.get(key)
+            if key_lock is None:
+                key_lock = self._key_locks[key] = _KeyLock()
+            key_lock.users += 1
+        key_lock.lock.acquire()
+        return key_lock
+
+    def _release(self, key: Hashable, key_lock: _KeyLock):
+        key_lock.lock.release()
+        with self._lock:
+            key_lock.users -= 1
+            if not key_lock.users:
+                del self._key_locks[key]
+
+    def get_or_compute(self, key: Hashable, fn: Callable[..., Any], *args) -> Any:
+        """Return the cached value for key, computing `fn(*args)` once if it is missing or expired."""
+        with self._lock:
+            value = self._lookup(key, time.monotonic())
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+        key_lock = self._acquire(key)
+        try:
+            with self._lock:
+                value = self._lookup(key, time.monotonic())
+                if value is not _MISSING:
+                    self.waits += 1
+                    return value
+                self.misses += 1
+                self.computes += 1
+            value = fn(*args)
+            self.set(key, value)
+            return value
+        finally:
+            self._release(key, key_lock)
+
+    def get_or_compute_many(self, keys: Iterable[Hashable],
+                            fn: Callable[[List[Hashable]], Dict[Hashable, Any]]) -> Dict[Hashable, Any]:
+        """
+        Batch get_or_compute: `fn(missing_keys)` is called once with every key that is
+        not cached and must return a value for each of them.
+        """
+        keys = list(dict.fromkeys(keys))
+        result: Dict[Hashable, Any] = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                value = self._lookup(key, now)
+                if value is not _MISSING:
+                    result[key] = value
+            self.hits += len(result)
+        pending = [key for key in keys if key not in result]
+        if not pending:
+            return result
+
+        # Lock in a consistent order so overlapping batches cannot deadlock
+        locked = []
+        try:
+            for key in sorted(pending, key=repr):
+                locked.append((key, self._acquire(key)))
+            missing = []
+            with self._lock:
+                now = time.monotonic()
+                for key in pending:
+                    value = self._lookup(key, now)
+                    if value is _MISSING:
+                        missing.append(key)
+                    else:
+                        result[key] = value
+                        self.waits += 1
+                self.misses += len(missing)
+                self.computes += 1 if missing else 0
+            if missing:
+                computed = fn(missing)
+                for key in missing:
+                    self.set(key, computed[key])
+                    result[key] = computed[key]
+            return result
+        finally:
+            for key, key_lock in reversed(locked):
+                self._release(key, key_lock)
+
+    # ---- refresh-ahead ----
+
+    def expiring(self, within: float, keep: Optional[Callable[[Hashable], bool]] = None) -> List[Hashable]:
+        """Live keys expiring within `within` seconds that were read since stored (or that `keep` wants)."""
+        now = time.monotonic()
+        with self._lock:
+            return [key for key, (expires_at, _) in self._data.items()
+                    if now < expires_at <= now + within and (key in self._read or (keep and keep(key)))]
+
+    def refresh_many(self, keys: Iterable[Hashable], fn: Callable[[List[Hashable]], Dict[Hashable, Any]]) -> int:
+        """
+        Recompute `keys` with `fn(keys)` and store the results. The current values stay
+        readable meanwhile; concurrent get_or_compute() callers for these keys wait for
+        the new values instead of computing them again.
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return 0
+        locked = []
+        try:
+            for key in sorted(keys, key=repr):
+                locked.append((key, self._acquire(key)))
+            computed = fn(keys)
+            for key in keys:
+                self.set(key, computed[key])
+            self.refreshes += len(keys)
+            return len(keys)
+        finally:
+            for key, key_lock in reversed(locked):
+                self._release(key, key_lock)
+
+    def refresh_ahead(self, within: float, fn: Callable[[List[Hashable]], Dict[Hashable, Any]],
+                      keep: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """Refresh every entry expiring within `within` seconds that is still wanted; returns how many."""
+        return self.refresh_many(self.expiring(within, keep), fn)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.waits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "waits": self.waits,
+            "misses": self.misses,
+            "computes": self.computes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "refreshes": self.refreshes,
+            "hit_ratio": round((self.hits + self.waits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Registry of named caches, so metrics can be reported for all of them
+_caches: Dict[str, TTLCache] = {}
+_registry_lock = threading.Lock()
+
+
+def get_cache(name: str, max_entries: int = 1024, ttl: float = 3600) -> TTLCache:
+    """Return the named cache, creating it on first use."""
+    with _registry_lock:
+        if name not in _caches:
+            _caches[name] = TTLCache(name, max_entries=max_entries, ttl=ttl)
+        return _caches[name]
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit/miss/eviction metrics for every registered cache."""
+    return {name: cache.stats() for name, cache in _caches.items()}
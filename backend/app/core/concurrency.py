@@ -0,0 +1,104 @@
+"""
+Execution model for blocking work called from async routes.
+
+Every external dependency gets a Bulkhead: a per-dependency concurrency limit
+with basic instrumentation. Blocking clients (singlestoredb, pandas.read_sql,
+NewsAPI, CPU-heavy pandas work) are offloaded to a shared, bounded thread pool
+through `Bulkhead.run`; clients with a native async API (Anthropic, OpenAI) are
+awaited through `Bulkhead.call`. Either way the event loop stays free, and a slow
+LLM call can only occupy the `llm` slots, never the ones live-trades polling needs.
+
+Usage:
+    df = await bulkheads["db"].run(pd.read_sql, query, conn)
+    response = await bulkheads["llm"].call(client.messages.create, model=..., ...)
+"""
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict
+
+from app.core.config import settings
+
+
+class Bulkhead:
+    """Limits and measures concurrent calls into one dependency."""
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+        self.max_run_seconds = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking function in the shared thread pool under this bulkhead's limit."""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(fn, *args, **kwargs)
+        return await self._guard(lambda: loop.run_in_executor(_executor, call))
+
+    async def call(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Await a native async client call under this bulkhead's limit."""
+        return await self._guard(lambda: fn(*args, **kwargs))
+
+    async def _guard(self, start: Callable[[], Awaitable[Any]]) -> Any:
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        started_at = time.perf_counter()
+        self.total_wait_seconds += started_at - queued_at
+        self.in_flight += 1
+        try:
+            result = await start()
+            self.completed += 1
+            return result
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started_at
+            self.total_run_seconds += elapsed
+            self.max_run_seconds = max(self.max_run_seconds, elapsed)
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.completed + self.failed
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_ms": round(self.total_wait_seconds / calls * 1000, 3) if calls else 0.0,
+            "avg_run_ms": round(self.total_run_seconds / calls * 1000, 3) if calls else 0.0,
+            "max_run_ms": round(self.max_run_seconds * 1000, 3),
+        }
+
+
+bulkheads: Dict[str, Bulkhead] = {
+    "db": Bulkhead("db", settings.DB_CONCURRENCY),
+    "llm": Bulkhead("llm", settings.LLM_CONCURRENCY),
+    "news": Bulkhead("news", settings.NEWS_CONCURRENCY),
+    "compute": Bulkhead("compute", settings.COMPUTE_CONCURRENCY),
+}
+
+# Shared offload pool. Sized to the sum of the offloading limits so a saturated
+# dependency can never take threads another dependency is entitled to.
+_executor = ThreadPoolExecutor(
+    max_workers=sum(b.limit for b in bulkheads.values()),
+    thread_name_prefix="offload",
+)
+
+
+def bulkhead_stats() -> Dict[str, Dict[str, Any]]:
+    """Concurrency metrics for every dependency."""
+    return {name: bulkhead.stats() for name, bulkhead in bulkheads.items()}
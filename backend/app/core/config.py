@@ -10,6 +10,88 @@ class Settings:
     DB_PASSWORD: str = os.getenv("password")
     DB_NAME: str = os.getenv("database")
 
+    # Freshness windows (seconds) for coalesced hot read endpoints
+    LIVE_TRADES_COALESCE_TTL: float = float(os.getenv("LIVE_TRADES_COALESCE_TTL", 1.0))
+    NEWS_COALESCE_TTL: float = float(os.getenv("NEWS_COALESCE_TTL", 60.0))
+
+    # Per-dependency concurrency limits for blocking/external calls made from async routes
+    DB_CONCURRENCY: int = int(os.getenv("DB_CONCURRENCY", 16))
+    LLM_CONCURRENCY: int = int(os.getenv("LLM_CONCURRENCY", 4))
+    NEWS_CONCURRENCY: int = int(os.getenv("NEWS_CONCURRENCY", 4))
+    COMPUTE_CONCURRENCY: int = int(os.getenv("COMPUTE_CONCURRENCY", 4))
+
+    # Bounded TTL+LRU caches for (dummy) market data
+    STOCK_CACHE_TTL: float = float(os.getenv("STOCK_CACHE_TTL", 3600))
+    STOCK_DATA_CACHE_SIZE: int = int(os.getenv("STOCK_DATA_CACHE_SIZE", 1024))
+    STOCK_INFO_CACHE_SIZE: int = int(os.getenv("STOCK_INFO_CACHE_SIZE", 4096))
+    # Seed of the deterministic dummy-data generator; same seed => same prices in every process
+    SYNTHETIC_DATA_SEED: int = int(os.getenv("SYNTHETIC_DATA_SEED", 0))
+
+    # Longest history kept per symbol; every shorter period is served as a slice of it
+    STOCK_HISTORY_PERIOD: str = os.getenv("STOCK_HISTORY_PERIOD", "5y")
+
+    # On-disk daily price store (one memory-mapped file per symbol) behind get_stock_data
+    PRICE_STORE_ENABLED: bool = os.getenv("PRICE_STORE_ENABLED", "true").lower() == "true"
+    PRICE_STORE_DIR: str = os.getenv(
+        "PRICE_STORE_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "price_store"),
+    )
+    PRICE_STORE_HISTORY_DAYS: int = int(os.getenv("PRICE_STORE_HISTORY_DAYS", 1830))  # >= STOCK_HISTORY_PERIOD
+
+    # Shared price panel: the hot symbols' history in one file every worker maps
+    # (default directory: next to the price store; /dev/shm keeps it in memory)
+    SHARED_PANELS_ENABLED: bool = os.getenv("SHARED_PANELS_ENABLED", "true").lower() == "true"
+    SHARED_PANELS_DIR: str = os.getenv("SHARED_PANELS_DIR", "")
+
+    # Market-data provider chain (see app.services.market_data): priority order,
+    # per-provider latency budgets ("name=ms,...") and freshness limits
+    MARKET_DATA_PROVIDERS: str = os.getenv("MARKET_DATA_PROVIDERS", "live_index,shared,memory,live_trades,disk,replay,synthetic")
+    MARKET_DATA_BUDGETS_MS: str = os.getenv("MARKET_DATA_BUDGETS_MS", "live_trades=250,replay=500,yfinance=5000")
+    MARKET_DATA_PROVIDER_COOLDOWN_SECONDS: float = float(os.getenv("MARKET_DATA_PROVIDER_COOLDOWN_SECONDS", 30))
+    # Calls in flight per budgeted provider (timed-out calls hold theirs until they return)
+    MARKET_DATA_PROVIDER_SLOTS: int = int(os.getenv("MARKET_DATA_PROVIDER_SLOTS", 2))
+    MARKET_DATA_QUOTE_TTL: float = float(os.getenv("MARKET_DATA_QUOTE_TTL", 15))
+    MARKET_DATA_LIVE_MAX_AGE_SECONDS: int = int(os.getenv("MARKET_DATA_LIVE_MAX_AGE_SECONDS", 60))
+    MARKET_DATA_REPLAY_DIR: str = os.getenv("MARKET_DATA_REPLAY_DIR", "")
+
+    # Cache warmer: warms the hot symbols (plus every symbol in optimized_portfolio) on
+    # startup, then refreshes cached market data that is about to expire
+    CACHE_WARMER_ENABLED: bool = os.getenv("CACHE_WARMER_ENABLED", "true").lower() == "true"
+    CACHE_WARM_SYMBOLS: str = os.getenv("CACHE_WARM_SYMBOLS", "")  # comma-separated; empty = the dummy-price universe
+    CACHE_WARM_PERIODS: str = os.getenv("CACHE_WARM_PERIODS", "1y")  # dashboard chart periods to prebuild
+    CACHE_REFRESH_INTERVAL_SECONDS: int = int(os.getenv("CACHE_REFRESH_INTERVAL_SECONDS", 60))
+    CACHE_REFRESH_AHEAD_SECONDS: int = int(os.getenv("CACHE_REFRESH_AHEAD_SECONDS", 300))  # > the interval
+    CACHE_WARM_RELOAD_SECONDS: int = int(os.getenv("CACHE_WARM_RELOAD_SECONDS", 600))  # re-read optimized_portfolio
+
+    # Retention job for raw live_trades: rows older than the retention age are rolled
+    # into minute bars and then purged in batches
+    # Off by default: it deletes raw trades, which limits /api/live-trades/history to the
+    # retention window. Every worker may enable it; a job_locks lease lets one run at a time.
+    RETENTION_ENABLED: bool = os.getenv("RETENTION_ENABLED", "false").lower() == "true"
+    RETENTION_INTERVAL_SECONDS: int = int(os.getenv("RETENTION_INTERVAL_SECONDS", 300))
+    LIVE_TRADES_RETENTION_MINUTES: int = int(os.getenv("LIVE_TRADES_RETENTION_MINUTES", 120))
+    RETENTION_PURGE_BATCH_SIZE: int = int(os.getenv("RETENTION_PURGE_BATCH_SIZE", 10000))
+    RETENTION_LOCK_SECONDS: int = int(os.getenv("RETENTION_LOCK_SECONDS", 900))  # lease outlives a crashed run
+
+    # Trade feed tailing live_trades for the incremental live services
+    TRADE_FEED_ENABLED: bool = os.getenv("TRADE_FEED_ENABLED", "true").lower() == "true"
+    TRADE_FEED_POLL_SECONDS: float = float(os.getenv("TRADE_FEED_POLL_SECONDS", 1.0))
+    TRADE_FEED_BACKFILL_SECONDS: int = int(os.getenv("TRADE_FEED_BACKFILL_SECONDS", 300))
+    # Re-read window behind the watermark for rows that commit late (producer retries take up to ~25s)
+    TRADE_FEED_LAG_SECONDS: int = int(os.getenv("TRADE_FEED_LAG_SECONDS", 30))
+    LEADERBOARD_VOLUME_WINDOW_SECONDS: int = int(os.getenv("LEADERBOARD_VOLUME_WINDOW_SECONDS", 300))
+    VALUATION_REFRESH_SECONDS: int = int(os.getenv("VALUATION_REFRESH_SECONDS", 60))
+    CORRELATION_BUCKET_SECONDS: int = int(os.getenv("CORRELATION_BUCKET_SECONDS", 5))
+    CORRELATION_WINDOW_BUCKETS: int = int(os.getenv("CORRELATION_WINDOW_BUCKETS", 120))
+    # Each worker retries failed alert claims and pushes alerts other workers triggered this often
+    ALERT_SYNC_SECONDS: float = float(os.getenv("ALERT_SYNC_SECONDS", 2.0))
+    ALERT_SYNC_LAG_SECONDS: int = int(os.getenv("ALERT_SYNC_LAG_SECONDS", 30))
+    ANOMALY_HALFLIFE_TRADES: float = float(os.getenv("ANOMALY_HALFLIFE_TRADES", 200))
+    ANOMALY_Z_THRESHOLD: float = float(os.getenv("ANOMALY_Z_THRESHOLD", 4.0))
+    ANOMALY_WARMUP_TRADES: int = int(os.getenv("ANOMALY_WARMUP_TRADES", 50))
+    ANOMALY_BLOCK_SIZE: float = float(os.getenv("ANOMALY_BLOCK_SIZE", 10000))
+    ANOMALY_GAP_PERCENT: float = float(os.getenv("ANOMALY_GAP_PERCENT", 2.0))
+
     # Add any other environment variables needed, e.g., API keys for external services
     # OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY")
 
@@ -0,0 +1,116 @@
+"""
+Single-flight request coalescing for hot read endpoints.
+
+Concurrent callers asking for the same key share one in-flight computation, and
+its result is reused for a short freshness window afterwards. Dashboards polling
+the same endpoint at the same moment therefore cost one database or API call per
+window, no matter how many viewers there are.
+
+Usage:
+    flight = get_flight("live_trades", ttl=1.0)
+    df = await flight.do(make_key("live_trades.data"), fetch_live_trades_df)
+"""
+import asyncio
+import inspect
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+def make_key(endpoint: str, **params) -> Tuple:
+    """Build a coalescing key from an endpoint name and its (normalised) parameters."""
+    return (endpoint,) + tuple(sorted(params.items()))
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls and caches their results for `ttl` seconds."""
+
+    def __init__(self, name: str, ttl: float = 1.0, max_entries: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0        # served from a fresh cached result
+        self.coalesced = 0   # joined a computation already in flight
+        self.misses = 0      # started a new computation
+        self.errors = 0
+
+    async def do(self, key: Hashable, fn: Callable[..., Any], *args) -> Any:
+        """
+        Return the result of `fn(*args)` for `key`, sharing work with concurrent callers.
+        `fn` may be a plain function or a coroutine function. Errors are not cached.
+        """
+        entry = self._results.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            self.hits += 1
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._run(key, fn, *args))
+            self._inflight[key] = task
+        # Shield the shared task so one cancelled caller doesn't cancel it for everyone
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Hashable, fn: Callable[..., Any], *args) -> Any:
+        try:
+            result = fn(*args)
+            if inspect.isawaitable(result):
+                result = await result
+            self._store(key, result)
+            return result
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def _store(self, key: Hashable, result: Any):
+        now = time.monotonic()
+        if len(self._results) >= self.max_entries:
+            # Drop expired entries first; if still full, drop the oldest one
+            self._results = {k: v for k, v in self._results.items() if now - v[0] < self.ttl}
+            if len(self._results) >= self.max_entries:
+                oldest = min(self._results, key=lambda k: self._results[k][0])
+                del self._results[oldest]
+        self._results[key] = (now, result)
+
+    def invalidate(self, key: Hashable = None):
+        """Drop one cached result, or all of them when no key is given."""
+        if key is None:
+            self._results.clear()
+        else:
+            self._results.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.hits + self.coalesced + self.misses
+        return {
+            "ttl_seconds": self.ttl,
+            "requests": requests,
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": round((self.hits + self.coalesced) / requests, 4) if requests else 0.0,
+            "in_flight": len(self._inflight),
+            "cached_keys": len(self._results),
+        }
+
+
+# Registry of named coalescers, so metrics can be reported for all of them
+_flights: Dict[str, SingleFlight] = {}
+
+
+def get_flight(name: str, ttl: float = 1.0) -> SingleFlight:
+    """Return the named SingleFlight, creating it on first use."""
+    if name not in _flights:
+        _flights[name] = SingleFlight(name, ttl=ttl)
+    return _flights[name]
+
+
+def flight_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit/miss metrics for every registered coalescer."""
+    return {name: flight.stats() for name, flight in _flights.items()}
@@ -0,0 +1,323 @@
+"""
+Versioned schema migrations for the tables the backend depends on.
+
+Each migration is applied once, in order, and recorded in `schema_migrations`.
+Never edit a migration that has shipped; append a new one instead.
+
+Run from the backend directory:
+    python -m app.db.schema migrate   # apply pending migrations
+    python -m app.db.schema status    # list applied/pending versions
+    python -m app.db.schema explain   # show query plans of the hot queries
+"""
+import argparse
+from typing import Callable, Dict, List, Tuple, Union
+
+from app.db.database import get_db_connection
+
+# A migration step is a SQL statement, or a function of the cursor for steps that have
+# to inspect the schema to be safe to re-run after a partial failure.
+Step = Union[str, Callable]
+
+# live_trades plus seq. AUTO_INCREMENT makes seq unique; keyless sharding rules out a UNIQUE key on it.
+LIVE_TRADES_V4_DDL = """
+CREATE TABLE IF NOT EXISTS live_trades_v4 (
+    seq BIGINT AUTO_INCREMENT NOT NULL,
+    localTS DATETIME(6) NOT NULL,
+    localDate DATE NOT NULL,
+    ticker VARCHAR(16) NOT NULL,
+    conditions VARCHAR(64),
+    correction INT,
+    exchange INT,
+    id VARCHAR(64),
+    participant_timestamp BIGINT,
+    price DOUBLE NOT NULL,
+    sequence_number BIGINT,
+    sip_timestamp BIGINT,
+    size DOUBLE,
+    tape INT,
+    trf_id BIGINT,
+    trf_timestamp BIGINT,
+    SORT KEY (localTS),
+    SHARD KEY (),
+    KEY (ticker) USING HASH,
+    KEY (seq) USING HASH
+)
+"""
+
+LIVE_TRADES_COLUMNS = """localTS, localDate, ticker, conditions, correction, exchange, id,
+participant_timestamp, price, sequence_number, sip_timestamp, size, tape, trf_id, trf_timestamp"""
+
+
+def _table_exists(cursor, table: str) -> bool:
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s",
+        (table,)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def _has_column(cursor, table: str, column: str) -> bool:
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.columns"
+        " WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s",
+        (table, column)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def _copy_new_trades(cursor):
+    """Copy live_trades rows from the newest localTS already in live_trades_v4 on (re-runnable)."""
+    cursor.execute("SELECT MAX(localTS) FROM live_trades_v4")
+    copied_through = cursor.fetchone()[0]
+    if copied_through is None:
+        where, params = "", None
+    else:
+        # Rows at the boundary timestamp may be partly copied: drop and copy them again
+        cursor.execute("DELETE FROM live_trades_v4 WHERE localTS >= %s", (copied_through,))
+        where, params = "WHERE localTS >= %s", (copied_through,)
+    cursor.execute(
+        f"INSERT INTO live_trades_v4 ({LIVE_TRADES_COLUMNS}) "
+        f"SELECT {LIVE_TRADES_COLUMNS} FROM live_trades {where} ORDER BY localTS",
+        params
+    )
+
+
+def _add_live_trades_seq(cursor):
+    """
+    Rebuild live_trades with a seq column and swap it in. Every step checks where a
+    previous, failed run stopped, so re-running the migration neither loses nor
+    duplicates rows. Stop the trade producer first: rows inserted between the final
+    catch-up copy and the swap would stay behind in the old table. The old table is
+    kept as live_trades_v3; drop it once the row counts have been checked.
+    """
+    if _has_column(cursor, "live_trades", "seq"):
+        return  # already swapped
+    if not _table_exists(cursor, "live_trades"):
+        # A previous run failed between the two renames
+        if not _table_exists(cursor, "live_trades_v4"):
+            raise RuntimeError("Neither live_trades nor live_trades_v4 exists; restore live_trades from live_trades_v3")
+        cursor.execute("ALTER TABLE live_trades_v4 RENAME TO live_trades")
+        return
+    if _table_exists(cursor, "live_trades_v3"):
+        raise RuntimeError("live_trades_v3 already exists; check it and drop it before migrating")
+    cursor.execute(LIVE_TRADES_V4_DDL)
+    _copy_new_trades(cursor)  # bulk copy (or resume a partial one)
+    _copy_new_trades(cursor)  # catch up on rows written during the bulk copy, right before the swap
+    cursor.execute("ALTER TABLE live_trades RENAME TO live_trades_v3")
+    cursor.execute("ALTER TABLE live_trades_v4 RENAME TO live_trades")
+    print("live_trades rebuilt with seq; the old table is kept as live_trades_v3 until you drop it")
+
+
+# (version, description, steps)
+MIGRATIONS: List[Tuple[int, str, List[Step]]] = [
+    (1, "Create live_trades, optimized_portfolio and clients", [
+        # Columnstore trade log. Every hot query is a trailing time-range scan
+        # (`localTS >= NOW() - INTERVAL ...`), so the sort key on localTS lets
+        # segment elimination skip everything outside the window. Sharding is
+        # keyless: the universe is a handful of tickers, so a ticker shard key
+        # would skew rows onto a few partitions, while time-range scans fan out
+        # to all partitions either way.
+        """
+        CREATE TABLE IF NOT EXISTS live_trades (
+            localTS DATETIME(6) NOT NULL,
+            localDate DATE NOT NULL,
+            ticker VARCHAR(16) NOT NULL,
+            conditions VARCHAR(64),
+            correction INT,
+            exchange INT,
+            id VARCHAR(64),
+            participant_timestamp BIGINT,
+            price DOUBLE NOT NULL,
+            sequence_number BIGINT,
+            sip_timestamp BIGINT,
+            size DOUBLE,
+            tape INT,
+            trf_id BIGINT,
+            trf_timestamp BIGINT,
+            SORT KEY (localTS),
+            SHARD KEY (),
+            KEY (ticker) USING HASH
+        )
+        """,
+        # Point lookups and deletes by user_id; sharding on user_id keeps them single-partition
+        """
+        CREATE ROWSTORE TABLE IF NOT EXISTS optimized_portfolio (
+            user_id VARCHAR(255) NOT NULL,
+            symbol VARCHAR(16) NOT NULL,
+            quantity DOUBLE NOT NULL,
+            target_allocation DOUBLE,
+            PRIMARY KEY (user_id, symbol),
+            SHARD KEY (user_id)
+        )
+        """,
+        # The primary key backs the INSERT ... ON DUPLICATE KEY UPDATE in database_service
+        """
+        CREATE ROWSTORE TABLE IF NOT EXISTS clients (
+            user_id VARCHAR(255) NOT NULL,
+            amount DOUBLE,
+            income DOUBLE,
+            PRIMARY KEY (user_id),
+            SHARD KEY (user_id)
+        )
+        """,
+    ]),
+    (2, "Create live_trades_minute_bars rollup table", [
+        # Minute OHLCV bars rolled up from raw trades by the retention job
+        # (app.services.retention_service). The unique key makes a repeated
+        # rollup of the same minute fail instead of double counting.
+        """
+        CREATE TABLE IF NOT EXISTS live_trades_minute_bars (
+            bar_start DATETIME NOT NULL,
+            ticker VARCHAR(16) NOT NULL,
+            open DOUBLE NOT NULL,
+            high DOUBLE NOT NULL,
+            low DOUBLE NOT NULL,
+            close DOUBLE NOT NULL,
+            volume DOUBLE NOT NULL,
+            trade_count BIGINT NOT NULL,
+            vwap DOUBLE,
+            SORT KEY (bar_start),
+            SHARD KEY (ticker),
+            UNIQUE KEY (ticker, bar_start) USING HASH
+        )
+        """,
+    ]),
+    (3, "Create price_alerts", [
+        # Active alerts are loaded into memory at startup; lookups by user back the CRUD API
+        """
+        CREATE ROWSTORE TABLE IF NOT EXISTS price_alerts (
+            id BIGINT AUTO_INCREMENT NOT NULL,
+            user_id VARCHAR(255) NOT NULL,
+            ticker VARCHAR(16) NOT NULL,
+            condition_type VARCHAR(8) NOT NULL,
+            threshold DOUBLE NOT NULL,
+            created_at DATETIME NOT NULL,
+            triggered_at DATETIME,
+            triggered_price DOUBLE,
+            PRIMARY KEY (id),
+            KEY (user_id),
+            KEY (triggered_at)
+        )
+        """,
+    ]),
+    (4, "Add a unique seq column to live_trades", [
+        # (localTS, id) is not unique: localTS has second granularity and the producer
+        # samples rows with replacement, so ids repeat (and may be NULL). A server-assigned
+        # seq gives the history cursor and the trade feed a unique tie-breaker. SingleStore
+        # cannot add an AUTO_INCREMENT column in place, so the table is rebuilt and swapped
+        # (see _add_live_trades_seq: stop the producer first).
+        _add_live_trades_seq,
+    ]),
+    (5, "Create job_locks", [
+        # Lease per background job, so a job started in every uvicorn worker runs in
+        # one process at a time (see app.services.retention_service)
+        """
+        CREATE ROWSTORE TABLE IF NOT EXISTS job_locks (
+            name VARCHAR(64) NOT NULL,
+            owner VARCHAR(255) NOT NULL,
+            expires_at DATETIME NOT NULL,
+            PRIMARY KEY (name)
+        )
+        """,
+    ]),
+]
+
+MIGRATIONS_TABLE_DDL = """
+CREATE ROWSTORE TABLE IF NOT EXISTS schema_migrations (
+    version INT NOT NULL PRIMARY KEY,
+    description VARCHAR(255) NOT NULL,
+    applied_at DATETIME NOT NULL
+)
+"""
+
+
+def get_applied_versions(cursor) -> List[int]:
+    """Return the migration versions already recorded in the database."""
+    cursor.execute(MIGRATIONS_TABLE_DDL)
+    cursor.execute("SELECT version FROM schema_migrations ORDER BY version")
+    return [row[0] for row in cursor.fetchall()]
+
+
+def apply_migrations() -> List[int]:
+    """Apply all pending migrations in order and return the versions applied."""
+    applied_now = []
+    with get_db_connection() as connection:
+        with connection.cursor() as cursor:
+            applied = set(get_applied_versions(cursor))
+            for version, description, statements in MIGRATIONS:
+                if version in applied:
+                    continue
+                print(f"Applying migration {version}: {description}")
+                for statement in statements:
+                    if callable(statement):
+                        statement(cursor)
+                    else:
+                        cursor.execute(statement)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, description, applied_at) VALUES (%s, %s, NOW())",
+                    (version, description)
+                )
+                connection.commit()
+                applied_now.append(version)
+    return applied_now
+
+
+def migration_status() -> List[Dict]:
+    """List every known migration with whether it has been applied."""
+    with get_db_connection() as connection:
+        with connection.cursor() as cursor:
+            applied = set(get_applied_versions(cursor))
+    return [
+        {"version": version, "description": description, "applied": version in applied}
+        for version, description, _ in MIGRATIONS
+    ]
+
+
+def get_hot_queries() -> Dict[str, Tuple[str, tuple]]:
+    """The latency-sensitive queries whose plans should be served by sort/shard keys."""
+    # Imported here so the schema module stays importable without the routers' dependencies
+    from app.routers.live_trades import (
+        LIVE_TRADES_DATA_QUERY, AVAILABLE_TICKERS_QUERY, LIVE_TRADES_STATS_QUERY
+    )
+    from app.services.stock_service import OPTIMIZED_POSITIONS_QUERY
+
+    return {
+        "live_trades.data": (LIVE_TRADES_DATA_QUERY, ()),
+        "live_trades.tickers": (AVAILABLE_TICKERS_QUERY, ()),
+        "live_trades.stats": (LIVE_TRADES_STATS_QUERY, ()),
+        "optimized_portfolio.by_user": (OPTIMIZED_POSITIONS_QUERY, ("example-user",)),
+    }
+
+
+def explain_hot_queries() -> Dict[str, List[str]]:
+    """Run EXPLAIN on each hot query and return the plan lines by query name."""
+    plans = {}
+    with get_db_connection() as connection:
+        with connection.cursor() as cursor:
+            for name, (query, params) in get_hot_queries().items():
+                cursor.execute("EXPLAIN " + query.strip(), params or None)
+                plans[name] = [str(row[0]) for row in cursor.fetchall()]
+    return plans
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the backend database schema")
+    parser.add_argument("command", choices=["migrate", "status", "explain"])
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        applied = apply_migrations()
+        print(f"Applied migrations: {applied}" if applied else "Schema is up to date")
+    elif args.command == "status":
+        for migration in migration_status():
+            state = "applied" if migration["applied"] else "pending"
+            print(f"{migration['version']:>4}  {state:<8} {migration['description']}")
+    elif args.command == "explain":
+        for name, plan in explain_hot_queries().items():
+            print(f"== {name}")
+            for line in plan:
+                print(f"   {line}")
+
+
+if __name__ == "__main__":
+    main()
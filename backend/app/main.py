@@ -1,11 +1,28 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 # Import routers here once they are created
 from app.routers import welcome
 from app.routers import news
 from app.routers import portfolio
 from app.routers import live_trades
+from app.routers import metrics
+from app.routers import stream
+from app.routers import alerts
+from app.core.config import settings
+from app.services import retention_service
+from app.services.cache_warmer import cache_warmer
+from app.services.trade_feed import trade_feed
+from app.services.price_index import price_index
+from app.services.leaderboard_service import leaderboard
+from app.services.correlation_service import rolling_correlation
+from app.services.valuation_service import live_valuation
+from app.services.alert_service import alert_engine
+from app.services.anomaly_service import anomaly_detector
+from app.services.freshness_service import freshness
 # from app.routers import ai_insights, user
 
 app = FastAPI(
@@ -27,8 +44,43 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["X-Columns", "X-Row-Count", "X-Tickers"],  # Layout headers of the packed live-trades format
 )
 
+# Compress JSON and binary responses; the 1-second live-trades polling path benefits the most
+app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=6)
+
+# Long-running maintenance tasks started with the app
+background_tasks = []
+
+@app.on_event("startup")
+async def start_background_jobs():
+    if settings.RETENTION_ENABLED:
+        background_tasks.append(asyncio.create_task(retention_service.run_retention_loop()))
+    if settings.CACHE_WARMER_ENABLED:
+        background_tasks.append(asyncio.create_task(cache_warmer.run()))
+    if settings.TRADE_FEED_ENABLED:
+        # The price index goes first: the leaderboard and live valuation read from it
+        trade_feed.subscribe(price_index.on_trades)
+        trade_feed.subscribe(leaderboard.on_trades)
+        trade_feed.subscribe(rolling_correlation.on_trades)
+        trade_feed.subscribe(live_valuation.on_trades)
+        trade_feed.subscribe(alert_engine.on_trades)
+        trade_feed.subscribe(anomaly_detector.on_trades)
+        trade_feed.subscribe(freshness.on_trades)
+        # The seed replaces each ticker's open, so the percent-change ranking is rebuilt
+        price_index.on_seeded(leaderboard.rerank)
+        background_tasks.append(asyncio.create_task(alert_engine.load()))
+        background_tasks.append(asyncio.create_task(alert_engine.sync_loop()))
+        background_tasks.append(asyncio.create_task(price_index.load()))
+        background_tasks.append(asyncio.create_task(live_valuation.refresh_loop()))
+        background_tasks.append(asyncio.create_task(trade_feed.run()))
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    for task in background_tasks:
+        task.cancel()
+
 @app.get("/", tags=["Root"])
 async def read_root():
     return {"message": "Welcome to the AI Financial Advisor API"}
@@ -38,6 +90,9 @@ app.include_router(welcome.router, prefix="/api/welcome", tags=["Welcome"])
 app.include_router(news.router, prefix="/api/news", tags=["News"])
 app.include_router(portfolio.router, prefix="/api/portfolio", tags=["Portfolio"])
 app.include_router(live_trades.router, prefix="/api/live-trades", tags=["Live Trades"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["Metrics"])
+app.include_router(stream.router, prefix="/api/stream", tags=["Stream"])
+app.include_router(alerts.router, prefix="/api/alerts", tags=["Alerts"])
 # Example:
 # app.include_router(ai_insights.router, prefix="/ai", tags=["AI Insights"])
 # app.include_router(user.router, prefix="/user", tags=["User"])
@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+import datetime
+
+# above: price >= threshold, below: price <= threshold,
+# cross: price moves through the threshold in either direction
+AlertCondition = Literal["above", "below", "cross"]
+
+class PriceAlertCreate(BaseModel):
+    user_id: str
+    ticker: str
+    condition: AlertCondition
+    threshold: float = Field(gt=0)
+
+class PriceAlert(PriceAlertCreate):
+    id: int
+    created_at: datetime.datetime
+    triggered_at: Optional[datetime.datetime] = None
+    triggered_price: Optional[float] = None
+    active: bool = True
+
+class PriceAlertTriggered(BaseModel):
+    alert: PriceAlert
+    message: str
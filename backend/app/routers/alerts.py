@@ -0,0 +1,50 @@
+from fastapi import APIRouter, HTTPException
+from typing import List
+
+from app.models.alert_models import PriceAlert, PriceAlertCreate
+from app.services.alert_service import alert_engine
+
+router = APIRouter()
+
+@router.post("/", response_model=PriceAlert)
+async def create_alert(alert: PriceAlertCreate):
+    """
+    Create a one-shot price alert. Triggered alerts are pushed to the
+    "alerts:<user_id>" topic of /api/stream/ws.
+    """
+    try:
+        return await alert_engine.create(alert)
+    except Exception as e:
+        print(f"Error creating price alert: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to create price alert: {str(e)}")
+
+@router.get("/user/{user_id}", response_model=List[PriceAlert])
+async def list_alerts(user_id: str):
+    """All alerts of a user, active and triggered."""
+    try:
+        return await alert_engine.list_for_user(user_id)
+    except Exception as e:
+        print(f"Error listing price alerts for {user_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to list price alerts: {str(e)}")
+
+@router.get("/{alert_id}", response_model=PriceAlert)
+async def get_alert(alert_id: int):
+    try:
+        alert = await alert_engine.get(alert_id)
+    except Exception as e:
+        print(f"Error fetching price alert {alert_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch price alert: {str(e)}")
+    if alert is None:
+        raise HTTPException(status_code=404, detail="Price alert not found")
+    return alert
+
+@router.delete("/{alert_id}")
+async def delete_alert(alert_id: int):
+    try:
+        deleted = await alert_engine.delete(alert_id)
+    except Exception as e:
+        print(f"Error deleting price alert {alert_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to delete price alert: {str(e)}")
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Price alert not found")
+    return {"deleted": alert_id}
@@ -1,15 +1,29 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional, List
+from fastapi import APIRouter, HTTPException, Query, Header
+from fastapi.responses import Response, StreamingResponse
+from typing import Optional, List, Tuple
+import base64
+import json
 import os
 import pandas as pd
 import singlestoredb as s2
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from app.core.config import settings
+from app.core.concurrency import bulkheads
+from app.core.singleflight import get_flight, make_key
+from app.services.anomaly_service import anomaly_detector
+from app.services.correlation_service import rolling_correlation
+from app.services.leaderboard_service import leaderboard, METRICS as LEADERBOARD_METRICS
+from app.utils import wire_format
 
 load_dotenv()
 
 router = APIRouter()
 
+# Concurrent pollers of these endpoints share one database query per freshness window
+live_trades_flight = get_flight("live_trades", ttl=settings.LIVE_TRADES_COALESCE_TTL)
+
 # Database configuration
 config = {
     "host": os.getenv('host'),
@@ -19,60 +33,79 @@ config = {
     "database": os.getenv('database')
 }
 
-def fetch_live_trades():
-    """Fetch live trades data from the database"""
-    query = """
-    SELECT localTS, ticker, price, size
-      FROM live_trades
-     WHERE localTS >= CONVERT_TZ(NOW(), @@session.time_zone, 'America/New_York')
-                       - INTERVAL 1 MINUTE
-     ORDER BY localTS
-    """
+LIVE_TRADES_DATA_QUERY = """
+SELECT localTS, ticker, price, size
+  FROM live_trades
+ WHERE localTS >= CONVERT_TZ(NOW(), @@session.time_zone, 'America/New_York')
+                   - INTERVAL 1 MINUTE
+ ORDER BY localTS
+"""
+
+def fetch_live_trades_df() -> pd.DataFrame:
+    """Fetch the last minute of live trades as a DataFrame sorted by localTS"""
     conn = s2.connect(**config)
     try:
-        df = pd.read_sql(query, conn)
+        df = pd.read_sql(LIVE_TRADES_DATA_QUERY, conn)
     finally:
         conn.close()
     
     if not df.empty:
         df['localTS'] = pd.to_datetime(df['localTS'])
         df.sort_values('localTS', inplace=True)
+    return df
+
+def fetch_live_trades():
+    """Fetch live trades data from the database"""
+    df = fetch_live_trades_df()
+    if not df.empty:
         return df.to_dict('records')
     return []
 
 @router.get("/data")
-async def get_live_trades_data(ticker: Optional[str] = Query(None, description="Filter by ticker symbol")):
+async def get_live_trades_data(
+    ticker: Optional[str] = Query(None, description="Filter by ticker symbol"),
+    format: Optional[str] = Query(None, description="Wire format: records (default), columnar, arrow or f64"),
+    accept: Optional[str] = Header(None)
+):
     """
     Get live trades data, optionally filtered by ticker symbol.
     If a specific ticker is requested, a 5-period SMA is calculated.
+    The response format is chosen by the `format` query parameter or the Accept header;
+    see app.utils.wire_format for the columnar and binary layouts.
     """
     try:
-        all_trades = fetch_live_trades()
-        trades_to_return = []
+        wire = wire_format.negotiate_format(format, accept)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        # Shared across tickers and formats; the cached frame must not be modified in place
+        df_trades = await live_trades_flight.do(make_key("live_trades.data"), bulkheads["db"].run, fetch_live_trades_df)
 
         if ticker and ticker.upper() != 'ALL':
             # Filter for the specific ticker
-            filtered_trades_list = [t for t in all_trades if t['ticker'] == ticker.upper()]
+            df_trades = df_trades[df_trades['ticker'] == ticker.upper()].copy()
             
-            if filtered_trades_list:
-                df_ticker = pd.DataFrame(filtered_trades_list)
-                df_ticker.sort_values('localTS', inplace=True) # Ensure correct order for SMA
+            if not df_trades.empty:
+                df_trades.sort_values('localTS', inplace=True) # Ensure correct order for SMA
                 
                 sma_window = 5
-                if len(df_ticker) >= 1: # Calculate SMA if there are any trades
-                    # Calculate SMA. NaNs will be present for initial periods if len < sma_window.
-                    # min_periods=1 ensures SMA is calculated even if fewer than sma_window points, starting with mean of available points.
-                    df_ticker['sma'] = df_ticker['price'].rolling(window=sma_window, min_periods=1).mean().round(4)
-                else:
-                    df_ticker['sma'] = None # Should not happen if filtered_trades_list is not empty
-                
-                trades_to_return = df_ticker.to_dict(orient='records')
-            else:
-                trades_to_return = [] # No trades for this specific ticker
-        else:
-            # Return all trades without SMA if 'ALL' or no ticker specified
-            trades_to_return = all_trades
-        
+                # Calculate SMA. NaNs will be present for initial periods if len < sma_window.
+                # min_periods=1 ensures SMA is calculated even if fewer than sma_window points, starting with mean of available points.
+                df_trades['sma'] = df_trades['price'].rolling(window=sma_window, min_periods=1).mean().round(4)
+        # Otherwise return all trades without SMA if 'ALL' or no ticker specified
+
+        if wire == wire_format.COLUMNAR:
+            return Response(content=wire_format.to_columnar_json(df_trades),
+                            media_type=wire_format.COLUMNAR_MEDIA_TYPE)
+        if wire == wire_format.ARROW:
+            return Response(content=wire_format.to_arrow_ipc(df_trades),
+                            media_type=wire_format.ARROW_MEDIA_TYPE)
+        if wire == wire_format.F64:
+            body, headers = wire_format.to_packed_f64(df_trades)
+            return Response(content=body, media_type=wire_format.F64_MEDIA_TYPE, headers=headers)
+
+        trades_to_return = df_trades.to_dict(orient='records') if not df_trades.empty else []
         return {
             "status": "success",
             "data": trades_to_return,
@@ -83,26 +116,31 @@ async def get_live_trades_data(ticker: Optional[str] = Query(None, description="
         print(f"Error in get_live_trades_data: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching live trades: {str(e)}")
 
+AVAILABLE_TICKERS_QUERY = """
+SELECT DISTINCT ticker
+FROM live_trades
+WHERE localTS >= CONVERT_TZ(NOW(), @@session.time_zone, 'America/New_York')
+                  - INTERVAL 1 HOUR
+ORDER BY ticker
+"""
+
+def fetch_available_tickers() -> List[str]:
+    """Fetch the ticker symbols that traded during the last hour"""
+    conn = s2.connect(**config)
+    try:
+        df = pd.read_sql(AVAILABLE_TICKERS_QUERY, conn)
+    finally:
+        conn.close()
+    
+    return df['ticker'].tolist() if not df.empty else []
+
 @router.get("/tickers")
 async def get_available_tickers():
     """
     Get list of available ticker symbols from live trades data
     """
     try:
-        query = """
-        SELECT DISTINCT ticker
-        FROM live_trades
-        WHERE localTS >= CONVERT_TZ(NOW(), @@session.time_zone, 'America/New_York')
-                          - INTERVAL 1 HOUR
-        ORDER BY ticker
-        """
-        conn = s2.connect(**config)
-        try:
-            df = pd.read_sql(query, conn)
-        finally:
-            conn.close()
-        
-        tickers = df['ticker'].tolist() if not df.empty else []
+        tickers = await live_trades_flight.do(make_key("live_trades.tickers"), bulkheads["db"].run, fetch_available_tickers)
         
         # Add 'ALL' option at the beginning
         options = [{"label": "All", "value": "ALL"}]
@@ -115,50 +153,248 @@ async def get_available_tickers():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching tickers: {str(e)}")
 
+LIVE_TRADES_STATS_QUERY = """
+SELECT 
+    COUNT(*) as total_trades,
+    COUNT(DISTINCT ticker) as unique_tickers,
+    MIN(localTS) as earliest_trade,
+    MAX(localTS) as latest_trade,
+    AVG(price) as avg_price,
+    SUM(size) as total_volume
+FROM live_trades
+WHERE localTS >= CONVERT_TZ(NOW(), @@session.time_zone, 'America/New_York')
+                  - INTERVAL 5 MINUTE
+"""
+
+def fetch_live_trades_stats() -> dict:
+    """Compute statistics over the last 5 minutes of live trades"""
+    conn = s2.connect(**config)
+    try:
+        df = pd.read_sql(LIVE_TRADES_STATS_QUERY, conn)
+    finally:
+        conn.close()
+    
+    if not df.empty:
+        stats = df.iloc[0].to_dict()
+        # Convert timestamps to strings for JSON serialization
+        if stats['earliest_trade']:
+            stats['earliest_trade'] = stats['earliest_trade'].isoformat()
+        if stats['latest_trade']:
+            stats['latest_trade'] = stats['latest_trade'].isoformat()
+    else:
+        stats = {
+            "total_trades": 0,
+            "unique_tickers": 0,
+            "earliest_trade": None,
+            "latest_trade": None,
+            "avg_price": 0,
+            "total_volume": 0
+        }
+    return stats
+
 @router.get("/stats")
 async def get_live_trades_stats():
     """
     Get statistics about live trades data
     """
     try:
-        query = """
-        SELECT 
-            COUNT(*) as total_trades,
-            COUNT(DISTINCT ticker) as unique_tickers,
-            MIN(localTS) as earliest_trade,
-            MAX(localTS) as latest_trade,
-            AVG(price) as avg_price,
-            SUM(size) as total_volume
-        FROM live_trades
-        WHERE localTS >= CONVERT_TZ(NOW(), @@session.time_zone, 'America/New_York')
-                          - INTERVAL 5 MINUTE
-        """
-        conn = s2.connect(**config)
-        try:
-            df = pd.read_sql(query, conn)
-        finally:
-            conn.close()
-        
-        if not df.empty:
-            stats = df.iloc[0].to_dict()
-            # Convert timestamps to strings for JSON serialization
-            if stats['earliest_trade']:
-                stats['earliest_trade'] = stats['earliest_trade'].isoformat()
-            if stats['latest_trade']:
-                stats['latest_trade'] = stats['latest_trade'].isoformat()
-        else:
-            stats = {
-                "total_trades": 0,
-                "unique_tickers": 0,
-                "earliest_trade": None,
-                "latest_trade": None,
-                "avg_price": 0,
-                "total_volume": 0
-            }
+        stats = await live_trades_flight.do(make_key("live_trades.stats"), bulkheads["db"].run, fetch_live_trades_stats)
         
         return {
             "status": "success",
             "stats": stats
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching stats: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error fetching stats: {str(e)}")
+
+@router.get("/leaders")
+async def get_live_trades_leaders(
+    metric: str = Query("gainers", description="gainers, losers or active"),
+    n: int = Query(10, ge=1, le=500, description="Number of tickers to return")
+):
+    """
+    Top gainers / losers by percent change from the day's first trade, or most active by
+    rolling volume. Served from rankings maintained incrementally by the trade feed.
+    """
+    if metric not in LEADERBOARD_METRICS:
+        raise HTTPException(status_code=400, detail=f"metric must be one of {', '.join(LEADERBOARD_METRICS)}")
+    return {
+        "status": "success",
+        "metric": metric,
+        "as_of": leaderboard.latest_ts.isoformat() if leaderboard.latest_ts is not None else None,
+        "leaders": leaderboard.leaders(metric, n)
+    }
+
+@router.get("/correlation")
+async def get_live_trades_correlation(
+    tickers: Optional[str] = Query(None, description="Comma-separated tickers; defaults to every ticker seen")
+):
+    """
+    Rolling correlation matrix of bucketed intraday log returns, maintained
+    incrementally from the trade feed. Unknown tickers are left out.
+    """
+    subset = [t.strip().upper() for t in tickers.split(",") if t.strip()] if tickers else None
+    return {
+        "status": "success",
+        **rolling_correlation.correlation(subset)
+    }
+
+@router.get("/anomalies")
+async def get_live_trades_anomalies(
+    ticker: Optional[str] = Query(None, description="Filter by ticker symbol"),
+    kind: Optional[str] = Query(None, description="price_move, size_spike, block_trade or price_gap"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum anomalies to return")
+):
+    """
+    Most recent unusual trades flagged by the streaming detector, newest first.
+    Live updates are pushed on the "anomalies" / "anomalies:<ticker>" stream topics.
+    """
+    anomalies = anomaly_detector.latest(ticker.upper() if ticker else None, kind, limit)
+    return {
+        "status": "success",
+        "count": len(anomalies),
+        "anomalies": anomalies
+    }
+
+HISTORY_CHUNK_SIZE = 5000
+HISTORY_MAX_LIMIT = 1000000
+
+def encode_history_cursor(local_ts: datetime, seq: int) -> str:
+    """Encode a (localTS, seq) keyset position as an opaque URL-safe cursor"""
+    raw = json.dumps([local_ts.isoformat(), seq], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_history_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by encode_history_cursor"""
+    try:
+        local_ts, seq = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if not isinstance(seq, int):
+            raise ValueError(seq)
+        return datetime.fromisoformat(local_ts), seq
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def build_history_query(ticker: Optional[str], after: Optional[Tuple[datetime, int]]) -> str:
+    """
+    Keyset query over (localTS, seq) within a [start, end) time range. seq is unique
+    (AUTO_INCREMENT), so no row shares the boundary key and none is skipped between chunks.
+    """
+    conditions = ["localTS >= %s", "localTS < %s"]
+    if ticker:
+        conditions.append("ticker = %s")
+    if after:
+        conditions.append("(localTS > %s OR (localTS = %s AND seq > %s))")
+    return f"""
+    SELECT localTS, seq, id, ticker, price, size
+      FROM live_trades
+     WHERE {" AND ".join(conditions)}
+     ORDER BY localTS, seq
+     LIMIT %s
+    """
+
+def fetch_history_chunk(conn, start: datetime, end: datetime, ticker: Optional[str],
+                        after: Optional[Tuple[datetime, int]], limit: int) -> list:
+    """Fetch one keyset chunk of trades as tuples"""
+    params = [start, end]
+    if ticker:
+        params.append(ticker)
+    if after:
+        params.extend([after[0], after[0], after[1]])
+    params.append(limit)
+    with conn.cursor() as cursor:
+        cursor.execute(build_history_query(ticker, after), params)
+        return cursor.fetchall()
+
+async def stream_history(conn, start: datetime, end: datetime, ticker: Optional[str],
+                         after: Optional[Tuple[datetime, int]], limit: int, rows: list):
+    """
+    Yield a JSON document for one page of history, HISTORY_CHUNK_SIZE rows at a time,
+    starting from the already fetched first chunk `rows`. Each chunk is its own keyset
+    query, so server memory doesn't grow with the page size. The status comes last: if
+    a later chunk fails the document still ends cleanly, with "status":"error", the
+    error and a next_cursor to resume from. Closes `conn` when done.
+    """
+    db = bulkheads["db"]
+    sent = 0
+    last_key = after
+    error = None
+    try:
+        yield '{"data":['
+        while rows:
+            records = [
+                {"localTS": row[0].isoformat(), "seq": row[1], "id": row[2], "ticker": row[3],
+                 "price": float(row[4]), "size": float(row[5]) if row[5] is not None else None}
+                for row in rows
+            ]
+            prefix = "," if sent else ""
+            yield prefix + json.dumps(records, separators=(",", ":"))[1:-1]
+            sent += len(rows)
+            last_key = (rows[-1][0], rows[-1][1])
+            if sent >= limit or len(rows) < HISTORY_CHUNK_SIZE:
+                break
+            try:
+                rows = await db.run(fetch_history_chunk, conn, start, end, ticker, last_key,
+                                    min(HISTORY_CHUNK_SIZE, limit - sent))
+            except Exception as e:
+                print(f"Error streaming trade history: {e}")
+                error = str(e)
+                break
+        # A full page (or a failed one) means there may be more rows after the last key
+        more = (sent == limit or error is not None) and last_key
+        next_cursor = encode_history_cursor(*last_key) if more else None
+        trailer = {"count": sent, "next_cursor": next_cursor, "status": "error" if error else "success"}
+        if error:
+            trailer["error"] = f"Error fetching trade history: {error}"
+        yield '],' + json.dumps(trailer, separators=(",", ":"))[1:]
+    finally:
+        await db.run(conn.close)
+
+@router.get("/history")
+async def get_live_trades_history(
+    ticker: Optional[str] = Query(None, description="Filter by ticker symbol"),
+    start: Optional[datetime] = Query(None, description="Inclusive start (America/New_York local time); defaults to end - 1 hour"),
+    end: Optional[datetime] = Query(None, description="Exclusive end (America/New_York local time); defaults to now"),
+    limit: int = Query(10000, ge=1, le=HISTORY_MAX_LIMIT, description="Maximum rows in this page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
+):
+    """
+    Page through historical trades ordered by (localTS, seq).
+    Pass the returned `next_cursor` to get the following page; it is null on the last page.
+    The response body is streamed in chunks; "status" comes last and is "error" (with
+    "error" and a resumable next_cursor) if the stream failed part-way. With the retention
+    job enabled, raw trades only reach back LIVE_TRADES_RETENTION_MINUTES.
+    """
+    try:
+        after = decode_history_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if end is None:
+        end = pd.Timestamp.now(tz='America/New_York').tz_localize(None).to_pydatetime()
+    if start is None:
+        start = end - timedelta(hours=1)
+    # localTS is stored as naive New York time
+    if end.tzinfo is not None:
+        end = pd.Timestamp(end).tz_convert('America/New_York').tz_localize(None).to_pydatetime()
+    if start.tzinfo is not None:
+        start = pd.Timestamp(start).tz_convert('America/New_York').tz_localize(None).to_pydatetime()
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    ticker = ticker.upper() if ticker else None
+    try:
+        conn = await bulkheads["db"].run(s2.connect, **config)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching trade history: {str(e)}")
+    # Fetch the first chunk before the first byte, so a failing query is still a 500
+    try:
+        rows = await bulkheads["db"].run(fetch_history_chunk, conn, start, end, ticker, after,
+                                         min(HISTORY_CHUNK_SIZE, limit))
+    except Exception as e:
+        await bulkheads["db"].run(conn.close)
+        raise HTTPException(status_code=500, detail=f"Error fetching trade history: {str(e)}")
+
+    return StreamingResponse(
+        stream_history(conn, start, end, ticker, after, limit, rows),
+        media_type="application/json"
+    )
@@ -0,0 +1,90 @@
+from fastapi import APIRouter, Query
+from typing import Optional
+
+from app.core.broadcast import broadcaster
+from app.core.cache import cache_stats
+from app.core.concurrency import bulkhead_stats
+from app.core.singleflight import flight_stats
+from app.services import retention_service
+from app.services.alert_service import alert_engine
+from app.services.cache_warmer import cache_warmer
+from app.services.anomaly_service import anomaly_detector
+from app.services.freshness_service import freshness
+from app.services.market_data import market_data
+from app.services.price_index import price_index
+from app.services.price_store import price_store
+from app.services.shared_panels import shared_panels
+from app.services.trade_feed import trade_feed
+from app.services.valuation_service import live_valuation
+
+router = APIRouter()
+
+@router.get("/coalescing")
+async def get_coalescing_metrics():
+    """Hit/miss metrics of the single-flight coalescers in front of hot read endpoints."""
+    return {
+        "status": "success",
+        "coalescing": flight_stats()
+    }
+
+@router.get("/caches")
+async def get_cache_metrics():
+    """Counters of the in-process TTL+LRU caches, the price store, the shared price panel and the cache warmer."""
+    return {
+        "status": "success",
+        "caches": cache_stats(),
+        "price_store": price_store.stats(),
+        "shared_panels": shared_panels.stats(),
+        "warmer": cache_warmer.stats()
+    }
+
+@router.get("/market-data")
+async def get_market_data_metrics():
+    """Provider order, latency budgets and per-provider hit/error/latency counters of the market-data chain."""
+    return {
+        "status": "success",
+        "market_data": market_data.stats()
+    }
+
+@router.get("/concurrency")
+async def get_concurrency_metrics():
+    """In-flight, queued and latency figures for each dependency's concurrency limit."""
+    return {
+        "status": "success",
+        "bulkheads": bulkhead_stats()
+    }
+
+@router.get("/retention")
+async def get_retention_metrics():
+    """Report of the last live_trades retention run (bars written, rows purged, bytes reclaimed)."""
+    return {
+        "status": "success",
+        "last_run": retention_service.last_report
+    }
+
+@router.get("/trade-feed")
+async def get_trade_feed_metrics():
+    """Watermark and throughput counters of the live_trades feed and the services it drives."""
+    return {
+        "status": "success",
+        "trade_feed": trade_feed.stats(),
+        "price_index": price_index.stats(),
+        "broadcast": broadcaster.stats(),
+        "live_valuation": live_valuation.stats(),
+        "alerts": alert_engine.stats(),
+        "anomalies": anomaly_detector.stats()
+    }
+
+@router.get("/freshness")
+async def get_freshness_metrics(
+    ticker: Optional[str] = Query(None, description="Limit the per-ticker section to one ticker")
+):
+    """
+    Live pipeline freshness: age of the newest localTS, trades per second over recent
+    intervals, feed health and per-ticker serve lag. pipeline_status is one of ok, stale
+    (nothing within the chart window), no_data or feed_error.
+    """
+    return {
+        "status": "success",
+        **freshness.snapshot(ticker.upper() if ticker else None)
+    }
@@ -1,6 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List
 
+from app.core.config import settings
+from app.core.concurrency import bulkheads
+from app.core.singleflight import get_flight, make_key
 from app.services.news_service import NewsService
 from app.services.ai_service import AIService
 from app.models.news_models import MarketNewsResponse, NewsArticle, NewsSource
@@ -8,6 +11,9 @@ from app.models.ai_insights_models import MarketSentiment
 
 router = APIRouter()
 
+# Market headlines change slowly; concurrent readers share one NewsAPI call per window
+news_flight = get_flight("news", ttl=settings.NEWS_COALESCE_TTL)
+
 @router.get("/market", response_model=MarketNewsResponse)
 async def get_market_news_endpoint(
     limit: int = 10, 
@@ -15,7 +21,8 @@ async def get_market_news_endpoint(
 ):
     """Fetches general market news articles."""
     try:
-        articles = news_service.get_market_news(limit=limit)
+        articles = await news_flight.do(make_key("news.market", limit=limit),
+                                        bulkheads["news"].run, news_service.get_market_news, limit)
         return MarketNewsResponse(articles=articles)
     except Exception as e:
         # Log the exception e
@@ -29,10 +36,10 @@ async def get_market_sentiment_endpoint(
     """Fetches latest market news and provides AI-driven sentiment analysis."""
     try:
         # Fetch a small number of recent news items for sentiment analysis
-        articles_for_sentiment = news_service.get_market_news(limit=5) 
+        articles_for_sentiment = await bulkheads["news"].run(news_service.get_market_news, limit=5)
         
         # The AIService.get_market_sentiment expects a list of dicts
-        raw_sentiment = ai_service.get_market_sentiment(articles_for_sentiment)
+        raw_sentiment = await ai_service.get_market_sentiment(articles_for_sentiment)
         return MarketSentiment(**raw_sentiment)
     except Exception as e:
         # Log the exception e
@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Dict, Any, Optional
+from pandas.tseries.frequencies import to_offset
 
+from app.core.concurrency import bulkheads
 from app.services.stock_service import StockService
+from app.services.valuation_service import live_valuation
 from app.utils.data_utils import calculate_portfolio_metrics
 from app.models.portfolio_models import (
     PortfolioDashboardData,
@@ -19,11 +22,18 @@ router = APIRouter()
 @router.get("/dashboard/{user_id}", response_model=PortfolioDashboardData)
 async def get_portfolio_dashboard(
     user_id: str,
+    period: str = Query("1y", description="History for the performance chart, e.g. 1mo, 6mo, 1y, 90d or 2y"),
+    resample: Optional[str] = Query("W", description="pandas resample rule for the chart (e.g. W, ME); empty for daily points"),
     stock_service: StockService = Depends(StockService)
 ):
     """Provides all necessary data for the portfolio dashboard."""
+    if resample:
+        try:
+            to_offset(resample)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid resample rule: {resample}")
     
-    positions: List[Position] = stock_service.get_optimized_positions(user_id)
+    positions: List[Position] = await bulkheads["db"].run(stock_service.get_optimized_positions, user_id)
 
     if not positions:
         return PortfolioDashboardData(
@@ -34,7 +44,7 @@ async def get_portfolio_dashboard(
     try:
         # 1. Get Holdings Performance (also includes total_value needed for allocation chart)
         # This returns a dict like {"holdings": [...], "total_value": X, ...}
-        performance_data_raw = stock_service.get_portfolio_performance(positions)
+        performance_data_raw = await bulkheads["compute"].run(stock_service.get_portfolio_performance, positions)
         
         # Ensure Pydantic models for holdings performance
         holdings_perf_models: List[HoldingPerformance] = [
@@ -58,7 +68,9 @@ async def get_portfolio_dashboard(
         
         # 4. Get Portfolio Performance Chart Data (Time-series)
         # This returns a list of dicts like {"timestamp": datetime, "value": float}
-        chart_data_raw = stock_service.get_portfolio_chart_data(positions)
+        chart_data_raw = await bulkheads["compute"].run(
+            stock_service.get_portfolio_chart_data, positions, period, resample or None
+        )
         print(f"Raw chart data received in router: {chart_data_raw[:2] if chart_data_raw else 'None'}")
         print(f"Raw chart data type: {type(chart_data_raw)}")
         print(f"Raw chart data length: {len(chart_data_raw)}")
@@ -91,4 +103,19 @@ async def get_portfolio_dashboard(
         raise HTTPException(
             status_code=500, 
             detail=f"An error occurred while generating the portfolio dashboard: {str(e)}"
-        ) 
\ No newline at end of file
+        ) 
+
+@router.get("/live/{user_id}")
+async def get_live_portfolio_valuation(user_id: str):
+    """
+    Current mark-to-market value and daily change of a user's portfolio, kept up to date
+    from the live trade stream. Subscribe to the "portfolio:<user_id>" topic on
+    /api/stream/ws to have updates pushed instead of polling.
+    """
+    snapshot = live_valuation.snapshot(user_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="No optimized portfolio found for this user.")
+    return {
+        "status": "success",
+        "valuation": snapshot
+    }
@@ -0,0 +1,42 @@
+import asyncio
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
+
+from app.core.broadcast import broadcaster
+
+router = APIRouter()
+
+@router.websocket("/ws")
+async def stream_updates(
+    websocket: WebSocket,
+    topics: str = Query(..., description="Comma-separated topics, e.g. portfolio:alice")
+):
+    """
+    Push live updates for the requested topics as JSON messages of the form
+    {"topic": ..., "data": ...}.
+    """
+    await websocket.accept()
+    queue = broadcaster.subscribe(t.strip() for t in topics.split(",") if t.strip())
+
+    async def wait_for_disconnect():
+        # Messages from the client are ignored; reading them is how a disconnect is noticed
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    # Wait on the client as well as the queue, so a client of a topic that never
+    # publishes is unsubscribed as soon as it leaves
+    disconnected = asyncio.ensure_future(wait_for_disconnect())
+    try:
+        while True:
+            update = asyncio.ensure_future(queue.get())
+            await asyncio.wait({update, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                update.cancel()
+                break
+            topic, data = update.result()
+            await websocket.send_json({"topic": topic, "data": data})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        disconnected.cancel()
+        broadcaster.unsubscribe(queue)
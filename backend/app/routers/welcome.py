@@ -10,6 +10,8 @@ from app.services.ai_service import AIService
 from app.services.news_service import NewsService
 from app.services.custom_investment_agent_service import get_additional_pages as get_additional_pages_service
 from app.services.database_service import insert_optimized_portfolio_db
+from app.core.concurrency import bulkheads
+from app.services.valuation_service import live_valuation
 
 router = APIRouter()
 
@@ -61,7 +63,7 @@ async def create_financial_plan(
             # The get_additional_pages_service might return a list of strings directly
             # or a string representation of a list like before.
             # For now, assuming it returns list[str]
-            additional_pages_list = get_additional_pages_service(investment_goals, BASE_PAGES)
+            additional_pages_list = await get_additional_pages_service(investment_goals, BASE_PAGES)
             if isinstance(additional_pages_list, str):
                 # If it's still a string like '["Page1", "Page2"]'
                 additional_pages = ast.literal_eval(additional_pages_list)
@@ -84,7 +86,7 @@ async def create_financial_plan(
             # 1. Optimize Portfolio using AI Service
             # The AIService.optimize_portfolio mock currently returns a dict.
             # We need to parse it into our Pydantic models.
-            raw_optimized_portfolio = ai_service.optimize_portfolio({}, investment_goals) # current_portfolio is empty for new plan
+            raw_optimized_portfolio = await ai_service.optimize_portfolio({}, investment_goals) # current_portfolio is empty for new plan
 
             if not raw_optimized_portfolio or not raw_optimized_portfolio.get("optimized_holdings"):
                 user_data_dict["custom_portfolio"] = OptimizedPortfolio(optimized_holdings=[])
@@ -106,7 +108,7 @@ async def create_financial_plan(
             # 2. Get AI Insights (after portfolio is confirmed)
             try:
                 # Portfolio Analysis
-                raw_portfolio_analysis = ai_service.get_portfolio_insights(raw_optimized_portfolio)
+                raw_portfolio_analysis = await ai_service.get_portfolio_insights(raw_optimized_portfolio)
                 portfolio_analysis_response = PortfolioAnalysis(**raw_portfolio_analysis)
 
                 # Market Sentiment - REMOVED from here
@@ -119,7 +121,8 @@ async def create_financial_plan(
 
             # 3. Insert into Database
             try:
-                insert_optimized_portfolio_db(
+                await bulkheads["db"].run(
+                    insert_optimized_portfolio_db,
                     optimized_portfolio_data=raw_optimized_portfolio, # The service expects a dict
                     user_id=user_name,
                     amount=user_data_dict['amount'],
@@ -138,6 +141,16 @@ async def create_financial_plan(
                     error=f"Database error: {str(e)}. Portfolio generated but not saved."
                 )
 
+            # 4. Start live valuation of the saved holdings (non-critical: the portfolio is saved)
+            try:
+                new_holdings = raw_optimized_portfolio.get("optimized_holdings", [])
+                quotes = await bulkheads["compute"].run(
+                    live_valuation.fetch_quotes, {h["symbol"] for h in new_holdings}
+                )
+                live_valuation.set_user_holdings(user_name, new_holdings, quotes)
+            except Exception as e:
+                print(f"Error starting live valuation for {user_name}: {e}")
+
         except Exception as e:
             print(f"Error in processing financial plan: {e}")
             user_data_dict["custom_portfolio"] = OptimizedPortfolio(optimized_holdings=[])
@@ -1,21 +1,38 @@
 import os
-from anthropic import Anthropic
+from anthropic import AsyncAnthropic
 import json
 from dotenv import load_dotenv
 
+from app.core.concurrency import bulkheads
+
 load_dotenv()
 
 anthropic_api_key = os.getenv('anthropic_api_key')
 
 
 class AIService:
+    # Shared async client, so per-request instances reuse one connection pool
+    _client = None
 
     def __init__(self):
         # the newest Anthropic model is "claude-3-5-sonnet-20241022" which was released October 22, 2024
-        self.client = Anthropic(api_key=anthropic_api_key)
+        if AIService._client is None:
+            AIService._client = AsyncAnthropic(api_key=anthropic_api_key)
+        self.client = AIService._client
         self.model = "claude-3-5-sonnet-20241022"
 
-    def get_portfolio_insights(self, portfolio_data: dict) -> dict:
+    async def _complete(self, prompt: str) -> dict:
+        """Send a single-prompt request under the LLM concurrency limit and parse the JSON reply"""
+        response = await bulkheads["llm"].call(self.client.messages.create,
+                                               model=self.model,
+                                               messages=[{
+                                                   "role": "user",
+                                                   "content": prompt
+                                               }],
+                                               max_tokens=1000)
+        return json.loads(response.content[0].text)
+
+    async def get_portfolio_insights(self, portfolio_data: dict) -> dict:
         """Generate AI insights for portfolio"""
         try:
             prompt = f"""You are a financial advisor. Analyze this portfolio data and provide insights:
@@ -28,17 +45,11 @@ Return your analysis as a JSON object with exactly these keys:
 - recommendations: An array of strings with actionable recommendations
 
 Format your response as valid JSON only, no other text."""
-            response = self.client.messages.create(model=self.model,
-                                                   messages=[{
-                                                       "role": "user",
-                                                       "content": prompt
-                                                   }],
-                                                   max_tokens=1000)
-            return json.loads(response.content[0].text)
+            return await self._complete(prompt)
         except Exception as e:
             raise Exception(f"Failed to generate portfolio insights: {e}")
 
-    def get_market_sentiment(self, news_articles: list) -> dict:
+    async def get_market_sentiment(self, news_articles: list) -> dict:
         """Analyze market sentiment from news"""
         try:
             prompt = f"""You are a financial analyst. Analyze these news articles and provide market sentiment:
@@ -51,17 +62,11 @@ Return your analysis as a JSON object with exactly these keys:
 - market_outlook: A string with a brief market outlook
 
 Format your response as valid JSON only, no other text."""
-            response = self.client.messages.create(model=self.model,
-                                                   messages=[{
-                                                       "role": "user",
-                                                       "content": prompt
-                                                   }],
-                                                   max_tokens=1000)
-            return json.loads(response.content[0].text)
+            return await self._complete(prompt)
         except Exception as e:
             raise Exception(f"Failed to analyze market sentiment: {e}")
 
-    def optimize_portfolio(self, portfolio_data: dict,
+    async def optimize_portfolio(self, portfolio_data: dict,
                            user_goals: str) -> dict:
         """Optimize portfolio according to user stated investment goals."""
         try:
@@ -77,12 +82,6 @@ Return your optimized portfolio as a JSON object with exactly these keys:
 - rationale: a string explaining the changes
 
 Format your response as valid JSON only, no additional text."""
-            response = self.client.messages.create(model=self.model,
-                                                   messages=[{
-                                                       "role": "user",
-                                                       "content": prompt
-                                                   }],
-                                                   max_tokens=1000)
-            return json.loads(response.content[0].text)
+            return await self._complete(prompt)
         except Exception as e:
             raise Exception(f"Failed to optimize portfolio: {e}") 
\ No newline at end of file
@@ -0,0 +1,445 @@
+"""
+Price alert engine with indexed threshold matching.
+
+Active alerts live in memory, indexed per ticker in sorted arrays, so each trade
+batch is matched in O(log n + k) per ticker (n alerts on the ticker, k triggered)
+instead of testing every alert against every trade:
+
+- "above" thresholds are stored negated in ascending order: everything at or
+  below the batch's high is a suffix of the array.
+- "below" thresholds are stored ascending: everything at or above the batch's
+  low is a suffix of the array.
+- "cross" thresholds are stored ascending: everything inside the range the price
+  covered since the previous batch is one contiguous slice.
+
+Every uvicorn worker runs its own engine on the same trade feed, so the table
+decides. Alerts are one-shot: a matched alert leaves the index and is claimed
+with `UPDATE ... WHERE id = %s AND triggered_at IS NULL`, and only the worker
+whose update hit the row pushes it. An alert deleted (or triggered) through
+another worker still sits in this worker's index until it matches, but its
+claim then updates nothing and it is dropped without firing. Claims that fail
+on a database error are retried every ALERT_SYNC_SECONDS.
+
+Pushes go to the "alerts:<user_id>" broadcast topic, which is per process. So
+every ALERT_SYNC_SECONDS each worker also reads the alerts triggered in the last
+ALERT_SYNC_LAG_SECONDS and pushes the ones it has not sent yet to its own
+subscribers; a client connected to another worker gets it within that interval.
+GET and list read the table, so every worker answers them the same way.
+
+The startup load builds each ticker's arrays in bulk and sorts them once, on the
+compute bulkhead, so loading millions of alerts doesn't block the event loop.
+"""
+import asyncio
+import datetime
+import time
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from app.core.broadcast import broadcaster
+from app.core.concurrency import bulkheads
+from app.core.config import settings
+from app.db.database import get_db_connection
+from app.models.alert_models import PriceAlert, PriceAlertCreate, PriceAlertTriggered
+
+INSERT_ALERT_QUERY = """
+INSERT INTO price_alerts (user_id, ticker, condition_type, threshold, created_at)
+VALUES (%s, %s, %s, %s, %s)
+"""
+DELETE_ALERT_QUERY = "DELETE FROM price_alerts WHERE id = %s"
+CLAIM_TRIGGERED_QUERY = """
+UPDATE price_alerts SET triggered_at = %s, triggered_price = %s
+ WHERE id = %s AND triggered_at IS NULL
+"""
+ALERT_COLUMNS = "id, user_id, ticker, condition_type, threshold, created_at, triggered_at, triggered_price"
+ACTIVE_ALERTS_QUERY = f"SELECT {ALERT_COLUMNS} FROM price_alerts WHERE triggered_at IS NULL"
+ALERT_BY_ID_QUERY = f"SELECT {ALERT_COLUMNS} FROM price_alerts WHERE id = %s"
+ALERTS_BY_USER_QUERY = f"SELECT {ALERT_COLUMNS} FROM price_alerts WHERE user_id = %s"
+RECENTLY_TRIGGERED_QUERY = f"SELECT {ALERT_COLUMNS} FROM price_alerts WHERE triggered_at >= %s"
+
+
+def alerts_topic(user_id: str) -> str:
+    return f"alerts:{user_id}"
+
+
+class _Alert:
+    """Compact in-memory alert record; millions of these must fit in memory."""
+    __slots__ = ("id", "user_id", "ticker", "condition", "threshold", "created_at",
+                 "triggered_at", "triggered_price")
+
+    def __init__(self, id, user_id, ticker, condition, threshold, created_at):
+        self.id = id
+        self.user_id = user_id
+        self.ticker = ticker
+        self.condition = condition
+        self.threshold = threshold
+        self.created_at = created_at
+        self.triggered_at = None
+        self.triggered_price = None
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "_Alert":
+        alert_id, user_id, ticker, condition, threshold, created_at, triggered_at, triggered_price = row
+        alert = cls(alert_id, user_id, ticker, condition, float(threshold), created_at)
+        alert.triggered_at = triggered_at
+        alert.triggered_price = float(triggered_price) if triggered_price is not None else None
+        return alert
+
+    def to_model(self) -> PriceAlert:
+        return PriceAlert(
+            id=self.id, user_id=self.user_id, ticker=self.ticker, condition=self.condition,
+            threshold=self.threshold, created_at=self.created_at, triggered_at=self.triggered_at,
+            triggered_price=self.triggered_price, active=self.triggered_at is None,
+        )
+
+
+class _SortedThresholds:
+    """(key, alert id) pairs kept sorted by key."""
+
+    def __init__(self):
+        self.keys: List[Tuple[float, int]] = []
+
+    def add(self, key: float, alert_id: int):
+        insort(self.keys, (key, alert_id))
+
+    def extend(self, pairs: Iterable[Tuple[float, int]]):
+        """Bulk insert: append everything, then sort once."""
+        self.keys.extend(pairs)
+        self.keys.sort()
+
+    def remove(self, key: float, alert_id: int):
+        i = bisect_left(self.keys, (key, alert_id))
+        if i < len(self.keys) and self.keys[i] == (key, alert_id):
+            del self.keys[i]
+
+    def pop_from(self, key: float) -> List[int]:
+        """Remove and return the ids of all entries with key >= `key` (a suffix)."""
+        i = bisect_left(self.keys, (key, -1))
+        popped = [alert_id for _, alert_id in self.keys[i:]]
+        del self.keys[i:]
+        return popped
+
+    def pop_between(self, low: float, high: float) -> List[int]:
+        """Remove and return the ids of all entries with low <= key <= high."""
+        i = bisect_left(self.keys, (low, -1))
+        j = bisect_right(self.keys, (high, float("inf")))
+        popped = [alert_id for _, alert_id in self.keys[i:j]]
+        del self.keys[i:j]
+        return popped
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class _TickerBook:
+    """All active alerts on one ticker."""
+
+    def __init__(self):
+        self.above = _SortedThresholds()  # keyed by -threshold
+        self.below = _SortedThresholds()  # keyed by threshold
+        self.cross = _SortedThresholds()  # keyed by threshold
+
+    def add(self, alert: _Alert):
+        if alert.condition == "above":
+            self.above.add(-alert.threshold, alert.id)
+        elif alert.condition == "below":
+            self.below.add(alert.threshold, alert.id)
+        else:
+            self.cross.add(alert.threshold, alert.id)
+
+    @classmethod
+    def build(cls, alerts: List[_Alert]) -> "_TickerBook":
+        """A book holding `alerts`, each array sorted once instead of insorted per alert."""
+        book = cls()
+        book.above.extend((-a.threshold, a.id) for a in alerts if a.condition == "above")
+        book.below.extend((a.threshold, a.id) for a in alerts if a.condition == "below")
+        book.cross.extend((a.threshold, a.id) for a in alerts if a.condition == "cross")
+        return book
+
+    def remove(self, alert: _Alert):
+        if alert.condition == "above":
+            self.above.remove(-alert.threshold, alert.id)
+        elif alert.condition == "below":
+            self.below.remove(alert.threshold, alert.id)
+        else:
+            self.cross.remove(alert.threshold, alert.id)
+
+    def match(self, low: float, high: float, previous: Optional[float]) -> List[int]:
+        """Pop the alerts triggered by prices spanning [low, high] after `previous`."""
+        triggered = self.above.pop_from(-high)   # threshold <= high
+        triggered += self.below.pop_from(low)     # threshold >= low
+        if previous is not None:
+            low, high = min(low, previous), max(high, previous)
+        if len(self.cross):  # a single price (low == high) that touches the threshold counts too
+            triggered += self.cross.pop_between(low, high)
+        return triggered
+
+    def __len__(self):
+        return len(self.above) + len(self.below) + len(self.cross)
+
+
+class AlertEngine:
+    """Indexed alert store matched against every trade batch."""
+
+    def __init__(self):
+        self.alerts: Dict[int, _Alert] = {}        # active alerts
+        self.by_user: Dict[str, Set[int]] = {}     # active alert ids per user
+        self.books: Dict[str, _TickerBook] = {}
+        self.unpersisted: Dict[int, _Alert] = {}   # matched, claim not written to the table yet
+        self.pushed: Dict[int, float] = {}         # alert id -> monotonic time pushed by this worker
+        self.last_price: Dict[str, float] = {}
+        self.loaded = False
+        self.triggered_count = 0
+        self.lost_claims = 0                       # deleted or triggered through another worker
+        self.synced_pushes = 0                     # pushed for alerts another worker triggered
+        self._gone_while_loading: Set[int] = set()  # triggered/deleted before the load finished
+        self._tasks: Set[asyncio.Task] = set()
+        self._claiming: Set[int] = set()
+
+    def _index(self, alert: _Alert):
+        self.alerts[alert.id] = alert
+        self.by_user.setdefault(alert.user_id, set()).add(alert.id)
+        self.books.setdefault(alert.ticker, _TickerBook()).add(alert)
+
+    def _unindex(self, alert: _Alert):
+        """Drop an alert from memory (the book entry is removed by the caller or by match())."""
+        del self.alerts[alert.id]
+        ids = self.by_user.get(alert.user_id)
+        if ids is not None:
+            ids.discard(alert.id)
+            if not ids:
+                del self.by_user[alert.user_id]
+        if not self.loaded:
+            self._gone_while_loading.add(alert.id)
+
+    @staticmethod
+    def build_index(rows: List[tuple]) -> Tuple[Dict[int, _Alert], Dict[str, Set[int]], Dict[str, _TickerBook]]:
+        """Alerts, per-user ids and per-ticker books for active alert rows (blocking; compute bulkhead)."""
+        alerts = {row[0]: _Alert.from_row(row) for row in rows}
+        by_user: Dict[str, Set[int]] = {}
+        by_ticker: Dict[str, List[_Alert]] = {}
+        for alert in alerts.values():
+            by_user.setdefault(alert.user_id, set()).add(alert.id)
+            by_ticker.setdefault(alert.ticker, []).append(alert)
+        books = {ticker: _TickerBook.build(group) for ticker, group in by_ticker.items()}
+        return alerts, by_user, books
+
+    # ---- persistence (blocking; run through the db bulkhead) ----
+
+    @staticmethod
+    def insert_alert(alert: PriceAlertCreate, created_at: datetime.datetime) -> int:
+        with get_db_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(INSERT_ALERT_QUERY, (alert.user_id, alert.ticker, alert.condition,
+                                                    alert.threshold, created_at))
+                alert_id = cursor.lastrowid
+            connection.commit()
+        return alert_id
+
+    @staticmethod
+    def delete_alert(alert_id: int) -> bool:
+        with get_db_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(DELETE_ALERT_QUERY, (alert_id,))
+                deleted = cursor.rowcount > 0
+            connection.commit()
+        return deleted
+
+    @staticmethod
+    def claim_triggered(rows: List[Tuple[datetime.datetime, float, int]]) -> List[int]:
+        """Mark alerts triggered unless already triggered or deleted; returns the ids this call claimed."""
+        claimed = []
+        with get_db_connection() as connection:
+            with connection.cursor() as cursor:
+                for row in rows:
+                    cursor.execute(CLAIM_TRIGGERED_QUERY, row)
+                    if cursor.rowcount > 0:
+                        claimed.append(row[2])
+            connection.commit()
+        return claimed
+
+    @staticmethod
+    def fetch_alerts(query: str, params: tuple = ()) -> List[tuple]:
+        with get_db_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(query, params or None)
+                return cursor.fetchall()
+
+    # ---- CRUD ----
+
+    async def create(self, alert: PriceAlertCreate) -> PriceAlert:
+        alert = alert.model_copy(update={"ticker": alert.ticker.upper()})
+        created_at = datetime.datetime.now().replace(microsecond=0)
+        alert_id = await bulkheads["db"].run(self.insert_alert, alert, created_at)
+        record = _Alert(alert_id, alert.user_id, alert.ticker, alert.condition, alert.threshold, created_at)
+        self._index(record)
+        return record.to_model()
+
+    async def get(self, alert_id: int) -> Optional[PriceAlert]:
+        rows = await bulkheads["db"].run(self.fetch_alerts, ALERT_BY_ID_QUERY, (alert_id,))
+        return _Alert.from_row(rows[0]).to_model() if rows else None
+
+    async def list_for_user(self, user_id: str) -> List[PriceAlert]:
+        """All alerts of a user, active and triggered."""
+        rows = await bulkheads["db"].run(self.fetch_alerts, ALERTS_BY_USER_QUERY, (user_id,))
+        return [_Alert.from_row(row).to_model() for row in sorted(rows)]
+
+    async def delete(self, alert_id: int) -> bool:
+        """Delete the row; other workers drop their copy when its claim finds no row."""
+        deleted = await bulkheads["db"].run(self.delete_alert, alert_id)
+        if not self.loaded:
+            self._gone_while_loading.add(alert_id)  # the load may have read it before the delete
+        record = self.alerts.get(alert_id)
+        if record is not None:
+            if record.ticker in self.books:
+                self.books[record.ticker].remove(record)
+            self._unindex(record)
+        self.unpersisted.pop(alert_id, None)
+        return deleted
+
+    async def load(self, retry_seconds: int = 30):
+        """Load active alerts from the database, retrying until it succeeds."""
+        while not self.loaded:
+            try:
+                rows = await bulkheads["db"].run(self.fetch_alerts, ACTIVE_ALERTS_QUERY)
+                gone = set(self._gone_while_loading)
+                rows = [row for row in rows if row[0] not in gone and row[0] not in self.alerts]
+                alerts, by_user, books = await bulkheads["compute"].run(self.build_index, rows)
+                # Swap in the bulk-built index, then re-add alerts created while it was built
+                # and drop the ones triggered or deleted meanwhile
+                created, self.alerts, self.by_user, self.books = self.alerts, alerts, by_user, books
+                for alert in created.values():
+                    if alert.id not in self.alerts:
+                        self._index(alert)
+                for alert_id in self._gone_while_loading - gone:
+                    alert = self.alerts.get(alert_id)
+                    if alert is not None:
+                        self.books[alert.ticker].remove(alert)
+                        self._unindex(alert)
+                self.loaded = True
+                self._gone_while_loading.clear()
+                print(f"Loaded {len(rows)} active price alerts")
+            except Exception as e:
+                print(f"Loading price alerts failed: {e}")
+                await asyncio.sleep(retry_seconds)
+
+    # ---- trade feed ----
+
+    def on_trades(self, batch: pd.DataFrame):
+        """Trade feed subscriber: trigger alerts whose thresholds the batch's prices reached."""
+        if batch.empty:
+            return
+        watched = batch[batch['ticker'].isin(self.books.keys())]
+        if not watched.empty:
+            ranges = watched.groupby('ticker', sort=False)['price'].agg(['min', 'max'])
+            now = datetime.datetime.now().replace(microsecond=0)
+            matched = False
+            for ticker, low, high in zip(ranges.index, ranges['min'], ranges['max']):
+                book = self.books[ticker]
+                for alert_id in book.match(low, high, self.last_price.get(ticker)):
+                    record = self.alerts[alert_id]
+                    record.triggered_at = now
+                    record.triggered_price = float(high if record.condition == "above" else
+                                                   low if record.condition == "below" else
+                                                   min(max(record.threshold, low), high))
+                    self._unindex(record)
+                    self.unpersisted[alert_id] = record
+                    matched = True
+                if not len(book):
+                    del self.books[ticker]
+            if matched:
+                task = asyncio.ensure_future(self._claim_triggered())
+                self._tasks.add(task)
+                task.add_done_callback(self._task_done)
+        last = batch.drop_duplicates('ticker', keep='last')
+        self.last_price.update(zip(last['ticker'], last['price']))
+
+    def _notify(self, record: _Alert):
+        self.pushed[record.id] = time.monotonic()
+        direction = {"above": "rose to", "below": "fell to", "cross": "crossed"}[record.condition]
+        message = PriceAlertTriggered(
+            alert=record.to_model(),
+            message=f"{record.ticker} {direction} {record.threshold:g}",
+        )
+        broadcaster.publish(alerts_topic(record.user_id), message.model_dump(mode="json"))
+
+    async def _claim_triggered(self):
+        """Claim matched alerts in the table and push the ones claimed; on failure they stay in `unpersisted`."""
+        # Everything unclaimed that no other task is writing: these ids plus earlier failures
+        records = [r for r in self.unpersisted.values() if r.id not in self._claiming]
+        if not records:
+            return
+        ids = {r.id for r in records}
+        self._claiming |= ids
+        try:
+            claimed = set(await bulkheads["db"].run(
+                self.claim_triggered, [(r.triggered_at, r.triggered_price, r.id) for r in records]))
+            for record in records:
+                if self.unpersisted.pop(record.id, None) is None:
+                    continue  # deleted through this worker meanwhile
+                if record.id in claimed:
+                    self.triggered_count += 1
+                    self._notify(record)
+                else:
+                    self.lost_claims += 1
+        except Exception as e:
+            print(f"Claiming {len(records)} triggered alerts failed: {e}")
+        finally:
+            self._claiming -= ids
+
+    async def sync_loop(self):
+        """Retry failed claims and push alerts triggered by other workers, every ALERT_SYNC_SECONDS."""
+        while True:
+            await asyncio.sleep(settings.ALERT_SYNC_SECONDS)
+            if self.unpersisted:
+                await self._claim_triggered()
+            try:
+                await self.push_recently_triggered()
+            except Exception as e:
+                print(f"Syncing triggered price alerts failed: {e}")
+
+    async def push_recently_triggered(self):
+        """Push alerts triggered in the last ALERT_SYNC_LAG_SECONDS that this worker has not pushed."""
+        lag = settings.ALERT_SYNC_LAG_SECONDS
+        cutoff = time.monotonic() - 2 * lag
+        self.pushed = {i: t for i, t in self.pushed.items() if t >= cutoff}
+        since = datetime.datetime.now().replace(microsecond=0) - datetime.timedelta(seconds=lag)
+        rows = await bulkheads["db"].run(self.fetch_alerts, RECENTLY_TRIGGERED_QUERY, (since,))
+        for row in rows:
+            record = _Alert.from_row(row)
+            if record.id in self.pushed or record.id in self.unpersisted:
+                continue  # pushed already, or our own claim is still in flight
+            # A copy still indexed here lost (or will lose) its claim: drop it now
+            stale = self.alerts.get(record.id)
+            if stale is not None:
+                if stale.ticker in self.books:
+                    self.books[stale.ticker].remove(stale)
+                    if not len(self.books[stale.ticker]):
+                        del self.books[stale.ticker]
+                self._unindex(stale)
+            if broadcaster.has_subscribers(alerts_topic(record.user_id)):
+                self.synced_pushes += 1
+                self._notify(record)
+            else:
+                self.pushed[record.id] = time.monotonic()
+
+    def _task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Price alert background task failed: {task.exception()}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "alerts": len(self.alerts),
+            "active": sum(len(book) for book in self.books.values()),
+            "tickers": len(self.books),
+            "triggered": self.triggered_count,
+            "unpersisted": len(self.unpersisted),
+            "lost_claims": self.lost_claims,
+            "synced_pushes": self.synced_pushes,
+        }
+
+
+alert_engine = AlertEngine()
@@ -0,0 +1,161 @@
+"""
+Streaming anomaly and large-print detection on live trades.
+
+Each ticker keeps exponentially weighted mean/variance estimates of its
+trade-to-trade log returns and of its log trade sizes. Every trade from the
+trade feed is scored against that state and then folded into it, so the cost is
+O(1) per trade with a few floats of state per ticker. A trade is flagged as:
+
+- "price_move": |return z-score| >= ANOMALY_Z_THRESHOLD
+- "size_spike": log-size z-score >= ANOMALY_Z_THRESHOLD
+- "block_trade": size >= ANOMALY_BLOCK_SIZE shares
+- "price_gap": |price change vs the previous trade| >= ANOMALY_GAP_PERCENT
+
+z-score flags are only raised once the ticker's estimate has ANOMALY_WARMUP_TRADES
+observations (returns or sizes); trades without a finite size skip the size checks.
+Flagged trades are kept in a bounded buffer of recent anomalies and published
+to the "anomalies" and "anomalies:<ticker>" broadcast topics.
+"""
+import math
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.broadcast import broadcaster
+from app.core.config import settings
+
+ANOMALIES_TOPIC = "anomalies"
+
+
+class _TickerState:
+    __slots__ = ("count", "sizes", "last_price", "return_mean", "return_var", "size_mean", "size_var")
+
+    def __init__(self):
+        self.count = 0  # priced trades seen (returns seen is one less)
+        self.sizes = 0  # finite sizes seen
+        self.last_price = 0.0
+        self.return_mean = 0.0
+        self.return_var = 0.0
+        self.size_mean = 0.0
+        self.size_var = 0.0
+
+
+class AnomalyDetector:
+    """EWMA z-score, block trade and price gap checks run inline on trade batches."""
+
+    def __init__(self, halflife: float = 200, z_threshold: float = 4.0, warmup: int = 50,
+                 block_size: float = 10000, gap_percent: float = 2.0, max_recent: int = 1000):
+        self.alpha = 1 - math.exp(math.log(0.5) / halflife)
+        self.z_threshold = z_threshold
+        self.warmup = warmup
+        self.block_size = block_size
+        self.gap = gap_percent / 100
+        self.state: Dict[str, _TickerState] = {}
+        self.recent = deque(maxlen=max_recent)
+        self.trades_scored = 0
+        self.anomalies_found = 0
+
+    def on_trades(self, batch: pd.DataFrame):
+        """Trade feed subscriber: score every trade, then update its ticker's state."""
+        if batch.empty:
+            return
+        alpha, z_threshold = self.alpha, self.z_threshold
+        states = self.state
+        timestamps = batch['localTS']
+        tickers = batch['ticker'].to_numpy()
+        prices = batch['price'].to_numpy(dtype=float)
+        sizes = batch['size'].to_numpy(dtype=float)
+        sizes = np.where(np.isfinite(sizes), sizes, np.nan)  # missing/infinite sizes: price checks only
+        log_sizes = np.log(np.maximum(sizes, 1.0)).tolist()
+        prices, sizes = prices.tolist(), sizes.tolist()
+
+        for i in range(len(prices)):
+            ticker, price, log_size = tickers[i], prices[i], log_sizes[i]
+            if not price > 0:  # also skips NaN prices
+                continue
+            state = states.get(ticker)
+            if state is None:
+                state = states[ticker] = _TickerState()
+            kinds = []
+            return_z = size_z = None
+
+            # Trade size (NaN would poison the EWMA for good, so skip it)
+            if log_size == log_size:
+                if state.sizes >= self.warmup and state.size_var > 0:
+                    size_z = (log_size - state.size_mean) / math.sqrt(state.size_var)
+                    if size_z >= z_threshold:
+                        kinds.append("size_spike")
+                if sizes[i] >= self.block_size:
+                    kinds.append("block_trade")
+                delta = log_size - state.size_mean if state.sizes else 0.0
+                state.size_mean = state.size_mean + alpha * delta if state.sizes else log_size
+                state.size_var = (1 - alpha) * (state.size_var + alpha * delta * delta)
+                state.sizes += 1
+
+            # Price return vs the previous trade
+            change = 0.0
+            if state.count:
+                r = math.log(price / state.last_price)
+                change = price / state.last_price - 1
+                if state.count - 1 >= self.warmup and state.return_var > 0:
+                    return_z = (r - state.return_mean) / math.sqrt(state.return_var)
+                    if abs(return_z) >= z_threshold:
+                        kinds.append("price_move")
+                if abs(change) >= self.gap:
+                    kinds.append("price_gap")
+                delta = r - state.return_mean
+                state.return_mean += alpha * delta
+                state.return_var = (1 - alpha) * (state.return_var + alpha * delta * delta)
+            state.last_price = price
+            state.count += 1
+
+            if kinds:
+                self._flag({
+                    "ts": timestamps.iat[i].isoformat(),
+                    "ticker": ticker,
+                    "price": price,
+                    "size": sizes[i] if sizes[i] == sizes[i] else None,
+                    "kinds": kinds,
+                    "change_percent": round(change * 100, 4),
+                    "return_z": None if return_z is None else round(return_z, 2),
+                    "size_z": None if size_z is None else round(size_z, 2),
+                })
+        self.trades_scored += len(prices)
+
+    def _flag(self, anomaly: Dict[str, Any]):
+        self.recent.append(anomaly)
+        self.anomalies_found += 1
+        for topic in (ANOMALIES_TOPIC, f"{ANOMALIES_TOPIC}:{anomaly['ticker']}"):
+            if broadcaster.has_subscribers(topic):
+                broadcaster.publish(topic, anomaly)
+
+    def latest(self, ticker: Optional[str] = None, kind: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent anomalies first, optionally filtered by ticker and kind."""
+        result = []
+        for anomaly in reversed(self.recent):
+            if ticker and anomaly["ticker"] != ticker:
+                continue
+            if kind and kind not in anomaly["kinds"]:
+                continue
+            result.append(anomaly)
+            if len(result) == limit:
+                break
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tickers": len(self.state),
+            "trades_scored": self.trades_scored,
+            "anomalies": self.anomalies_found,
+        }
+
+
+anomaly_detector = AnomalyDetector(
+    halflife=settings.ANOMALY_HALFLIFE_TRADES,
+    z_threshold=settings.ANOMALY_Z_THRESHOLD,
+    warmup=settings.ANOMALY_WARMUP_TRADES,
+    block_size=settings.ANOMALY_BLOCK_SIZE,
+    gap_percent=settings.ANOMALY_GAP_PERCENT,
+)
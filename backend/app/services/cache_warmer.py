@@ -0,0 +1,139 @@
+"""
+Startup cache warmer and refresh-ahead loop for the hot symbol set.
+
+The hot set is CACHE_WARM_SYMBOLS (default: the dummy-price universe) plus the
+market indices and every distinct symbol in `optimized_portfolio`. On startup
+(and every CACHE_WARM_RELOAD_SECONDS, to pick up new portfolios) the full
+histories, static info, quotes and the dashboard chart series of those symbols
+are computed, so the first dashboards after a deploy are cache hits. Their
+histories are first published to the shared price panel, which every worker
+maps, instead of being copied into each worker's "stock_data" cache.
+
+Every CACHE_REFRESH_INTERVAL_SECONDS the entries of the hour-long caches that
+expire within CACHE_REFRESH_AHEAD_SECONDS are recomputed in the background while
+the old values keep being served (TTLCache.refresh_ahead): hot symbols always,
+other entries only if they were read since they were stored, so cold entries
+still expire. Quotes are not refreshed: their TTL is seconds and they are cheap.
+Each tick also republishes the shared panel once the day rolls over.
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.concurrency import bulkheads
+from app.core.config import settings
+from app.db.database import get_db_connection
+from app.services import series_cache
+from app.services.market_data import market_data
+from app.services.shared_panels import shared_panels
+from app.services.stock_service import MARKET_INDICES, StockService
+
+PORTFOLIO_SYMBOLS_QUERY = "SELECT DISTINCT symbol FROM optimized_portfolio"
+
+
+def _split(spec: str) -> List[str]:
+    return [item.strip() for item in spec.split(",") if item.strip()]
+
+
+class CacheWarmer:
+    """Warms the hot symbols' market data on startup and refreshes cached entries ahead of expiry."""
+
+    def __init__(self):
+        configured = [s.upper() for s in _split(settings.CACHE_WARM_SYMBOLS)] or list(StockService._dummy_prices)
+        self.configured_symbols: Set[str] = set(configured) | set(MARKET_INDICES)
+        self.portfolio_symbols: Set[str] = set()
+        self.periods = _split(settings.CACHE_WARM_PERIODS)
+        self.warm_runs = 0
+        self.last_warm_seconds: Optional[float] = None
+        self.refresh_runs = 0
+        self.refreshes: Dict[str, int] = {"stock_data": 0, "stock_info": 0, "symbol_series": 0}
+        self.last_refresh_seconds: Optional[float] = None
+        self.errors = 0
+
+    @property
+    def hot_symbols(self) -> Set[str]:
+        return self.configured_symbols | self.portfolio_symbols
+
+    @staticmethod
+    def fetch_portfolio_symbols() -> List[str]:
+        """Distinct symbols held in any optimized portfolio (blocking; db bulkhead)."""
+        with get_db_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(PORTFOLIO_SYMBOLS_QUERY)
+                return [row[0] for row in cursor.fetchall() if row[0]]
+
+    def warm(self, symbols: List[str]):
+        """Compute whatever the caches are missing for `symbols` (blocking; compute bulkhead)."""
+        started = time.perf_counter()
+        self.publish_panel(symbols)
+        StockService.get_stock_data_many(symbols, settings.STOCK_HISTORY_PERIOD)
+        StockService._stock_info_cache.get_or_compute_many(symbols, StockService._generate_stock_infos)
+        market_data.quotes(symbols)
+        for period in self.periods:
+            series_cache.get_symbol_series(symbols, period)
+        self.warm_runs += 1
+        self.last_warm_seconds = time.perf_counter() - started
+
+    def publish_panel(self, symbols: List[str]):
+        """Put `symbols` in today's shared price panel (a no-op when it already has them)."""
+        if settings.SHARED_PANELS_ENABLED and settings.PRICE_STORE_ENABLED:
+            shared_panels.publish(symbols)
+
+    def refresh(self):
+        """Recompute entries expiring within CACHE_REFRESH_AHEAD_SECONDS (blocking; compute bulkhead)."""
+        started = time.perf_counter()
+        within = settings.CACHE_REFRESH_AHEAD_SECONDS
+        hot = self.hot_symbols
+        self.publish_panel(sorted(hot))
+        # Histories first: the series rebuilt after them are then built from the fresh data.
+        # Hot histories the shared panel serves are left to expire instead of kept per worker.
+        self.refreshes["stock_data"] += market_data.refresh_ahead(
+            within, lambda key: key[0] in hot and not shared_panels.serves(key[0]))
+        self.refreshes["stock_info"] += StockService._stock_info_cache.refresh_ahead(
+            within, StockService._generate_stock_infos, lambda key: key in hot)
+        self.refreshes["symbol_series"] += series_cache.refresh_ahead(
+            within, lambda key: key[0] in hot and key[1] in self.periods)
+        self.refresh_runs += 1
+        self.last_refresh_seconds = time.perf_counter() - started
+
+    async def run(self):
+        """Warm on startup, then refresh ahead of expiry every CACHE_REFRESH_INTERVAL_SECONDS until cancelled."""
+        reloaded_at = None
+        while True:
+            if reloaded_at is None or time.monotonic() - reloaded_at >= settings.CACHE_WARM_RELOAD_SECONDS:
+                reloaded_at = time.monotonic()
+                try:
+                    self.portfolio_symbols = set(await bulkheads["db"].run(self.fetch_portfolio_symbols))
+                except Exception as e:
+                    print(f"Loading portfolio symbols for the cache warmer failed: {e}")
+                try:
+                    symbols = sorted(self.hot_symbols)
+                    await bulkheads["compute"].run(self.warm, symbols)
+                    print(f"Warmed market-data caches for {len(symbols)} symbols in {self.last_warm_seconds:.2f}s")
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Warming market-data caches failed: {e}")
+            else:
+                try:
+                    await bulkheads["compute"].run(self.refresh)
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Refreshing market-data caches failed: {e}")
+            await asyncio.sleep(settings.CACHE_REFRESH_INTERVAL_SECONDS)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.CACHE_WARMER_ENABLED,
+            "hot_symbols": len(self.hot_symbols),
+            "portfolio_symbols": len(self.portfolio_symbols),
+            "periods": self.periods,
+            "warm_runs": self.warm_runs,
+            "last_warm_seconds": self.last_warm_seconds,
+            "refresh_runs": self.refresh_runs,
+            "refreshes": dict(self.refreshes),
+            "last_refresh_seconds": self.last_refresh_seconds,
+            "errors": self.errors,
+        }
+
+
+cache_warmer = CacheWarmer()
@@ -0,0 +1,142 @@
+"""
+Rolling cross-ticker correlation matrix over live trades.
+
+Trades from the trade feed are resampled into fixed time buckets (last price per
+ticker per bucket). When a bucket closes, the log return of every ticker since
+the previous close is pushed into a ring buffer of the last `window` buckets,
+and the running sums S1 = sum(r) and S2 = sum(r r^T) are updated by adding the
+new vector and subtracting the evicted one. Covariance and correlation for any
+subset of tickers are derived from S1/S2 on request, so the cost per update is
+O(tickers^2) regardless of the window length.
+
+A ticker that did not trade in a bucket contributes a zero return (its price is
+unchanged); tickers first seen mid-window have zero returns before that.
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+
+
+class RollingCorrelation:
+    """Incrementally maintained covariance/correlation of bucketed log returns."""
+
+    def __init__(self, bucket_seconds: int = 5, window: int = 120, initial_capacity: int = 64):
+        self.bucket_ns = int(bucket_seconds * 1e9)
+        self.bucket_seconds = bucket_seconds
+        self.window = window
+        self.index: Dict[str, int] = {}
+        self.tickers: List[str] = []
+        self._capacity = initial_capacity
+        self._returns = np.zeros((window, initial_capacity))  # ring buffer of return vectors
+        self._pos = 0
+        self.count = 0  # buckets currently in the window
+        self._sum = np.zeros(initial_capacity)
+        self._sum_outer = np.zeros((initial_capacity, initial_capacity))
+        self._prices = np.full(initial_capacity, np.nan)      # latest traded price
+        self._prev_close = np.full(initial_capacity, np.nan)  # price at the last bucket close
+        self._current_bucket: Optional[int] = None
+        self._updates_since_rebuild = 0
+
+    def _register(self, tickers) -> np.ndarray:
+        """Map tickers to matrix columns, growing the matrices when needed."""
+        for ticker in tickers:
+            if ticker not in self.index:
+                if len(self.tickers) == self._capacity:
+                    self._grow()
+                self.index[ticker] = len(self.tickers)
+                self.tickers.append(ticker)
+        return np.fromiter((self.index[t] for t in tickers), dtype=np.intp, count=len(tickers))
+
+    def _grow(self):
+        old, new = self._capacity, self._capacity * 2
+        self._returns = np.pad(self._returns, ((0, 0), (0, new - old)))
+        self._sum = np.pad(self._sum, (0, new - old))
+        self._sum_outer = np.pad(self._sum_outer, ((0, new - old), (0, new - old)))
+        self._prices = np.pad(self._prices, (0, new - old), constant_values=np.nan)
+        self._prev_close = np.pad(self._prev_close, (0, new - old), constant_values=np.nan)
+        self._capacity = new
+
+    def on_trades(self, batch: pd.DataFrame):
+        """Trade feed subscriber: update bucket prices, closing buckets as time advances."""
+        if batch.empty:
+            return
+        buckets = batch['localTS'].to_numpy(dtype='datetime64[ns]').astype(np.int64) // self.bucket_ns
+        # Last price per (bucket, ticker); the batch is ordered by localTS
+        last = (pd.DataFrame({'bucket': buckets, 'ticker': batch['ticker'].to_numpy(),
+                              'price': batch['price'].to_numpy(dtype=float)})
+                .drop_duplicates(['bucket', 'ticker'], keep='last'))
+
+        for bucket, group in last.groupby('bucket', sort=True):
+            if self._current_bucket is None:
+                self._current_bucket = bucket
+            elif bucket > self._current_bucket:
+                self._close_buckets(int(bucket - self._current_bucket))
+                self._current_bucket = bucket
+            elif bucket < self._current_bucket:
+                continue  # late trades for an already closed bucket
+            columns = self._register(group['ticker'].tolist())  # may grow the arrays
+            self._prices[columns] = group['price'].to_numpy()
+
+    def _close_buckets(self, elapsed: int):
+        """Close the current bucket, plus `elapsed - 1` empty buckets after it."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = np.log(self._prices / self._prev_close)
+        r[~np.isfinite(r)] = 0.0
+        self._push(r)
+        zeros = np.zeros(self._capacity)
+        for _ in range(min(elapsed - 1, self.window)):
+            self._push(zeros)
+        self._prev_close = self._prices.copy()
+
+    def _push(self, r: np.ndarray):
+        if self.count == self.window:
+            evicted = self._returns[self._pos]
+            self._sum -= evicted
+            self._sum_outer -= np.outer(evicted, evicted)
+        else:
+            self.count += 1
+        self._returns[self._pos] = r
+        self._sum += r
+        self._sum_outer += np.outer(r, r)
+        self._pos = (self._pos + 1) % self.window
+
+        # Recompute the sums from the buffer once per window to cancel floating-point drift
+        self._updates_since_rebuild += 1
+        if self._updates_since_rebuild >= self.window:
+            filled = self._returns if self.count == self.window else self._returns[:self.count]
+            self._sum = filled.sum(axis=0)
+            self._sum_outer = filled.T @ filled
+            self._updates_since_rebuild = 0
+
+    def covariance(self, tickers: List[str]) -> np.ndarray:
+        """Sample covariance of bucket returns for the given (known) tickers."""
+        idx = np.array([self.index[t] for t in tickers], dtype=np.intp)
+        n = self.count
+        if n < 2:
+            return np.full((len(idx), len(idx)), np.nan)
+        mean = self._sum[idx] / n
+        return (self._sum_outer[np.ix_(idx, idx)] - n * np.outer(mean, mean)) / (n - 1)
+
+    def correlation(self, tickers: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Correlation matrix for a subset of tickers (all known tickers by default)."""
+        tickers = [t for t in (tickers or self.tickers) if t in self.index]
+        cov = self.covariance(tickers)
+        std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.outer(std, std)
+        corr = np.clip(corr, -1.0, 1.0)
+        return {
+            "tickers": tickers,
+            "observations": self.count,
+            "bucket_seconds": self.bucket_seconds,
+            "correlation": [[None if np.isnan(v) else round(float(v), 6) for v in row] for row in corr],
+        }
+
+
+rolling_correlation = RollingCorrelation(
+    bucket_seconds=settings.CORRELATION_BUCKET_SECONDS,
+    window=settings.CORRELATION_WINDOW_BUCKETS,
+)
@@ -1,16 +1,22 @@
 import os
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 import singlestoredb as s2
 import yfinance as yf
 from .stock_service import StockService
+from app.core.concurrency import bulkheads
 
 load_dotenv()
 
-def get_additional_pages(investment_goals: str, current_pages: list) -> list:
-    client = OpenAI(api_key=os.getenv("openai_api_key"))
+_async_openai_client = None
 
-    response = client.chat.completions.create(
+async def get_additional_pages(investment_goals: str, current_pages: list) -> list:
+    global _async_openai_client
+    if _async_openai_client is None:
+        _async_openai_client = AsyncOpenAI(api_key=os.getenv("openai_api_key"))
+
+    response = await bulkheads["llm"].call(
+        _async_openai_client.chat.completions.create,
         model="gpt-4o-mini",
         messages=[{"role": "user", "content": f"""You are a financial advisor. Based on the following investment goals and current pages, 
                    return a list of additional pages that are relevant to the investment goals from the following list: ["College Savings Account", "529 Plan", "Crypto Investments", "Mortgage Planning", "Estate Planning", "Life Insurance"] 
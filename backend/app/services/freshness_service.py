@@ -0,0 +1,110 @@
+"""
+Freshness and consumer-lag tracking for the live trades pipeline.
+
+Fed by the trade feed, so it costs nothing per request beyond reading a few
+counters. It answers "why is the live chart empty?":
+
+- age of the newest localTS seen (producer down or ingestion stalled),
+- trades per second over the last few intervals (from a per-second ring buffer),
+- per ticker, the lag between a trade's localTS and the moment the feed served it,
+- whether the feed itself is polling successfully (reader broken vs. no new data).
+
+localTS is America/New_York wall-clock time, so ages are measured against the
+current New York time.
+"""
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services.trade_feed import trade_feed
+
+RATE_INTERVALS = (10, 60, 300)
+CHART_WINDOW_SECONDS = 60  # window of GET /api/live-trades/data
+
+
+def now_new_york() -> pd.Timestamp:
+    return pd.Timestamp.now(tz='America/New_York').tz_localize(None)
+
+
+class FreshnessTracker:
+    """Per-second trade counts plus newest-trade and serve-lag figures per ticker."""
+
+    def __init__(self, horizon_seconds: int = max(RATE_INTERVALS)):
+        self.horizon = horizon_seconds
+        self._second = np.full(horizon_seconds, -1, dtype=np.int64)  # epoch second held by each slot
+        self._count = np.zeros(horizon_seconds, dtype=np.int64)
+        self.newest: Optional[pd.Timestamp] = None
+        self.last_trade: Dict[str, pd.Timestamp] = {}
+        self.serve_lag: Dict[str, float] = {}  # seconds from localTS to delivery, newest trade per ticker
+        self.served_at: Optional[pd.Timestamp] = None
+
+    def on_trades(self, batch: pd.DataFrame):
+        """Trade feed subscriber: count trades per second and record serve lag."""
+        if batch.empty:
+            return
+        served_at = now_new_york()
+        seconds = batch['localTS'].to_numpy(dtype='datetime64[s]').astype(np.int64)
+        values, counts = np.unique(seconds, return_counts=True)
+        recent = values > values[-1] - self.horizon  # a backfill may span more than the ring
+        values, counts = values[recent], counts[recent]
+        slots = values % self.horizon
+        stale = self._second[slots] != values
+        self._count[slots[stale]] = 0
+        self._second[slots] = values
+        np.add.at(self._count, slots, counts)
+
+        last = batch.drop_duplicates('ticker', keep='last')
+        lags = (served_at - last['localTS']).dt.total_seconds()
+        self.last_trade.update(zip(last['ticker'], last['localTS']))
+        self.serve_lag.update(zip(last['ticker'], lags.round(3)))
+        if self.newest is None or batch['localTS'].iloc[-1] > self.newest:  # late rows don't move it back
+            self.newest = batch['localTS'].iloc[-1]
+        self.served_at = served_at
+
+    def trades_per_second(self, now: pd.Timestamp) -> Dict[str, float]:
+        now_s = int(now.value // 10**9)
+        rates = {}
+        for interval in RATE_INTERVALS:
+            in_window = self._second > now_s - interval
+            rates[f"{interval}s"] = round(float(self._count[in_window].sum()) / interval, 3)
+        return rates
+
+    def snapshot(self, ticker: Optional[str] = None) -> Dict[str, Any]:
+        now = now_new_york()
+        age = (now - self.newest).total_seconds() if self.newest is not None else None
+        feed = trade_feed.stats()
+        if feed["last_success"] is None or feed["seconds_since_success"] > 10 * max(trade_feed.poll_interval, 1):
+            status = "feed_error"
+        elif age is None:
+            status = "no_data"
+        elif age > CHART_WINDOW_SECONDS:
+            status = "stale"
+        else:
+            status = "ok"
+
+        tickers = [ticker] if ticker else sorted(self.last_trade)
+        return {
+            "pipeline_status": status,
+            "now": now.isoformat(),
+            "newest_trade": self.newest.isoformat() if self.newest is not None else None,
+            "seconds_since_newest_trade": round(age, 3) if age is not None else None,
+            "chart_window_seconds": CHART_WINDOW_SECONDS,
+            "trades_per_second": self.trades_per_second(now),
+            "feed": {
+                "watermark": feed["watermark"],
+                "seconds_since_successful_poll": feed["seconds_since_success"],
+                "errors": feed["errors"],
+            },
+            "tickers": {
+                t: {
+                    "last_trade": self.last_trade[t].isoformat(),
+                    "seconds_since_last_trade": round((now - self.last_trade[t]).total_seconds(), 3),
+                    "serve_lag_seconds": self.serve_lag[t],
+                }
+                for t in tickers if t in self.last_trade
+            },
+        }
+
+
+freshness = FreshnessTracker()
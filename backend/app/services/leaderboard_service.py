@@ -0,0 +1,142 @@
+"""
+Top movers and volume leaderboard, maintained incrementally from the trade feed.
+
+The day's reference price (first trade of the day) and the last price come from
+the shared price index (app.services.price_index), which must see each batch
+first; here we keep a rolling traded volume per ticker. Two sorted rankings (percent change and
+rolling volume) are updated as trades arrive, so a leaderboard query is a slice
+of an already-sorted list: O(n) in the number of rows requested, independent of
+the size of the ticker universe.
+"""
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from app.core.config import settings
+from app.services.price_index import price_index
+
+METRICS = ("gainers", "losers", "active")
+
+
+class SortedRanking:
+    """Tickers kept sorted by score; updates are O(log n) search plus a memmove."""
+
+    def __init__(self):
+        self._entries: List[Tuple[float, str]] = []
+        self._scores: Dict[str, float] = {}
+
+    def update(self, ticker: str, score: float):
+        old = self._scores.get(ticker)
+        if old is not None:
+            if old == score:
+                return
+            del self._entries[bisect_left(self._entries, (old, ticker))]
+        insort(self._entries, (score, ticker))
+        self._scores[ticker] = score
+
+    def remove(self, ticker: str):
+        old = self._scores.pop(ticker, None)
+        if old is not None:
+            del self._entries[bisect_left(self._entries, (old, ticker))]
+
+    def top(self, n: int) -> List[str]:
+        """Tickers with the highest scores, best first."""
+        return [ticker for _, ticker in reversed(self._entries[-n:])] if n > 0 else []
+
+    def bottom(self, n: int) -> List[str]:
+        """Tickers with the lowest scores, worst first."""
+        return [ticker for _, ticker in self._entries[:n]]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class Leaderboard:
+    """Gainers, losers and most-active tickers over the live trade stream."""
+
+    def __init__(self, volume_window_seconds: int = 300):
+        self.volume_window = pd.Timedelta(seconds=volume_window_seconds)
+        self.volume: Dict[str, float] = {}
+        # (bucket time, ticker, size) in arrival order, for expiring the rolling volume
+        self._volume_buckets = deque()
+        self.latest_ts: Optional[pd.Timestamp] = None
+        self.change_ranking = SortedRanking()
+        self.volume_ranking = SortedRanking()
+
+    def on_trades(self, batch: pd.DataFrame):
+        """Trade feed subscriber: fold a batch of trades into the rankings."""
+        if batch.empty:
+            return
+        touched = set(batch['ticker'].unique())
+
+        # Rolling volume is bucketed per (second, ticker) to keep the expiry queue short
+        buckets = batch.groupby([batch['localTS'].dt.floor('s'), 'ticker'], sort=True)['size'].sum()
+        horizon = self.latest_ts - self.volume_window if self.latest_ts is not None else None
+        for (bucket_ts, ticker), size in buckets.items():
+            if horizon is not None and bucket_ts <= horizon:
+                continue  # late trades already outside the window
+            self._volume_buckets.append((bucket_ts, ticker, size))
+            self.volume[ticker] = self.volume.get(ticker, 0.0) + size
+
+        batch_latest = batch['localTS'].iloc[-1]
+        if self.latest_ts is None or batch_latest > self.latest_ts:
+            self.latest_ts = batch_latest
+        touched.update(self._expire_volume())
+
+        for ticker in touched:
+            self.change_ranking.update(ticker, self.change_percent(ticker))
+            self.volume_ranking.update(ticker, self.volume.get(ticker, 0.0))
+
+    def _expire_volume(self) -> set:
+        """Drop volume buckets that fell out of the window; returns the tickers affected."""
+        expired = set()
+        if self.latest_ts is None:
+            return expired
+        horizon = self.latest_ts - self.volume_window
+        while self._volume_buckets and self._volume_buckets[0][0] <= horizon:
+            _, ticker, size = self._volume_buckets.popleft()
+            self.volume[ticker] = max(self.volume.get(ticker, 0.0) - size, 0.0)
+            expired.add(ticker)
+        return expired
+
+    def rerank(self):
+        """Recompute every ticker's percent change, e.g. after the price index was seeded."""
+        for ticker in price_index.tickers():
+            if ticker in self.volume or price_index.traded_today(ticker):
+                self.change_ranking.update(ticker, self.change_percent(ticker))
+
+    def change_percent(self, ticker: str) -> float:
+        entry = price_index.get(ticker)
+        if entry is None or not entry.day_open or entry.last_price is None:
+            return 0.0
+        return (entry.last_price - entry.day_open) / entry.day_open * 100
+
+    def _row(self, ticker: str) -> Dict[str, Any]:
+        entry = price_index.get(ticker)
+        reference = entry.day_open if entry else None
+        last = entry.last_price if entry else None
+        return {
+            "ticker": ticker,
+            "last_price": last,
+            "reference_price": reference,
+            "change": round(last - reference, 4) if last is not None and reference is not None else None,
+            "change_percent": round(self.change_percent(ticker), 4),
+            "volume": self.volume.get(ticker, 0.0),
+        }
+
+    def leaders(self, metric: str, n: int = 10) -> List[Dict[str, Any]]:
+        """Top `n` tickers for "gainers", "losers" or "active"."""
+        if metric == "gainers":
+            tickers = self.change_ranking.top(n)
+        elif metric == "losers":
+            tickers = self.change_ranking.bottom(n)
+        elif metric == "active":
+            tickers = self.volume_ranking.top(n)
+        else:
+            raise ValueError(f"Unknown metric '{metric}', expected one of {', '.join(METRICS)}")
+        return [self._row(ticker) for ticker in tickers]
+
+
+leaderboard = Leaderboard(volume_window_seconds=settings.LEADERBOARD_VOLUME_WINDOW_SECONDS)
@@ -0,0 +1,589 @@
+"""
+Market-data provider chain: one interface over every source of prices.
+
+Providers (named in MARKET_DATA_PROVIDERS, in priority order):
+
+- live_index   the in-memory last-trade price index fed by the trade feed (quotes only,
+               symbols that traded today)
+- shared       zero-copy views of today's shared price panel, which every worker maps
+               (the hot symbols' price-store history, see app.services.shared_panels)
+- memory       in-process TTL caches ("stock_data" for history, "quotes" for quotes)
+- live_trades  last trade price per ticker queried from SingleStore `live_trades`
+               (quotes only; used when the trade feed, and so live_index, is off)
+- disk         the on-disk price store, when it already holds today's bar (read only)
+- replay       recorded responses in MARKET_DATA_REPLAY_DIR (same layout the Dash
+               app's YF_RECORD_DIR recordings use)
+- yfinance     Yahoo Finance, batched through `yf.download`
+- synthetic    the deterministic dummy-data generator (fills the price store)
+
+Each provider returns only the symbols it has fresh data for; the rest fall
+through to the next provider, so every symbol is served by the first (fastest)
+source that has it. A quote whose source has no previous close (live trades)
+takes it from the next provider that does. Providers listed before `memory` are
+consulted on every call, so they must be cheap and in-process; misses then go
+through `memory`, which computes them once through the providers after it and
+caches the result.
+
+Providers with a latency budget (MARKET_DATA_BUDGETS_MS, "name=ms,...") run on
+their own small thread pool and are abandoned when they exceed it. An abandoned
+call keeps its thread until it returns, so each provider has
+MARKET_DATA_PROVIDER_SLOTS calls in flight at most; while they are all taken the
+provider is skipped instead of queueing behind them, which keeps the budget and
+leaves the other providers' threads alone. A provider that errors
+or times out is skipped for MARKET_DATA_PROVIDER_COOLDOWN_SECONDS. Per-provider
+call, hit, error and latency counters are reported by `stats()`.
+"""
+import datetime
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from app.core.cache import get_cache
+from app.core.config import settings
+from app.db.database import get_db_connection
+from app.services.price_index import price_index
+from app.services.price_store import price_store
+from app.services.shared_panels import shared_panels
+from app.services.synthetic_ohlcv import BASE_PRICES, FIELDS, generate_ohlcv_panel, period_days, split_panel
+
+# Latest trade per requested ticker within the freshness window (localTS is New York time)
+LIVE_LAST_PRICE_QUERY = """
+SELECT ticker, price, localTS
+  FROM live_trades
+ WHERE ticker IN ({placeholders})
+   AND localTS >= CONVERT_TZ(NOW(), @@session.time_zone, 'America/New_York')
+                  - INTERVAL %s SECOND
+ ORDER BY localTS
+"""
+
+
+def make_quote(price: float, previous_close: Optional[float], source: str, as_of: Optional[float] = None) -> Dict[str, Any]:
+    return {
+        "price": float(price),
+        "previous_close": None if previous_close is None else float(previous_close),
+        "as_of": as_of or time.time(),
+        "source": source,
+    }
+
+
+def _quotes_from_closes(frames: Dict[str, pd.DataFrame], source: str) -> Dict[str, Dict[str, Any]]:
+    """Quote = last daily close, previous close = the one before it."""
+    quotes = {}
+    for symbol, frame in frames.items():
+        closes = frame['Close'].dropna()
+        if len(closes):
+            quotes[symbol] = make_quote(closes.iloc[-1], closes.iloc[-2] if len(closes) > 1 else None, source)
+    return quotes
+
+
+INTERVAL_RULES = {"1d": None, "5d": "5D", "1wk": "W", "1mo": "ME", "3mo": "QE"}
+
+
+def tail_days(frame: pd.DataFrame, days: int) -> pd.DataFrame:
+    """Rows dated within `days` of the last row, as a positional slice (no copy of the data)."""
+    if frame.empty:
+        return frame
+    start = frame.index[-1] - pd.Timedelta(days=days)
+    return frame.iloc[frame.index.searchsorted(start, side="left"):]
+
+
+def resample_bars(frame: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """Daily OHLCV aggregated to a yfinance-style interval ("1d" returns the frame itself)."""
+    if interval not in INTERVAL_RULES:
+        raise ValueError(f"Unsupported interval '{interval}', expected one of {', '.join(INTERVAL_RULES)}")
+    rule = INTERVAL_RULES[interval]
+    if rule is None or frame.empty:
+        return frame
+    return frame.resample(rule).agg(
+        {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+    ).dropna(subset=['Close'])
+
+
+class MarketDataProvider:
+    """A source of quotes and/or daily history; returns only the symbols it can serve fresh."""
+
+    name = ""
+
+    def available(self) -> bool:
+        return True
+
+    def quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        return {}
+
+    def history(self, symbols: List[str], period: str) -> Dict[str, pd.DataFrame]:
+        return {}
+
+
+class MemoryCacheProvider(MarketDataProvider):
+    """Front tier of the chain: computes misses once through the rest of the chain and caches them."""
+
+    name = "memory"
+
+    def __init__(self):
+        self.history_cache = get_cache("stock_data", max_entries=settings.STOCK_DATA_CACHE_SIZE, ttl=settings.STOCK_CACHE_TTL)
+        self.quote_cache = get_cache("quotes", max_entries=settings.STOCK_INFO_CACHE_SIZE, ttl=settings.MARKET_DATA_QUOTE_TTL)
+
+    def cached_history(self, symbols: List[str], period: str,
+                       fetch: Callable[[List[str], str], Dict[str, pd.DataFrame]]) -> Dict[str, Optional[pd.DataFrame]]:
+        cached = self.history_cache.get_or_compute_many(
+            [(symbol, period) for symbol in symbols],
+            lambda missing: self._keyed(fetch([symbol for symbol, _ in missing], period), missing),
+        )
+        return {symbol: frame for (symbol, _), frame in cached.items()}
+
+    def cached_quotes(self, symbols: List[str],
+                      fetch: Callable[[List[str]], Dict[str, Dict[str, Any]]]) -> Dict[str, Optional[Dict[str, Any]]]:
+        return self.quote_cache.get_or_compute_many(symbols, lambda missing: self._keyed(fetch(missing), missing))
+
+    @staticmethod
+    def _keyed(found: Dict[str, Any], missing: List[Any]) -> Dict[Any, Any]:
+        # Symbols no provider could serve are cached as None until the TTL passes
+        return {key: found.get(key[0] if isinstance(key, tuple) else key) for key in missing}
+
+
+class LiveIndexProvider(MarketDataProvider):
+    """Last trade price from the in-memory price index, for symbols that traded today."""
+
+    name = "live_index"
+
+    def available(self) -> bool:
+        return settings.TRADE_FEED_ENABLED
+
+    def quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        quotes = {}
+        for symbol in symbols:
+            if price_index.traded_today(symbol):
+                entry = price_index.get(symbol)
+                # Without a previous close (first session in the index) the day's open is the
+                # reference, as in live valuation; another provider's close may be on an
+                # unrelated (synthetic) price scale
+                quotes[symbol] = make_quote(entry.last_price, entry.previous_close or entry.day_open, self.name)
+        return quotes
+
+
+class SharedPanelProvider(MarketDataProvider):
+    """Today's shared price panel; its frames are views into memory shared by all workers."""
+
+    name = "shared"
+
+    def available(self) -> bool:
+        return settings.SHARED_PANELS_ENABLED and settings.PRICE_STORE_ENABLED
+
+    def history(self, symbols: List[str], period: str) -> Dict[str, pd.DataFrame]:
+        panel = shared_panels.current()
+        days = period_days(period)
+        if panel is None or panel.through != datetime.date.today() or days > price_store.history_days:
+            return {}
+        frames = {symbol: panel.frame(symbol) for symbol in symbols}
+        return {symbol: tail_days(frame, days) for symbol, frame in frames.items() if frame is not None}
+
+    def quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        panel = shared_panels.current()
+        if panel is None or panel.through != datetime.date.today():
+            return {}
+        close = FIELDS.index("Close")
+        return {
+            symbol: make_quote(panel.values[i, close, -1], panel.values[i, close, -2], self.name)
+            for symbol, i in ((s, panel.positions.get(s)) for s in symbols) if i is not None
+        }
+
+
+class LiveTradesProvider(MarketDataProvider):
+    """Last trade price from `live_trades`, if it is no older than MARKET_DATA_LIVE_MAX_AGE_SECONDS."""
+
+    name = "live_trades"
+
+    def available(self) -> bool:
+        return not settings.TRADE_FEED_ENABLED  # the price index already has these without a query
+
+    def quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        if not symbols:
+            return {}
+        query = LIVE_LAST_PRICE_QUERY.format(placeholders=", ".join(["%s"] * len(symbols)))
+        with get_db_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(query, (*symbols, settings.MARKET_DATA_LIVE_MAX_AGE_SECONDS))
+                rows = cursor.fetchall()
+        last = {ticker: price for ticker, price, _ in rows}  # ordered by localTS: the last row wins
+        return {ticker: make_quote(price, None, self.name) for ticker, price in last.items()}
+
+
+class DiskCacheProvider(MarketDataProvider):
+    """Price-store history that already runs through today; never generates anything."""
+
+    name = "disk"
+
+    def available(self) -> bool:
+        return settings.PRICE_STORE_ENABLED
+
+    def history(self, symbols: List[str], period: str) -> Dict[str, pd.DataFrame]:
+        days = period_days(period)
+        if days > price_store.history_days:
+            return {}
+        today = datetime.date.today()
+        start = today - datetime.timedelta(days=days)
+        return {symbol: price_store.read(symbol, start, today) for symbol in symbols
+                if price_store.last_date(symbol) == today and price_store.first_date(symbol) <= start}
+
+    def quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        return _quotes_from_closes(self.history(symbols, "1d"), self.name)
+
+
+def _safe_name(symbol: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]", "_", symbol)
+
+
+class ReplayProvider(MarketDataProvider):
+    """Recorded responses: history/<symbol>_<period>_1d.json (pandas split JSON) and info/<symbol>.json."""
+
+    name = "replay"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def available(self) -> bool:
+        return bool(self.directory) and os.path.isdir(self.directory)
+
+    def history(self, symbols: List[str], period: str) -> Dict[str, pd.DataFrame]:
+        frames = {}
+        for symbol in symbols:
+            path = self._history_path(symbol, period)
+            if path:
+                frame = pd.read_json(path, orient="split", convert_dates=True)
+                if not frame.empty:
+                    frames[symbol] = frame
+        return frames
+
+    def _history_path(self, symbol: str, period: str) -> Optional[str]:
+        """The recording for `period`, else the symbol's longest daily recording."""
+        directory = os.path.join(self.directory, "history")
+        exact = os.path.join(directory, f"{_safe_name(symbol)}_{period}_1d.json")
+        if os.path.exists(exact):
+            return exact
+        prefix = f"{_safe_name(symbol)}_"
+        try:
+            recorded = [name[len(prefix):-len("_1d.json")] for name in os.listdir(directory)
+                        if name.startswith(prefix) and name.endswith("_1d.json")]
+        except OSError:
+            return None
+        if not recorded:
+            return None
+        longest = max(recorded, key=lambda p: float("inf") if p == "max" else period_days(p))
+        return os.path.join(directory, f"{prefix}{longest}_1d.json")
+
+    def quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        quotes = {}
+        for symbol in symbols:
+            path = os.path.join(self.directory, "info", f"{_safe_name(symbol)}.json")
+            if not os.path.exists(path):
+                continue
+            with open(path) as f:
+                info = json.load(f)
+            price = info.get('regularMarketPrice') or info.get('currentPrice')
+            if price is not None:
+                quotes[symbol] = make_quote(price, info.get('previousClose'), self.name)
+        return quotes
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Yahoo Finance daily bars from one batched download per call."""
+
+    name = "yfinance"
+
+    def history(self, symbols: List[str], period: str) -> Dict[str, pd.DataFrame]:
+        import yfinance as yf
+
+        data = yf.download(symbols, period=period, interval="1d", group_by="ticker",
+                           auto_adjust=True, progress=False, threads=True)
+        frames = {}
+        if data is None or data.empty:
+            return frames
+        for symbol in symbols:
+            if isinstance(data.columns, pd.MultiIndex):
+                if symbol not in data.columns.get_level_values(0):
+                    continue
+                frame = data[symbol]
+            elif len(symbols) == 1:
+                frame = data
+            else:
+                continue
+            frame = frame.dropna(how="all")
+            if not frame.empty:
+                frames[symbol] = frame
+        return frames
+
+    def quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        return _quotes_from_closes(self.history(symbols, "5d"), self.name)
+
+
+class SyntheticProvider(MarketDataProvider):
+    """Deterministic dummy data; serves every symbol, so it belongs at the end of the chain."""
+
+    name = "synthetic"
+
+    def history(self, symbols: List[str], period: str) -> Dict[str, pd.DataFrame]:
+        days = period_days(period)
+        if settings.PRICE_STORE_ENABLED and days <= price_store.history_days:
+            # Read through the on-disk store; only days it does not have yet are generated
+            return price_store.read_many(symbols, days, BASE_PRICES)
+
+        print(f"Generating dummy historical data for {len(symbols)} symbols")
+        return split_panel(generate_ohlcv_panel(symbols, days, BASE_PRICES))
+
+    def quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        # Price and previous close are the last two daily closes of the (deterministic) history
+        panel = generate_ohlcv_panel(symbols, 1, BASE_PRICES)
+        closes = panel.to_numpy().reshape(len(panel), len(symbols), len(FIELDS))[:, :, FIELDS.index('Close')]
+        return {symbol: make_quote(closes[-1, j], closes[0, j], self.name) for j, symbol in enumerate(symbols)}
+
+
+class _ProviderStats:
+    __slots__ = ("calls", "requested", "served", "errors", "timeouts", "skipped", "saturated",
+                 "total_ms", "max_ms", "last_error")
+
+    def __init__(self):
+        self.calls = self.requested = self.served = self.errors = self.timeouts = self.skipped = 0
+        self.saturated = 0
+        self.total_ms = self.max_ms = 0.0
+        self.last_error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "requested": self.requested,
+            "served": self.served,
+            "hit_ratio": round(self.served / self.requested, 4) if self.requested else 0.0,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "skipped_cooling_down": self.skipped,
+            "skipped_saturated": self.saturated,
+            "avg_ms": round(self.total_ms / self.calls, 2) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "last_error": self.last_error,
+        }
+
+
+def parse_budgets(spec: str) -> Dict[str, float]:
+    """"live_trades=250,yfinance=5000" -> {"live_trades": 0.25, "yfinance": 5.0} (seconds)."""
+    budgets = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, ms = item.split("=", 1)
+            budgets[name.strip()] = float(ms) / 1000.0
+    return budgets
+
+
+class MarketDataChain:
+    """Serves quotes and daily history from providers in priority order, with per-provider budgets."""
+
+    def __init__(self, providers: List[MarketDataProvider], budgets: Optional[Dict[str, float]] = None,
+                 cooldown: float = 30.0, slots: int = 2):
+        self.memory = next((p for p in providers if isinstance(p, MemoryCacheProvider)), None)
+        split = providers.index(self.memory) if self.memory else len(providers)
+        self.front = providers[:split]         # consulted on every call
+        self.providers = providers[split + 1:]  # behind the memory cache
+        self.budgets = budgets or {}
+        self.cooldown = cooldown
+        self._stats: Dict[str, _ProviderStats] = {p.name: _ProviderStats() for p in providers}
+        self._cooling_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # Budgeted providers: one pool each, and a slot per call in flight (released when it returns)
+        self._executors = {name: ThreadPoolExecutor(max_workers=slots, thread_name_prefix=f"market-data-{name}")
+                           for name in self.budgets}
+        self._slots = {name: threading.BoundedSemaphore(slots) for name in self.budgets}
+
+    # ---- public API ----
+
+    def history(self, symbols: List[str], period: str = "1y", interval: str = "1d") -> Dict[str, pd.DataFrame]:
+        """
+        OHLCV per symbol for `period` at `interval`; symbols no provider could serve are omitted.
+
+        Providers are only ever asked for the full STOCK_HISTORY_PERIOD (one cache entry per
+        symbol); each period is a row slice of it, which shares the cached data instead of
+        copying it. Periods longer than STOCK_HISTORY_PERIOD are truncated to it.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        full_period = settings.STOCK_HISTORY_PERIOD
+        result = self._history(self.front, symbols, full_period)
+        pending = [s for s in symbols if s not in result]
+        if self.memory and pending:
+            fetch = lambda missing, p: self._history(self.providers, missing, p)
+            found = self._timed(self.memory, "history", pending,
+                                lambda: self.memory.cached_history(pending, full_period, fetch))
+            result.update({symbol: frame for symbol, frame in (found or {}).items() if frame is not None})
+        days = period_days(period)
+        return {symbol: resample_bars(tail_days(frame, days), interval) for symbol, frame in result.items()}
+
+    def quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """{"price", "previous_close", "as_of", "source"} per symbol; symbols without a quote are omitted."""
+        symbols = list(dict.fromkeys(symbols))
+        result = self._quotes(self.front, symbols, fill=not self.memory)
+        pending = [s for s in symbols if s not in result or result[s]["previous_close"] is None]
+        if self.memory and pending:
+            fetch = lambda missing: self._quotes(self.providers, missing)
+            found = self._timed(self.memory, "quotes", pending,
+                                lambda: self.memory.cached_quotes(pending, fetch))
+            self._merge_quotes(result, {s: q for s, q in (found or {}).items() if q is not None})
+            self._fill_previous_close(result)
+        return result
+
+    def refresh_ahead(self, within: float, keep: Optional[Callable[[Any], bool]] = None) -> int:
+        """
+        Refetch cached full histories expiring within `within` seconds that are still in use
+        (or that `keep` wants), so readers keep hitting the memory tier (blocking).
+        """
+        if not self.memory:
+            return 0
+
+        def fetch(keys):
+            by_period: Dict[str, List[str]] = {}
+            for symbol, period in keys:
+                by_period.setdefault(period, []).append(symbol)
+            fetched = {}
+            for period, symbols in by_period.items():
+                found = self._history(self.providers, symbols, period)
+                fetched.update(self.memory._keyed(found, [(symbol, period) for symbol in symbols]))
+            return fetched
+
+        return self.memory.history_cache.refresh_ahead(within, fetch, keep)
+
+    # ---- chain ----
+
+    def _history(self, providers: List[MarketDataProvider], symbols: List[str], period: str) -> Dict[str, pd.DataFrame]:
+        result: Dict[str, pd.DataFrame] = {}
+        for provider in providers:
+            pending = [s for s in symbols if s not in result]
+            if not pending:
+                break
+            found = self._call(provider, "history", pending, period)
+            result.update({s: f for s, f in found.items() if s in pending and f is not None and not f.empty})
+        return result
+
+    def _quotes(self, providers: List[MarketDataProvider], symbols: List[str], fill: bool = True) -> Dict[str, Dict[str, Any]]:
+        result: Dict[str, Dict[str, Any]] = {}
+        for provider in providers:
+            # Symbols without a quote, plus quotes still missing their previous close
+            pending = [s for s in symbols if s not in result or result[s]["previous_close"] is None]
+            if not pending:
+                break
+            self._merge_quotes(result, self._call(provider, "quotes", pending))
+        if fill:
+            self._fill_previous_close(result)
+        return result
+
+    @staticmethod
+    def _merge_quotes(result: Dict[str, Dict[str, Any]], found: Dict[str, Dict[str, Any]]):
+        for symbol, quote in found.items():
+            if symbol not in result:
+                result[symbol] = quote
+            elif result[symbol]["previous_close"] is None:
+                result[symbol] = {**result[symbol], "previous_close": quote["previous_close"]}
+
+    @staticmethod
+    def _fill_previous_close(result: Dict[str, Dict[str, Any]]):
+        for symbol, quote in result.items():
+            if quote["previous_close"] is None:
+                result[symbol] = {**quote, "previous_close": quote["price"]}
+
+    def _call(self, provider: MarketDataProvider, method: str, symbols: List[str], *args) -> Dict[str, Any]:
+        """Run one provider call within its budget; errors and timeouts count as serving nothing."""
+        stats = self._stats[provider.name]
+        if not provider.available():
+            return {}
+        if self._cooling_until.get(provider.name, 0.0) > time.monotonic():
+            stats.skipped += 1
+            return {}
+        fn = getattr(provider, method)
+        budget = self.budgets.get(provider.name)
+        if budget is None:
+            return self._timed(provider, method, symbols, lambda: fn(symbols, *args)) or {}
+        slots = self._slots[provider.name]
+        if not slots.acquire(blocking=False):
+            stats.saturated += 1  # earlier calls still hold every slot
+            return {}
+
+        def run():
+            try:
+                return fn(symbols, *args)
+            finally:
+                slots.release()
+
+        future = self._executors[provider.name].submit(run)
+        return self._timed(provider, method, symbols, lambda: future.result(timeout=budget)) or {}
+
+    def _timed(self, provider: MarketDataProvider, method: str, symbols: List[str],
+               call: Callable[[], Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        stats = self._stats[provider.name]
+        start = time.perf_counter()
+        found = None
+        try:
+            found = call()
+        except FutureTimeout:
+            stats.timeouts += 1
+            stats.last_error = f"{method} exceeded {self.budgets.get(provider.name, 0) * 1000:.0f}ms budget"
+            self._cool_down(provider)
+            print(f"Market data provider {provider.name} timed out on {method} for {len(symbols)} symbols")
+        except Exception as e:
+            stats.errors += 1
+            stats.last_error = f"{method}: {e}"
+            self._cool_down(provider)
+            print(f"Market data provider {provider.name} failed on {method}: {e}")
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            stats.calls += 1
+            stats.requested += len(symbols)
+            stats.served += sum(1 for value in (found or {}).values() if value is not None)
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+        return found
+
+    def _cool_down(self, provider: MarketDataProvider):
+        if provider is not self.memory:
+            self._cooling_until[provider.name] = time.monotonic() + self.cooldown
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        order = [p.name for p in self.front] + ([self.memory.name] if self.memory else []) + [p.name for p in self.providers]
+        return {
+            "order": order,
+            "active": [p.name for p in self.front + self.providers if p.available()],
+            "budgets_ms": {name: round(seconds * 1000) for name, seconds in self.budgets.items()},
+            "cooling_down": {name: round(until - now, 1) for name, until in self._cooling_until.items() if until > now},
+            "providers": {name: stats.to_dict() for name, stats in self._stats.items()},
+        }
+
+
+PROVIDERS: Dict[str, Callable[[], MarketDataProvider]] = {
+    "live_index": LiveIndexProvider,
+    "shared": SharedPanelProvider,
+    "memory": MemoryCacheProvider,
+    "live_trades": LiveTradesProvider,
+    "disk": DiskCacheProvider,
+    "replay": lambda: ReplayProvider(settings.MARKET_DATA_REPLAY_DIR),
+    "yfinance": YFinanceProvider,
+    "synthetic": SyntheticProvider,
+}
+
+
+def build_chain(spec: str) -> MarketDataChain:
+    """Chain from a comma-separated provider list; unknown names are reported and ignored."""
+    providers = []
+    for name in (n.strip() for n in spec.split(",")):
+        if not name:
+            continue
+        if name not in PROVIDERS:
+            print(f"Unknown market data provider '{name}' ignored")
+            continue
+        providers.append(PROVIDERS[name]())
+    return MarketDataChain(providers, parse_budgets(settings.MARKET_DATA_BUDGETS_MS),
+                           cooldown=settings.MARKET_DATA_PROVIDER_COOLDOWN_SECONDS,
+                           slots=settings.MARKET_DATA_PROVIDER_SLOTS)
+
+
+market_data = build_chain(settings.MARKET_DATA_PROVIDERS)
@@ -0,0 +1,225 @@
+"""
+In-memory last-trade price index fed by the trade feed.
+
+Per ticker it keeps the last price and its time, the day's first trade (open),
+the previous session's close and the day's volume and trade count, so quotes
+for traded symbols are O(1) dictionary lookups with no database round trip.
+
+On startup the day so far is seeded with one query over `live_trades_minute_bars`
+and the raw `live_trades` rows not yet rolled up: everything before a cutoff
+(the database clock at seeding time). Batches the feed delivers before the seed
+arrives update the index right away and are also buffered; once the seed is in,
+the index is rebuilt from it and the buffered trades at or after the cutoff are
+replayed, so nothing is counted twice. If seeding keeps failing for longer than
+the buffer allows, the index carries on from the feed alone.
+"""
+import asyncio
+import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from app.core.concurrency import bulkheads
+from app.db.database import get_db_connection
+from app.services.freshness_service import now_new_york
+from app.services.retention_service import WATERMARK_QUERY
+
+SEED_CUTOFF_QUERY = "SELECT CONVERT_TZ(NOW(), @@session.time_zone, 'America/New_York')"
+
+# Previous close: last bar (or raw trade not rolled up yet) before today, within a week
+PREVIOUS_CLOSE_QUERY = """
+SELECT ticker, LAST(price, ts)
+  FROM (
+        SELECT ticker, bar_start AS ts, close AS price
+          FROM live_trades_minute_bars
+         WHERE bar_start >= %s - INTERVAL 7 DAY AND bar_start < %s
+        UNION ALL
+        SELECT ticker, localTS, price
+          FROM live_trades
+         WHERE localTS >= %s AND localTS < %s
+       ) before_today
+ GROUP BY ticker
+"""
+
+# Today so far: minute bars, plus raw trades newer than the newest bar, up to the cutoff
+DAY_SO_FAR_QUERY = """
+SELECT ticker, FIRST(open, ts), LAST(close, ts), MAX(ts), SUM(volume), SUM(trades)
+  FROM (
+        SELECT ticker, bar_start AS ts, open, close, volume, trade_count AS trades
+          FROM live_trades_minute_bars
+         WHERE bar_start >= %s AND bar_start < %s
+        UNION ALL
+        SELECT ticker, localTS, price, price, size, 1
+          FROM live_trades
+         WHERE localTS >= %s AND localTS < %s
+       ) today
+ GROUP BY ticker
+"""
+
+
+class _Entry:
+    __slots__ = ("last_price", "last_ts", "day", "day_open", "previous_close", "day_volume", "day_trades")
+
+    def __init__(self):
+        self.last_price: Optional[float] = None
+        self.last_ts: Optional[pd.Timestamp] = None
+        self.day: Optional[datetime.date] = None
+        self.day_open: Optional[float] = None
+        self.previous_close: Optional[float] = None
+        self.day_volume = 0.0
+        self.day_trades = 0
+
+
+class PriceIndex:
+    """Last price, open, previous close and day volume per ticker, updated per trade batch."""
+
+    def __init__(self, max_pending_batches: int = 600):
+        self._entries: Dict[str, _Entry] = {}
+        self.max_pending_batches = max_pending_batches
+        self._pending: Optional[List[pd.DataFrame]] = []  # None once seeded (or given up)
+        self.seed_cutoff: Optional[pd.Timestamp] = None
+        self.batches = 0
+        self._seed_listeners: List[Callable[[], None]] = []
+
+    # ---- lookups ----
+
+    def get(self, ticker: str) -> Optional[_Entry]:
+        return self._entries.get(ticker)
+
+    def price(self, ticker: str) -> Optional[float]:
+        entry = self._entries.get(ticker)
+        return entry.last_price if entry else None
+
+    def quote(self, ticker: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(ticker)
+        if entry is None or entry.last_price is None:
+            return None
+        return {
+            "ticker": ticker,
+            "price": entry.last_price,
+            "previous_close": entry.previous_close,
+            "day_open": entry.day_open,
+            "day_volume": entry.day_volume,
+            "day_trades": entry.day_trades,
+            "as_of": entry.last_ts.isoformat() if entry.last_ts is not None else None,
+        }
+
+    def tickers(self) -> List[str]:
+        return list(self._entries)
+
+    def traded_today(self, ticker: str) -> bool:
+        entry = self._entries.get(ticker)
+        return entry is not None and entry.day == now_new_york().date()
+
+    # ---- trade feed ----
+
+    def on_trades(self, batch: pd.DataFrame):
+        """Trade feed subscriber: fold a batch into the per-ticker entries."""
+        if batch.empty:
+            return
+        self.batches += 1
+        if self._pending is not None:
+            self._pending.append(batch)
+            if len(self._pending) > self.max_pending_batches:
+                print("Price index seed did not arrive in time; continuing from the trade feed alone")
+                self._pending = None
+        elif self.seed_cutoff is not None:
+            batch = batch[batch['localTS'] >= self.seed_cutoff]
+        self._apply(batch)
+
+    def _apply(self, batch: pd.DataFrame):
+        if batch.empty:
+            return
+        days = batch['localTS'].dt.date
+        per_day = batch.groupby(['ticker', days], sort=True).agg(
+            first=('price', 'first'), last=('price', 'last'), last_ts=('localTS', 'last'),
+            volume=('size', 'sum'), trades=('price', 'size'),
+        )
+        for (ticker, day), first, last, last_ts, volume, trades in zip(
+                per_day.index, per_day['first'], per_day['last'], per_day['last_ts'],
+                per_day['volume'], per_day['trades']):
+            entry = self._entries.get(ticker)
+            if entry is None:
+                entry = self._entries[ticker] = _Entry()
+            if entry.day != day:
+                if entry.day is not None and day < entry.day:
+                    continue  # late rows of an earlier session
+                if entry.day is not None:
+                    entry.previous_close = entry.last_price
+                entry.day, entry.day_open = day, float(first)
+                entry.day_volume, entry.day_trades = 0.0, 0
+            if entry.last_ts is None or last_ts >= entry.last_ts:  # the feed can deliver late rows
+                entry.last_price, entry.last_ts = float(last), last_ts
+            entry.day_volume += float(volume)
+            entry.day_trades += int(trades)
+
+    # ---- seeding ----
+
+    def on_seeded(self, callback: Callable[[], None]):
+        """Call `callback` after the seed replaced the entries (e.g. to re-rank derived state)."""
+        self._seed_listeners.append(callback)
+
+    @staticmethod
+    def fetch_seed():
+        """(cutoff, previous-close rows, day-so-far rows) as of the database clock (blocking; db bulkhead)."""
+        with get_db_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(SEED_CUTOFF_QUERY)
+                cutoff = pd.Timestamp(cursor.fetchone()[0])
+                day_start = cutoff.normalize().to_pydatetime()
+                cursor.execute(WATERMARK_QUERY)
+                newest_bar = cursor.fetchone()[0]
+                raw_from = max(day_start, newest_bar + datetime.timedelta(minutes=1)) if newest_bar else day_start
+                cursor.execute(PREVIOUS_CLOSE_QUERY, (day_start, day_start, day_start - datetime.timedelta(days=7), day_start))
+                previous = cursor.fetchall()
+                cursor.execute(DAY_SO_FAR_QUERY, (day_start, cutoff.to_pydatetime(), raw_from, cutoff.to_pydatetime()))
+                today = cursor.fetchall()
+        return cutoff, previous, today
+
+    def apply_seed(self, cutoff: pd.Timestamp, previous, today):
+        """Rebuild the entries from the seed, then replay buffered trades from the cutoff on."""
+        pending, self._pending = self._pending or [], None
+        self.seed_cutoff = cutoff
+        self._entries = {}
+        for ticker, close in previous:
+            self._entries.setdefault(ticker, _Entry()).previous_close = float(close)
+        for ticker, day_open, last, last_ts, volume, trades in today:
+            entry = self._entries.setdefault(ticker, _Entry())
+            entry.day, entry.day_open = cutoff.date(), float(day_open)
+            entry.last_price, entry.last_ts = float(last), pd.Timestamp(last_ts)
+            entry.day_volume, entry.day_trades = float(volume), int(trades)
+        for ticker, entry in self._entries.items():
+            if entry.last_price is None:
+                entry.last_price = entry.previous_close  # no trade yet today
+        for batch in pending:
+            self._apply(batch[batch['localTS'] >= cutoff])
+        for callback in self._seed_listeners:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Price index seed listener {getattr(callback, '__qualname__', callback)} failed: {e}")
+
+    async def load(self, retry_seconds: int = 30):
+        """Seed the index from the database, retrying until it succeeds (or the buffer gives up)."""
+        while self._pending is not None:
+            try:
+                cutoff, previous, today = await bulkheads["db"].run(self.fetch_seed)
+                if self._pending is None:
+                    break
+                self.apply_seed(cutoff, previous, today)
+                print(f"Seeded price index for {len(self._entries)} tickers (cutoff {cutoff})")
+            except Exception as e:
+                print(f"Seeding price index failed: {e}")
+                await asyncio.sleep(retry_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tickers": len(self._entries),
+            "batches": self.batches,
+            "seeded": self.seed_cutoff is not None,
+            "seed_cutoff": self.seed_cutoff.isoformat() if self.seed_cutoff is not None else None,
+            "pending_batches": len(self._pending) if self._pending is not None else 0,
+        }
+
+
+price_index = PriceIndex()
@@ -0,0 +1,202 @@
+"""
+Persistent on-disk daily price store: one append-only, memory-mapped file per symbol.
+
+Each file is a flat array of fixed-size records (date as days since the epoch,
+then Open/High/Low/Close/Volume as float64) in ascending date order. Readers map
+the file read-only with np.memmap and binary-search the date column, so range
+reads touch only the pages they need, and every uvicorn worker shares those
+pages through the OS page cache. A restart finds the history already on disk.
+
+Writers only ever append whole records for days after the last stored one,
+under an exclusive file lock where the platform supports it. Readers size the
+mapping from the file length rounded down to whole records, so they never see
+a partially written record.
+
+Missing history comes from the synthetic OHLCV generator. A new symbol gets
+`history_days` of history in one go. Later calls append only the days since
+the last stored one; a file that starts later than `history_days` ago (written
+under a smaller setting) is regenerated whole and swapped in atomically. The generator is deterministic per (symbol, date), so
+appended days continue the stored path exactly, and every process that fills
+the store writes the same values. Files live in a subdirectory named after the
+generator version and seed, so data from another generator is never mixed in.
+"""
+import datetime
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.services.synthetic_ohlcv import FIELDS, generate_ohlcv_panel, generator_tag
+
+try:
+    import fcntl
+except ImportError:  # Windows: rely on the in-process lock only
+    fcntl = None
+
+RECORD = np.dtype([("date", "<i8")] + [(field, "<f8") for field in FIELDS])
+
+
+def _day_number(day: datetime.date) -> int:
+    return int(np.datetime64(day, "D").astype(np.int64))
+
+
+def _safe_name(symbol: str) -> str:
+    return "".join(c if c.isalnum() or c in "._-" else "_" for c in symbol)
+
+
+class PriceStore:
+    """Per-symbol memory-mapped daily OHLCV files with range reads and incremental appends."""
+
+    def __init__(self, directory: str, history_days: int = 365):
+        self.directory = directory
+        self.history_days = history_days
+        self._maps: Dict[str, Tuple[int, np.memmap]] = {}  # symbol -> (file size, mapping)
+        self._lock = threading.Lock()
+        self.reads = 0
+        self.appended_records = 0
+
+    def path(self, symbol: str) -> str:
+        return os.path.join(self.directory, f"{_safe_name(symbol)}.ohlcv")
+
+    def _records(self, symbol: str) -> np.ndarray:
+        """Read-only mapping of a symbol's records (empty when the file does not exist)."""
+        path = self.path(symbol)
+        try:
+            size = os.path.getsize(path) // RECORD.itemsize * RECORD.itemsize
+        except OSError:
+            return np.empty(0, dtype=RECORD)
+        if size == 0:
+            return np.empty(0, dtype=RECORD)
+        with self._lock:
+            cached = self._maps.get(symbol)
+            if cached is None or cached[0] != size:
+                cached = (size, np.memmap(path, dtype=RECORD, mode="r", shape=(size // RECORD.itemsize,)))
+                self._maps[symbol] = cached
+        return cached[1]
+
+    def first_date(self, symbol: str) -> Optional[datetime.date]:
+        records = self._records(symbol)
+        if not len(records):
+            return None
+        return np.datetime64(int(records["date"][0]), "D").astype(datetime.date)
+
+    def last_date(self, symbol: str) -> Optional[datetime.date]:
+        records = self._records(symbol)
+        if not len(records):
+            return None
+        return np.datetime64(int(records["date"][-1]), "D").astype(datetime.date)
+
+    def read(self, symbol: str, start: Optional[datetime.date] = None, end: Optional[datetime.date] = None) -> pd.DataFrame:
+        """Daily OHLCV for start <= date <= end (both optional) as a date-indexed DataFrame."""
+        records = self._records(symbol)
+        dates = records["date"]
+        lo = int(np.searchsorted(dates, _day_number(start), side="left")) if start else 0
+        hi = int(np.searchsorted(dates, _day_number(end), side="right")) if end else len(records)
+        window = records[lo:hi]
+        self.reads += 1
+        columns = {field: np.array(window[field]) for field in FIELDS}
+        columns["Volume"] = columns["Volume"].astype(np.int64)
+        index = pd.DatetimeIndex(np.array(window["date"]).astype("datetime64[D]").astype("datetime64[ns]"))
+        return pd.DataFrame(columns, index=index)
+
+    def append(self, symbol: str, frame: pd.DataFrame) -> int:
+        """Append the rows of `frame` dated after the last stored day; returns how many were written."""
+        records = np.empty(len(frame), dtype=RECORD)
+        records["date"] = frame.index.values.astype("datetime64[D]").astype(np.int64)
+        for field in FIELDS:
+            records[field] = frame[field].to_numpy(dtype=float)
+        return self._append_records(symbol, records)
+
+    def _append_records(self, symbol: str, records: np.ndarray) -> int:
+        if not len(records):
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path(symbol), "ab") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                # Re-check under the lock: another worker may have appended meanwhile
+                stored = self._records(symbol)
+                if len(stored):
+                    records = records[records["date"] > stored["date"][-1]]
+                if len(records):
+                    f.seek(len(stored) * RECORD.itemsize)
+                    f.truncate()  # drop any torn trailing record
+                    f.write(records.tobytes())
+                    f.flush()
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+        self.appended_records += len(records)
+        return len(records)
+
+    def _replace_records(self, symbol: str, records: np.ndarray):
+        """Swap in a complete new file; readers holding the old mapping keep reading the old one."""
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.path(symbol)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(records.tobytes())
+        os.replace(tmp_path, self.path(symbol))
+        self.appended_records += len(records)
+
+    def _append_panel(self, panel: pd.DataFrame, skip_first: bool = False, replace: bool = False):
+        """Append (or, with replace, write) every symbol of a generated panel straight from its values."""
+        values = panel.to_numpy()
+        dates = panel.index.values.astype("datetime64[D]").astype(np.int64)
+        first = 1 if skip_first else 0
+        width = len(FIELDS)
+        for j, symbol in enumerate(panel.columns.get_level_values(0)[::width]):
+            records = np.empty(len(dates) - first, dtype=RECORD)
+            records["date"] = dates[first:]
+            for k, field in enumerate(FIELDS):
+                records[field] = values[first:, j * width + k]
+            if replace:
+                self._replace_records(symbol, records)
+            else:
+                self._append_records(symbol, records)
+
+    def ensure(self, symbols: List[str], through: datetime.date, base_prices: Dict[str, float]):
+        """Make sure every symbol has `history_days` of history through `through`, generating what is missing."""
+        new, short, stale = [], [], {}
+        start = through - datetime.timedelta(days=self.history_days)
+        for symbol in symbols:
+            last = self.last_date(symbol)
+            if last is None:
+                new.append(symbol)
+            elif self.first_date(symbol) > start:
+                short.append(symbol)  # stored before history_days was raised
+            elif last < through:
+                stale.setdefault(last, []).append(symbol)
+
+        end = datetime.datetime.combine(through, datetime.time())
+        if new:
+            self._append_panel(generate_ohlcv_panel(new, self.history_days, base_prices, end=end))
+        if short:
+            # Generated values are the same for every date, so the rewrite only adds the older days
+            self._append_panel(generate_ohlcv_panel(short, self.history_days, base_prices, end=end), replace=True)
+        for last, group in stale.items():
+            # Row 0 is the last stored day
+            panel = generate_ohlcv_panel(group, (through - last).days, base_prices, end=end)
+            self._append_panel(panel, skip_first=True)
+
+    def read_many(self, symbols: List[str], days: int, base_prices: Dict[str, float]) -> Dict[str, pd.DataFrame]:
+        """The last `days` days of history (through today) for every symbol, filling gaps first."""
+        today = datetime.date.today()
+        self.ensure(symbols, today, base_prices)
+        start = today - datetime.timedelta(days=days)
+        return {symbol: self.read(symbol, start, today) for symbol in symbols}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": self.directory,
+            "mapped_symbols": len(self._maps),
+            "reads": self.reads,
+            "appended_records": self.appended_records,
+        }
+
+
+price_store = PriceStore(os.path.join(settings.PRICE_STORE_DIR, generator_tag()),
+                         history_days=settings.PRICE_STORE_HISTORY_DAYS)
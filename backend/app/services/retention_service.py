@@ -0,0 +1,189 @@
+"""
+Retention and rollup job for raw live_trades.
+
+Raw trades older than LIVE_TRADES_RETENTION_MINUTES are rolled up into
+`live_trades_minute_bars` and then deleted in small batches, so the table the
+hot queries scan stays bounded however long the producer runs.
+
+The rollup is resumable: bars are written for [watermark, cutoff), where the
+watermark is the minute after the newest bar already stored, and raw rows are
+only purged below the cutoff once their bars exist. A run interrupted between
+the two steps simply purges on the next run.
+
+The job is off by default (RETENTION_ENABLED): once it runs, raw trades older
+than the retention age are gone, so /api/live-trades/history only reaches back
+LIVE_TRADES_RETENTION_MINUTES. Every uvicorn worker starts the loop, but a run
+first takes a lease row in `job_locks`; workers that don't get it skip the run,
+so the rollup, purge and OPTIMIZE happen in one process at a time. The lease
+expires after RETENTION_LOCK_SECONDS in case its holder dies mid-run.
+
+Run once from the backend directory with:
+    python -m app.services.retention_service
+"""
+import asyncio
+import datetime
+import os
+import socket
+import time
+from typing import Any, Dict, Optional
+
+from app.core.concurrency import bulkheads
+from app.core.config import settings
+from app.db.database import get_db_connection
+
+CUTOFF_QUERY = """
+SELECT DATE_TRUNC('minute', CONVERT_TZ(NOW(), @@session.time_zone, 'America/New_York')
+                            - INTERVAL %s MINUTE)
+"""
+
+WATERMARK_QUERY = "SELECT MAX(bar_start) FROM live_trades_minute_bars"
+
+ROLLUP_QUERY = """
+INSERT INTO live_trades_minute_bars
+    (bar_start, ticker, open, high, low, close, volume, trade_count, vwap)
+SELECT DATE_TRUNC('minute', localTS) AS bar_start,
+       ticker,
+       FIRST(price, localTS),
+       MAX(price),
+       MIN(price),
+       LAST(price, localTS),
+       SUM(size),
+       COUNT(*),
+       SUM(price * size) / NULLIF(SUM(size), 0)
+  FROM live_trades
+ WHERE localTS >= %s AND localTS < %s
+ GROUP BY 1, 2
+"""
+
+PURGE_QUERY = "DELETE FROM live_trades WHERE localTS < %s LIMIT %s"
+
+LOCK_NAME = "live_trades_retention"
+LOCK_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+# Take the lease if it is free, expired or already ours; then read who holds it.
+# Assignments apply left to right, so expires_at sees the updated owner.
+ACQUIRE_LOCK_QUERY = """
+INSERT INTO job_locks (name, owner, expires_at)
+VALUES (%s, %s, NOW() + INTERVAL %s SECOND)
+ON DUPLICATE KEY UPDATE
+    owner = IF(expires_at < NOW() OR owner = VALUES(owner), VALUES(owner), owner),
+    expires_at = IF(owner = VALUES(owner), VALUES(expires_at), expires_at)
+"""
+LOCK_OWNER_QUERY = "SELECT owner FROM job_locks WHERE name = %s"
+RELEASE_LOCK_QUERY = "DELETE FROM job_locks WHERE name = %s AND owner = %s"
+
+TABLE_BYTES_QUERY = """
+SELECT COALESCE(SUM(compressed_size), 0)
+  FROM information_schema.columnar_segments
+ WHERE database_name = DATABASE() AND table_name = 'live_trades'
+"""
+
+# Report of the most recent run, served by /api/metrics/retention
+last_report: Optional[Dict[str, Any]] = None
+
+
+def _table_bytes(cursor) -> Optional[int]:
+    """Compressed on-disk size of live_trades, or None if the catalog can't be read."""
+    try:
+        cursor.execute(TABLE_BYTES_QUERY)
+        return int(cursor.fetchone()[0])
+    except Exception as e:
+        print(f"Could not read live_trades size: {e}")
+        return None
+
+
+def acquire_lock(cursor, name: str = LOCK_NAME, seconds: int = None) -> bool:
+    """Take (or renew) the job lease; False if another process holds it."""
+    cursor.execute(ACQUIRE_LOCK_QUERY, (name, LOCK_OWNER, seconds or settings.RETENTION_LOCK_SECONDS))
+    cursor.execute(LOCK_OWNER_QUERY, (name,))
+    row = cursor.fetchone()
+    return row is not None and row[0] == LOCK_OWNER
+
+
+def release_lock(cursor, name: str = LOCK_NAME):
+    cursor.execute(RELEASE_LOCK_QUERY, (name, LOCK_OWNER))
+
+
+def run_retention_locked() -> Optional[Dict[str, Any]]:
+    """run_retention() if this process gets the lease; None if another one is running it."""
+    with get_db_connection() as connection:
+        with connection.cursor() as cursor:
+            acquired = acquire_lock(cursor)
+            connection.commit()
+    if not acquired:
+        return None
+    try:
+        return run_retention()
+    finally:
+        with get_db_connection() as connection:
+            with connection.cursor() as cursor:
+                release_lock(cursor)
+            connection.commit()
+
+
+def run_retention(retention_minutes: int = None, batch_size: int = None) -> Dict[str, Any]:
+    """Roll trades older than the retention age into minute bars, then purge them in batches."""
+    retention_minutes = retention_minutes or settings.LIVE_TRADES_RETENTION_MINUTES
+    batch_size = batch_size or settings.RETENTION_PURGE_BATCH_SIZE
+    started = time.perf_counter()
+
+    with get_db_connection() as connection:
+        with connection.cursor() as cursor:
+            bytes_before = _table_bytes(cursor)
+
+            cursor.execute(CUTOFF_QUERY, (retention_minutes,))
+            cutoff = cursor.fetchone()[0]
+            cursor.execute(WATERMARK_QUERY)
+            newest_bar = cursor.fetchone()[0]
+            rollup_from = (newest_bar + datetime.timedelta(minutes=1)) if newest_bar else datetime.datetime(1970, 1, 1)
+
+            bars_written = 0
+            if rollup_from < cutoff:
+                cursor.execute(ROLLUP_QUERY, (rollup_from, cutoff))
+                bars_written = cursor.rowcount
+                connection.commit()
+
+            # Small batches keep each delete transaction short so ingest isn't blocked
+            rows_purged = 0
+            while True:
+                cursor.execute(PURGE_QUERY, (cutoff, batch_size))
+                deleted = cursor.rowcount
+                connection.commit()
+                rows_purged += max(deleted, 0)
+                if deleted < batch_size:
+                    break
+
+            if rows_purged:
+                # Merge segments so deleted rows are actually released
+                cursor.execute("OPTIMIZE TABLE live_trades")
+                cursor.fetchall()
+            bytes_after = _table_bytes(cursor)
+
+    report = {
+        "cutoff": cutoff.isoformat() if hasattr(cutoff, "isoformat") else str(cutoff),
+        "bars_written": bars_written,
+        "rows_purged": rows_purged,
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "bytes_reclaimed": (bytes_before - bytes_after) if bytes_before is not None and bytes_after is not None else None,
+        "duration_seconds": round(time.perf_counter() - started, 3),
+        "finished_at": datetime.datetime.now().isoformat(),
+    }
+    global last_report
+    last_report = report
+    print(f"Retention run: {report}")
+    return report
+
+
+async def run_retention_loop():
+    """Run the retention job every RETENTION_INTERVAL_SECONDS (in one process at a time) until cancelled."""
+    while True:
+        try:
+            await bulkheads["db"].run(run_retention_locked)
+        except Exception as e:
+            print(f"Retention run failed: {e}")
+        await asyncio.sleep(settings.RETENTION_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    if run_retention_locked() is None:
+        print("Retention is already running in another process")
@@ -0,0 +1,82 @@
+"""
+Shared per-symbol derived series for dashboard computations.
+
+Most portfolios hold the same few symbols, so each symbol's derived series
+(closes, resampled bars) is computed once per (symbol, period),
+kept in a bounded TTL cache, and then shared across users. A user's chart is
+then a column selection plus one weighted sum over these arrays.
+"""
+import threading
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.cache import get_cache
+from app.core.config import settings
+
+_series_cache = get_cache("symbol_series", max_entries=settings.STOCK_DATA_CACHE_SIZE, ttl=settings.STOCK_CACHE_TTL)
+
+
+class SymbolSeries:
+    """Immutable daily closes of one symbol plus lazily memoized derived series."""
+
+    def __init__(self, symbol: str, period: str, history: pd.DataFrame):
+        self.symbol = symbol
+        self.period = period
+        self.dates = history.index.values
+        self.close = history['Close'].to_numpy(dtype=float)
+        self._resampled: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def resampled(self, rule: Optional[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(dates, last close per `rule` bucket); the daily series when rule is None."""
+        if rule is None:
+            return self.dates, self.close
+        with self._lock:
+            bars = self._resampled.get(rule)
+            if bars is None:
+                last = pd.Series(self.close, index=self.dates).resample(rule).last().dropna()
+                bars = self._resampled[rule] = (last.index.values, last.to_numpy())
+        return bars
+
+
+def _build(keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[SymbolSeries]]:
+    """Series for (symbol, period) keys, one history batch per period (None without history)."""
+    from app.services.stock_service import StockService
+
+    by_period: Dict[str, List[str]] = {}
+    for symbol, period in keys:
+        by_period.setdefault(period, []).append(symbol)
+    built = {}
+    for period, symbols in by_period.items():
+        histories = StockService.get_stock_data_many(symbols, period)
+        for symbol in symbols:
+            history = histories.get(symbol)
+            built[(symbol, period)] = SymbolSeries(symbol, period, history) if history is not None and not history.empty else None
+    return built
+
+
+def get_symbol_series(symbols: List[str], period: str) -> Dict[str, SymbolSeries]:
+    """Shared series for every symbol with history, building the missing ones in one batch."""
+    series = _series_cache.get_or_compute_many([(symbol, period) for symbol in symbols], _build)
+    return {symbol: s for (symbol, _), s in series.items() if s is not None}
+
+
+def refresh_ahead(within: float, keep: Optional[Callable[[Hashable], bool]] = None) -> int:
+    """Rebuild series expiring within `within` seconds that are still in use (blocking)."""
+    return _series_cache.refresh_ahead(within, _build, keep)
+
+
+def aligned_matrix(columns: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, pd.DatetimeIndex]:
+    """Stack (dates, values) series into one (dates x series) matrix, forward/back-filling gaps."""
+    indexes = [dates for dates, _ in columns]
+    if all(len(ix) == len(indexes[0]) and (ix == indexes[0]).all() for ix in indexes):
+        return np.column_stack([values for _, values in columns]), pd.DatetimeIndex(indexes[0])
+    dates = np.unique(np.concatenate(indexes))
+    matrix = np.full((len(dates), len(columns)), np.nan)
+    for j, (ix, values) in enumerate(columns):
+        matrix[np.searchsorted(dates, ix), j] = values
+    # Fill dates a series has no value for (e.g. different trading calendars)
+    matrix = pd.DataFrame(matrix).ffill().bfill().to_numpy()
+    return matrix, pd.DatetimeIndex(dates)
@@ -0,0 +1,210 @@
+"""
+Shared price panels: one columnar float64 file of daily OHLCV that every worker maps.
+
+The price store keeps one record-oriented file per symbol, so each worker that
+reads it builds (and caches) its own DataFrame copies; memory grows with the
+number of uvicorn/gunicorn workers. A panel instead lays the hot symbols out
+column by column in one file:
+
+    dates   int64[days]                  days since the epoch, ascending
+    values  float64[symbols, 5, days]    Open, High, Low, Close, Volume (int64 bits)
+
+plus a small JSON index (`panel.json`: data file name, last date, days, symbols).
+Workers map the data file read-only and serve each symbol as a DataFrame whose
+columns are views into the mapping, so the prices live once in the OS page cache
+however many workers there are. Put SHARED_PANELS_DIR on /dev/shm to keep them
+off disk entirely.
+
+One process writes: publish() takes an exclusive lock on the panel directory,
+re-reads the index (another worker may have just published what it needs),
+writes a complete new data file from the price store and then atomically
+replaces the index. Readers notice the new index on their next lookup (checked
+at most once a second) and map the new file; old files are removed, which is
+safe for workers still holding a mapping of them. A panel is only served on the
+day it was built through; the cache warmer republishes it after midnight.
+"""
+import datetime
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.services.price_store import price_store
+from app.services.synthetic_ohlcv import BASE_PRICES, FIELDS, generator_tag
+
+try:
+    import fcntl
+except ImportError:  # Windows: rely on the in-process lock only
+    fcntl = None
+
+INDEX_FILE = "panel.json"
+LOCK_FILE = "panel.lock"
+
+
+class Panel:
+    """A mapped panel file: zero-copy per-symbol DataFrames over the shared pages."""
+
+    def __init__(self, directory: str, index: Dict[str, Any]):
+        self.file = index["file"]
+        self.through = datetime.date.fromisoformat(index["through"])
+        self.symbols: List[str] = index["symbols"]
+        self.positions = {symbol: i for i, symbol in enumerate(self.symbols)}
+        days = index["days"]
+        mapping = np.memmap(os.path.join(directory, self.file), dtype="<f8", mode="r")
+        self.dates = pd.DatetimeIndex(mapping[:days].view("<i8").astype("datetime64[D]").astype("datetime64[ns]"))
+        self.values = mapping[days:].reshape(len(self.symbols), len(FIELDS), days)
+        self.nbytes = mapping.nbytes
+        self._frames: Dict[str, pd.DataFrame] = {}
+
+    def frame(self, symbol: str) -> Optional[pd.DataFrame]:
+        """Daily OHLCV of `symbol` whose columns are views into the mapping (None if not in the panel)."""
+        frame = self._frames.get(symbol)
+        if frame is None:
+            i = self.positions.get(symbol)
+            if i is None:
+                return None
+            columns = {field: self.values[i, k] for k, field in enumerate(FIELDS)}
+            columns["Volume"] = columns["Volume"].view("<i8")
+            frame = self._frames[symbol] = pd.DataFrame(columns, index=self.dates, copy=False)
+        return frame
+
+
+class SharedPanels:
+    """Finds, maps and (in one process at a time) publishes the shared price panel."""
+
+    def __init__(self, directory: str, check_seconds: float = 1.0):
+        self.directory = directory
+        self.check_seconds = check_seconds
+        self._panel: Optional[Panel] = None
+        self._index_mtime: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.publishes = 0
+        self.last_publish_seconds: Optional[float] = None
+
+    # ---- readers ----
+
+    def current(self) -> Optional[Panel]:
+        """The newest published panel (re-checking the index at most every `check_seconds`)."""
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_seconds:
+            self._checked_at = now
+            self._reload()
+        return self._panel
+
+    def serves(self, symbol: str) -> bool:
+        panel = self.current()
+        return panel is not None and panel.through == datetime.date.today() and symbol in panel.positions
+
+    def _reload(self):
+        path = os.path.join(self.directory, INDEX_FILE)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return
+        with self._lock:
+            if mtime == self._index_mtime:
+                return
+            try:
+                with open(path) as f:
+                    index = json.load(f)
+                self._panel = Panel(self.directory, index)
+                self._index_mtime = mtime
+            except Exception as e:
+                print(f"Mapping shared price panel failed: {e}")
+
+    # ---- writer ----
+
+    def publish(self, symbols: List[str]) -> bool:
+        """
+        Make sure today's panel holds `symbols` (and everything the current one holds),
+        writing a new one if not; returns whether this process wrote it (blocking).
+        """
+        today = datetime.date.today()
+        wanted = set(symbols)
+        panel = self.current()
+        if panel is not None and panel.through == today and wanted <= panel.positions.keys():
+            return False
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, LOCK_FILE), "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._reload()  # another worker may have published while we waited
+                panel = self._panel
+                if panel is not None and panel.through == today:
+                    if wanted <= panel.positions.keys():
+                        return False
+                    wanted |= set(panel.symbols)
+                elif panel is not None:
+                    wanted |= set(panel.symbols)  # carry the symbols over into the new day
+                self._write(sorted(wanted), today)
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        self._reload()
+        return True
+
+    def _write(self, symbols: List[str], today: datetime.date):
+        started = time.perf_counter()
+        price_store.ensure(symbols, today, BASE_PRICES)
+        start = today - datetime.timedelta(days=price_store.history_days)
+        frames = {symbol: price_store.read(symbol, start, today) for symbol in symbols}
+        dates = max((frame.index for frame in frames.values()), key=len)
+        skipped = [symbol for symbol, frame in frames.items() if not frame.index.equals(dates)]
+        if skipped:
+            print(f"Shared price panel skips {', '.join(skipped)} (history does not cover {start}..{today})")
+        symbols = [symbol for symbol in symbols if symbol not in skipped]
+
+        days = len(dates)
+        name = f"panel-{today:%Y%m%d}-{os.getpid()}-{time.time_ns()}.f8"
+        mapping = np.memmap(os.path.join(self.directory, name), dtype="<f8", mode="w+",
+                            shape=(days + len(symbols) * len(FIELDS) * days,))
+        mapping[:days].view("<i8")[:] = dates.values.astype("datetime64[D]").astype(np.int64)
+        values = mapping[days:].reshape(len(symbols), len(FIELDS), days)
+        for i, symbol in enumerate(symbols):
+            frame = frames[symbol]
+            for k, field in enumerate(FIELDS):
+                if field == "Volume":
+                    values[i, k].view("<i8")[:] = frame[field].to_numpy(dtype=np.int64)
+                else:
+                    values[i, k] = frame[field].to_numpy(dtype=float)
+        mapping.flush()
+        del mapping, values
+
+        index = {"file": name, "through": today.isoformat(), "days": days, "symbols": symbols}
+        tmp_path = os.path.join(self.directory, f"{INDEX_FILE}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, os.path.join(self.directory, INDEX_FILE))
+        for old in os.listdir(self.directory):
+            if old.startswith("panel-") and old != name:
+                try:
+                    os.remove(os.path.join(self.directory, old))  # mapped copies stay valid
+                except OSError:
+                    pass
+        self.publishes += 1
+        self.last_publish_seconds = time.perf_counter() - started
+        print(f"Published shared price panel: {len(symbols)} symbols x {days} days through {today}")
+
+    def stats(self) -> Dict[str, Any]:
+        panel = self._panel
+        return {
+            "directory": self.directory,
+            "file": panel.file if panel else None,
+            "through": panel.through.isoformat() if panel else None,
+            "symbols": len(panel.symbols) if panel else 0,
+            "days": len(panel.dates) if panel else 0,
+            "mapped_bytes": panel.nbytes if panel else 0,
+            "frames": len(panel._frames) if panel else 0,
+            "publishes": self.publishes,
+            "last_publish_seconds": self.last_publish_seconds,
+        }
+
+
+shared_panels = SharedPanels(os.path.join(settings.SHARED_PANELS_DIR or settings.PRICE_STORE_DIR, generator_tag(), "panels"))
@@ -1,101 +1,40 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import os
 import singlestoredb as s2
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import datetime
-import time
 import random
 
+from app.core.cache import get_cache
+from app.core.config import settings
+from app.services.market_data import market_data
+from app.services.series_cache import aligned_matrix, get_symbol_series
+from app.services.synthetic_ohlcv import BASE_PRICES, DEFAULT_BASE_PRICE, stable_rng
+
+MARKET_INDICES = ['^GSPC', '^DJI', '^IXIC']  # S&P 500, Dow Jones, NASDAQ
+
+# Hot lookup of a user's holdings; served by the optimized_portfolio (user_id, symbol) key
+OPTIMIZED_POSITIONS_QUERY = "SELECT symbol, quantity FROM optimized_portfolio WHERE user_id = %s"
+
 class StockService:
-    # Class-level cache for stock data and info
-    _stock_data_cache = {}
-    _stock_info_cache = {}
-    
-    # Common stock prices for consistency (dummy data)
-    _dummy_prices = {
-        'BND': 78.50,
-        'VTI': 245.30,
-        'VNQ': 95.75,
-        'VTIP': 49.20,
-        'SPY': 420.15,
-        'QQQ': 350.80,
-        'IWM': 185.60,
-        'GLD': 182.40,
-        'TLT': 95.30,
-        'EFA': 75.20
-    }
+    # Static (per-symbol) dummy info is cached here; prices come from the market-data chain
+    _stock_info_cache = get_cache("stock_info", max_entries=settings.STOCK_INFO_CACHE_SIZE, ttl=settings.STOCK_CACHE_TTL)
+
+    _dummy_prices = BASE_PRICES
 
     @staticmethod
-    def get_stock_data(symbol: str, period: str = "1y") -> pd.DataFrame:
-        """Generate dummy stock data instead of fetching from Yahoo Finance"""
-        cache_key = f"{symbol}_{period}"
-        
-        # Check if we have cached data and it's less than 1 hour old
-        if cache_key in StockService._stock_data_cache:
-            cache_entry = StockService._stock_data_cache[cache_key]
-            cache_time = cache_entry["timestamp"]
-            current_time = time.time()
-            
-            # If cache is less than 1 hour old, use it
-            if current_time - cache_time < 3600:
-                print(f"Using cached data for {symbol} (period: {period})")
-                return cache_entry["data"]
-        
-        # Generate dummy historical data
-        print(f"Generating dummy historical data for {symbol}")
-        
-        # Determine number of days based on period
-        if period == "1y":
-            days = 365
-        elif period == "6mo":
-            days = 180
-        elif period == "3mo":
-            days = 90
-        elif period == "1mo":
-            days = 30
-        else:
-            days = 365  # Default to 1 year
-        
-        # Generate date range
-        end_date = datetime.datetime.now()
-        start_date = end_date - datetime.timedelta(days=days)
-        date_range = pd.date_range(start=start_date, end=end_date, freq='D')
-        
-        # Get base price for this symbol
-        base_price = StockService._dummy_prices.get(symbol, 100.0)
-        
-        # Generate realistic price data with some volatility
-        np.random.seed(hash(symbol) % 2147483647)  # Consistent seed per symbol
-        daily_returns = np.random.normal(0.0005, 0.02, len(date_range))  # Small positive drift with 2% daily volatility
-        
-        prices = [base_price]
-        for i in range(1, len(date_range)):
-            new_price = prices[-1] * (1 + daily_returns[i])
-            prices.append(max(new_price, 1.0))  # Ensure price doesn't go below $1
-        
-        # Create DataFrame with OHLCV data
-        df = pd.DataFrame({
-            'Open': [p * random.uniform(0.99, 1.01) for p in prices],
-            'High': [p * random.uniform(1.00, 1.03) for p in prices],
-            'Low': [p * random.uniform(0.97, 1.00) for p in prices],
-            'Close': prices,
-            'Volume': [random.randint(100000, 5000000) for _ in prices]
-        }, index=date_range)
-        
-        # Ensure High >= Close >= Low and Open is reasonable
-        for i in range(len(df)):
-            df.iloc[i, df.columns.get_loc('High')] = max(df.iloc[i, df.columns.get_loc('High')], df.iloc[i, df.columns.get_loc('Close')])
-            df.iloc[i, df.columns.get_loc('Low')] = min(df.iloc[i, df.columns.get_loc('Low')], df.iloc[i, df.columns.get_loc('Close')])
-        
-        # Cache the result
-        StockService._stock_data_cache[cache_key] = {
-            "data": df,
-            "timestamp": time.time()
-        }
-        
-        return df
+    def get_stock_data(symbol: str, period: str = "1y", interval: str = "1d") -> pd.DataFrame:
+        """OHLCV for one symbol from the market-data chain (empty if no provider has it)"""
+        return StockService.get_stock_data_many([symbol], period, interval).get(symbol, pd.DataFrame())
+
+    @staticmethod
+    def get_stock_data_many(symbols: List[str], period: str = "1y", interval: str = "1d") -> Dict[str, pd.DataFrame]:
+        """
+        OHLCV for many symbols in one batched pass through the market-data chain. Every
+        period ("5d", "1mo", "ytd", "5y", "max", ...) is a slice of one cached full history.
+        """
+        return market_data.history(symbols, period, interval)
 
     def get_optimized_positions(self, user_id: str) -> List[Dict[str, Any]]:
         """Fetch optimized portfolio positions from SingleStore."""
@@ -115,8 +54,7 @@ class StockService:
             return []
 
         try:
-            query = "SELECT symbol, quantity FROM optimized_portfolio WHERE user_id = %s"
-            cursor.execute(query, (user_id,))
+            cursor.execute(OPTIMIZED_POSITIONS_QUERY, (user_id,))
             results = cursor.fetchall()
             print(f"Optimized positions for user {user_id}: {results}")
         except Exception as e:
@@ -135,117 +73,111 @@ class StockService:
 
     @staticmethod
     def get_stock_info(symbol: str) -> Dict[str, Any]:
-        """Generate dummy stock info instead of fetching from Yahoo Finance"""
-        # Check if we have cached info and it's less than 1 hour old
-        if symbol in StockService._stock_info_cache:
-            cache_entry = StockService._stock_info_cache[symbol]
-            cache_time = cache_entry["timestamp"]
-            current_time = time.time()
-            
-            # If cache is less than 1 hour old, use it
-            if current_time - cache_time < 3600:
-                print(f"Using cached info for {symbol}")
-                return cache_entry["info"]
-        
-        # Generate dummy stock info
-        print(f"Generating dummy stock info for {symbol}")
-        
-        # Get base price for consistency
-        current_price = StockService._dummy_prices.get(symbol, 100.0)
-        # Add small random variation to current price
-        current_price *= random.uniform(0.98, 1.02)
-        
-        # Calculate previous close (slight variation)
-        prev_close = current_price * random.uniform(0.99, 1.01)
-        
+        """Dummy stock info with the current price and previous close from the market-data chain"""
+        info = StockService._stock_info_cache.get_or_compute_many([symbol], StockService._generate_stock_infos)[symbol]
+        quote = market_data.quotes([symbol]).get(symbol)
+        if quote is None:
+            return info
+        return {**info, 'regularMarketPrice': round(quote['price'], 2), 'previousClose': round(quote['previous_close'], 2)}
+
+    @staticmethod
+    def _generate_stock_infos(symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        print(f"Generating dummy stock info for {', '.join(symbols)}")
+        return {symbol: StockService._generate_stock_info(symbol) for symbol in symbols}
+
+    @staticmethod
+    def _generate_stock_info(symbol: str) -> Dict[str, Any]:
+        # Same symbol => same static fields in every process (see synthetic_ohlcv.stable_rng)
+        rng = stable_rng(symbol, "info")
+        uniform = lambda low, high: float(rng.uniform(low, high))
+        randint = lambda low, high: int(rng.integers(low, high, endpoint=True))
+        reference_price = StockService._dummy_prices.get(symbol, DEFAULT_BASE_PRICE)
+
         dummy_info = {
-            'regularMarketPrice': round(current_price, 2),
-            'previousClose': round(prev_close, 2),
             'shortName': f"{symbol} Dummy Stock",
             'longName': f"{symbol} Dummy Corporation",
             'currency': 'USD',
-            'marketCap': random.randint(1000000000, 500000000000),  # 1B to 500B
-            'volume': random.randint(1000000, 50000000),
-            'averageVolume': random.randint(5000000, 25000000),
-            'fiftyTwoWeekHigh': current_price * random.uniform(1.1, 1.5),
-            'fiftyTwoWeekLow': current_price * random.uniform(0.5, 0.9),
-            'dividendYield': random.uniform(0.0, 0.05) if random.random() > 0.3 else 0.0,  # 70% chance of having dividend
-            'beta': random.uniform(0.5, 1.8),
-            'trailingPE': random.uniform(10, 30) if random.random() > 0.2 else None,
-            'forwardPE': random.uniform(12, 25) if random.random() > 0.2 else None,
-        }
-        
-        # Cache the result
-        StockService._stock_info_cache[symbol] = {
-            "info": dummy_info,
-            "timestamp": time.time()
+            'marketCap': randint(1000000000, 500000000000),  # 1B to 500B
+            'volume': randint(1000000, 50000000),
+            'averageVolume': randint(5000000, 25000000),
+            'fiftyTwoWeekHigh': reference_price * uniform(1.1, 1.5),
+            'fiftyTwoWeekLow': reference_price * uniform(0.5, 0.9),
+            'dividendYield': uniform(0.0, 0.05) if rng.random() > 0.3 else 0.0,  # 70% chance of having dividend
+            'beta': uniform(0.5, 1.8),
+            'trailingPE': uniform(10, 30) if rng.random() > 0.2 else None,
+            'forwardPE': uniform(12, 25) if rng.random() > 0.2 else None,
         }
         
         return dummy_info
 
+    @staticmethod
+    def get_quotes(symbols: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Current price and previous close for many symbols in one call, as arrays aligned
+        with `symbols` (NaN where no quote is available).
+        """
+        quotes = market_data.quotes(symbols)
+        price = np.full(len(symbols), np.nan)
+        previous_close = np.full(len(symbols), np.nan)
+        for i, symbol in enumerate(symbols):
+            quote = quotes.get(symbol)
+            if quote:
+                price[i] = quote['price']
+                previous_close[i] = quote['previous_close']
+        return {"symbols": symbols, "price": price, "previous_close": previous_close}
+
     @staticmethod
     def get_portfolio_performance(positions: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Calculate portfolio performance"""
-        performance = {
-            'total_value': 0,
-            'daily_change': 0,
-            'holdings': []
+        """Calculate portfolio performance for all positions in one vectorized pass"""
+        symbols = [position["symbol"] for position in positions]
+        quantities = np.array([position["quantity"] for position in positions], dtype=float)
+        quotes = StockService.get_quotes(symbols)
+        price, previous_close = quotes["price"], quotes["previous_close"]
+
+        valid = ~np.isnan(price)
+        for symbol in np.asarray(symbols, dtype=object)[~valid]:
+            print(f"Warning: Could not get price data for {symbol}, skipping...")
+
+        value = price * quantities
+        daily_change = (price - previous_close) * quantities
+        with np.errstate(divide='ignore', invalid='ignore'):
+            daily_change_percent = np.where(previous_close > 0, (price - previous_close) / previous_close * 100, 0.0)
+        daily_change_percent = np.round(daily_change_percent, 2)
+
+        holdings = [
+            {
+                'symbol': symbols[i],
+                'quantity': positions[i]["quantity"],
+                'value': float(value[i]),
+                'daily_change': float(daily_change[i]),
+                'daily_change_percent': float(daily_change_percent[i])
+            }
+            for i in np.flatnonzero(valid)
+        ]
+        return {
+            'total_value': float(value[valid].sum()),
+            'daily_change': float(daily_change[valid].sum()),
+            'holdings': holdings
         }
-        
-        for position in positions:
-            symbol = position["symbol"]
-            quantity = position["quantity"]
-            try:
-                # Use our cached info method instead of direct yf.Ticker access
-                info = StockService.get_stock_info(symbol)
-                
-                # Check if we got valid data
-                if not info or 'regularMarketPrice' not in info:
-                    print(f"Warning: Could not get price data for {symbol}, skipping...")
-                    continue
-                    
-                current_price = info.get('regularMarketPrice', 0)
-                prev_close = info.get('previousClose', current_price)  # Default to current if no prev
-                
-                position_value = current_price * quantity
-                daily_change = (current_price - prev_close) * quantity
-                
-                # Calculate daily change percentage
-                daily_change_percent = 0.0
-                if prev_close > 0:
-                    daily_change_percent = ((current_price - prev_close) / prev_close) * 100
-                
-                performance['holdings'].append({
-                    'symbol': symbol,
-                    'quantity': quantity,
-                    'value': position_value,
-                    'daily_change': daily_change,
-                    'daily_change_percent': round(daily_change_percent, 2)
-                })
-                
-                performance['total_value'] += position_value
-                performance['daily_change'] += daily_change
-            except Exception as e:
-                print(f"Error processing {symbol}: {e}")
-                # Continue with other stocks if one fails
-                continue
-        
-        return performance
 
     @staticmethod
     def get_market_summary() -> dict:
         """Get summary of major market indices"""
-        indices = ['^GSPC', '^DJI', '^IXIC']  # S&P 500, Dow Jones, NASDAQ
+        indices = MARKET_INDICES
         summary = {}
+        # One batched quote lookup (live price index first) for all indices
+        quotes = market_data.quotes(indices)
         
         for index in indices:
             try:
-                # Use our cached info method
-                info = StockService.get_stock_info(index)
+                info = StockService._stock_info_cache.get_or_compute_many([index], StockService._generate_stock_infos)[index]
+                quote = quotes.get(index)
+                price = quote['price'] if quote else 0
+                previous_close = quote['previous_close'] if quote else 0
                 summary[index] = {
                     'name': info.get('shortName', ''),
-                    'price': info.get('regularMarketPrice', 0),
-                    'change': info.get('regularMarketChangePercent', 0)
+                    'price': round(price, 2),
+                    'change': round((price - previous_close) / previous_close * 100, 2) if previous_close else 0
                 }
             except Exception as e:
                 print(f"Error getting info for index {index}: {e}")
@@ -258,104 +190,43 @@ class StockService:
             
         return summary
 
-    def get_portfolio_chart_data(self, positions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def get_portfolio_chart_data(self, positions: List[Dict[str, Any]], period: str = "1y",
+                                 resample: Optional[str] = "W") -> List[Dict[str, Any]]:
         """
         Get historical data for portfolio performance charting using dummy data.
         Returns a list of dicts like {"timestamp": str, "value": float}.
         The timestamp must be in ISO format string for JavaScript new Date() compatibility.
+
+        Per-symbol closes and resampled bars come from the cross-user series cache;
+        they are aligned into one dates x symbols matrix and valued with a single
+        matrix-vector product with the quantities. `resample` is a pandas rule
+        (e.g. "W", "ME"), applied when there are more than 50 points; None keeps daily values.
         """
         if not positions:
             print("No positions provided to get_portfolio_chart_data")
             return self._generate_mock_chart_data()
-        
-        print(f"Getting chart data for positions: {positions}")
-        
+
         try:
-            # Get 1 year historical data for each position using dummy data
-            portfolio_value = pd.DataFrame()
-            
+            quantities: Dict[str, float] = {}
             for position in positions:
-                symbol = position["symbol"]
-                quantity = position["quantity"]
-                try:
-                    print(f"Processing historical data for {symbol} with quantity {quantity}")
-                    # Get dummy historical data for this symbol
-                    df = self.get_stock_data(symbol, period="1y")
-                    
-                    # Skip if no data (shouldn't happen with dummy data)
-                    if df is None or df.empty:
-                        print(f"No historical data for {symbol}, skipping...")
-                        continue
-                    
-                    print(f"Got data for {symbol} with shape {df.shape}")
-                    
-                    # Calculate position value over time
-                    position_value_over_time = df['Close'] * quantity
-                    position_df = pd.DataFrame({
-                        'date': df.index,
-                        symbol: position_value_over_time
-                    }).set_index('date')
-                    
-                    # Add to portfolio value
-                    if portfolio_value.empty:
-                        portfolio_value = position_df
-                    else:
-                        portfolio_value = portfolio_value.join(position_df, how='outer')
-                except Exception as e:
-                    print(f"Error processing historical data for {symbol}: {e}")
-                    continue  # Skip this symbol and continue with others
-            
-            # Check if we have any data
-            if portfolio_value.empty:
+                quantities[position["symbol"]] = quantities.get(position["symbol"], 0.0) + float(position["quantity"])
+            # Per-symbol series (and their resampled bars) are shared by every user's chart
+            shared = get_symbol_series(list(quantities), period)
+            symbols = [s for s in quantities if s in shared]
+            if not symbols:
                 print("No portfolio data available after processing all symbols")
-                # Return mock data if we couldn't get real data
                 return self._generate_mock_chart_data()
-            
-            print(f"Portfolio value DataFrame shape: {portfolio_value.shape}")
-            
-            # Fill missing values (e.g., if some stocks have data for dates others don't)
-            portfolio_value = portfolio_value.ffill()
-            portfolio_value = portfolio_value.bfill()
-            
-            # Calculate total portfolio value
-            portfolio_value['value'] = portfolio_value.sum(axis=1)
-            
-            # Reset index to get date as a column
-            result = portfolio_value.reset_index()[['date', 'value']]
-            print(f"Final result shape: {result.shape}")
-            
-            # Add weekly resampling to smooth the chart (optional)
-            if len(result) > 50:  # Only if we have enough data points
-                result = result.set_index('date')
-                result = result.resample('W').last()  # Weekly resampling
-                result = result.reset_index()
-            
-            # Convert to the format expected by the frontend
-            chart_data = []
-            for _, row in result.iterrows():
-                # Convert timestamp to ISO format string for JavaScript compatibility
-                timestamp = row['date']
-                if hasattr(timestamp, 'isoformat'):
-                    timestamp_str = timestamp.isoformat()
-                else:
-                    # If it's already a string or other type, convert to string
-                    timestamp_str = str(timestamp)
-                
-                chart_data.append({
-                    "timestamp": timestamp_str,
-                    "value": float(row['value'])
-                })
-            
-            # Print a sample of the data to debug
-            if chart_data:
-                print(f"Chart data sample (first 2 points): {chart_data[:2]}")
-                print(f"Total chart points: {len(chart_data)}")
-                print(f"Timestamp type: {type(chart_data[0]['timestamp'])}")
-            else:
-                print("No chart data generated")
-                
+
+            daily_points = max(len(shared[s].dates) for s in symbols)
+            rule = resample if resample and daily_points > 50 else None  # Only if we have enough data points
+            prices, dates = aligned_matrix([shared[s].resampled(rule) for s in symbols])
+            values = prices @ np.array([quantities[s] for s in symbols])
+
+            timestamps = np.datetime_as_string(dates.values, unit='s').tolist()
+            chart_data = [{"timestamp": t, "value": v} for t, v in zip(timestamps, values.tolist())]
+            print(f"Chart data for {len(symbols)} symbols: {len(chart_data)} points")
             return chart_data
-            
+
         except Exception as e:
             print(f"Error getting portfolio chart data: {e}")
             import traceback
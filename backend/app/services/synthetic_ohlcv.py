@@ -0,0 +1,199 @@
+"""
+Deterministic, versioned synthetic OHLCV generator (dummy market data).
+
+Every value is a pure function of (GENERATOR_VERSION, seed, symbol, date): draws
+come from NumPy generators seeded with a blake2b digest of those parts (never
+the process-randomized built-in hash()), so every worker and every restart
+produces identical prices for a symbol and date, whatever window is requested.
+That is what makes sharing generated data between processes (the on-disk price
+store, any external cache) valid. Bump GENERATOR_VERSION whenever the output
+changes so previously stored data is not mixed with new data.
+
+- Draws are made per (symbol, calendar year) block: daily standard normals for
+  returns and uniforms for Open/High/Low/Volume, indexed by day of the year.
+- Each symbol's path is anchored so that its close on the eve of ANCHOR_YEAR
+  is the base price. Yearly log returns are drawn once per symbol, and the log
+  price at each year boundary is their running sum from the anchor. Inside a
+  year the daily log returns log(1 + r_t), r_t = DAILY_DRIFT + DAILY_VOLATILITY * z_t,
+  are shifted equally so they add up to that year's return (a Brownian bridge),
+  so a window only needs the blocks of the years it touches.
+- Close is floored at PRICE_FLOOR; High/Low are clamped so every bar contains
+  its Open and Close.
+- `correlation` mixes a shared, equally date-keyed market factor into each
+  symbol's daily draws (single-factor model: pairwise correlation of daily
+  returns ~= correlation).
+"""
+import datetime
+import hashlib
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+PERIOD_DAYS = {"1y": 365, "6mo": 180, "3mo": 90, "1mo": 30}
+DEFAULT_BASE_PRICE = 100.0
+# Common stock prices for consistency (dummy data)
+BASE_PRICES = {
+    'BND': 78.50,
+    'VTI': 245.30,
+    'VNQ': 95.75,
+    'VTIP': 49.20,
+    'SPY': 420.15,
+    'QQQ': 350.80,
+    'IWM': 185.60,
+    'GLD': 182.40,
+    'TLT': 95.30,
+    'EFA': 75.20
+}
+DAILY_DRIFT = 0.0005
+DAILY_VOLATILITY = 0.02
+PRICE_FLOOR = 1.0
+MARKET_FACTOR_KEY = "__market__"
+
+GENERATOR_VERSION = 2
+ANCHOR_YEAR = 2025                       # closing price on the eve of this year == base price
+MIN_YEAR, MAX_YEAR = 1970, 2099          # years the generator covers
+_BLOCK_DAYS = 366
+
+_years = np.arange(MIN_YEAR, MAX_YEAR + 1)
+_year_starts = (_years - 1970).astype("datetime64[Y]").astype("datetime64[D]").astype(np.int64)
+_year_lengths = np.diff(np.append(_year_starts, np.datetime64(f"{MAX_YEAR + 1}", "D").astype(np.int64)))
+_anchor_index = ANCHOR_YEAR - MIN_YEAR
+
+
+def period_days(period: str) -> int:
+    """
+    Days covered by a yfinance-style period ("5d", "1y", "6mo", "90d", "2wk", "ytd", ...);
+    "max" is settings.STOCK_HISTORY_PERIOD, and anything unparseable is 365.
+    """
+    if period in PERIOD_DAYS:
+        return PERIOD_DAYS[period]
+    if period == "max":
+        return period_days(settings.STOCK_HISTORY_PERIOD) if settings.STOCK_HISTORY_PERIOD != "max" else 365
+    if period == "ytd":
+        today = datetime.date.today()
+        return (today - today.replace(month=1, day=1)).days
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period or "")
+    if not match:
+        return 365
+    count, unit = int(match.group(1)), match.group(2)
+    return count * {"d": 1, "wk": 7, "mo": 30, "y": 365}[unit]
+
+
+def stable_seed(*parts) -> int:
+    """64-bit seed from a blake2b digest of the parts; identical in every process."""
+    key = "|".join(str(part) for part in parts).encode()
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def stable_rng(*parts, seed: Optional[int] = None) -> np.random.Generator:
+    """Generator keyed by (GENERATOR_VERSION, seed, *parts)."""
+    seed = settings.SYNTHETIC_DATA_SEED if seed is None else seed
+    return np.random.Generator(np.random.PCG64(stable_seed(GENERATOR_VERSION, seed, *parts)))
+
+
+def generator_tag(seed: Optional[int] = None) -> str:
+    """Identifies the generator output, e.g. for naming stored or shared copies of it."""
+    return f"v{GENERATOR_VERSION}-seed{settings.SYNTHETIC_DATA_SEED if seed is None else seed}"
+
+
+def _year_index(day_numbers: np.ndarray) -> np.ndarray:
+    index = np.searchsorted(_year_starts, day_numbers, side="right") - 1
+    if len(index) and (index.min() < 0 or day_numbers.max() >= _year_starts[-1] + _year_lengths[-1]):
+        raise ValueError(f"Synthetic data only covers {MIN_YEAR}-{MAX_YEAR}")
+    return index
+
+
+def _log_boundaries(symbol: str, seed: int) -> np.ndarray:
+    """Log-price offset from the anchor at the start of every year MIN_YEAR..MAX_YEAR + 1."""
+    w = stable_rng(symbol, "years", seed=seed).standard_normal(len(_years))
+    mean = np.log1p(DAILY_DRIFT) - DAILY_VOLATILITY ** 2 / 2
+    yearly = mean * _year_lengths + DAILY_VOLATILITY * np.sqrt(_year_lengths) * w
+    boundaries = np.concatenate(([0.0], np.cumsum(yearly)))
+    return boundaries - boundaries[_anchor_index]
+
+
+def generate_ohlcv_panel(
+    symbols: List[str],
+    days: int = 365,
+    base_prices: Optional[Dict[str, float]] = None,
+    end: Optional[datetime.datetime] = None,
+    correlation: float = 0.0,
+    seed: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Daily OHLCV for `symbols` over the `days` days up to `end` (default today).
+
+    Returns a DataFrame indexed by (midnight) date with (symbol, field) MultiIndex
+    columns, so `panel[symbol]` is that symbol's Open/High/Low/Close/Volume frame.
+    The values for a given symbol and date do not depend on the window requested.
+    """
+    seed = settings.SYNTHETIC_DATA_SEED if seed is None else seed
+    end = pd.Timestamp(end or datetime.datetime.now()).normalize()
+    dates = pd.date_range(start=end - datetime.timedelta(days=days), end=end, freq='D')
+    n, m = len(dates), len(symbols)
+    base_prices = base_prices or {}
+
+    day_numbers = dates.values.astype("datetime64[D]").astype(np.int64)
+    year_index = _year_index(day_numbers)
+    offsets = day_numbers - _year_starts[year_index]
+    blocks = np.arange(year_index[0], year_index[-1] + 1)
+
+    # Per (symbol, year) draws: standard normals for returns, then uniforms for Open/High/Low/Volume
+    z = np.empty((m, len(blocks), _BLOCK_DAYS))
+    u = np.empty((4, m, len(blocks), _BLOCK_DAYS))
+    boundaries = np.empty((m, len(blocks) + 1))
+    for j, symbol in enumerate(symbols):
+        boundaries[j] = _log_boundaries(symbol, seed)[blocks[0]:blocks[-1] + 2]
+        for k, b in enumerate(blocks):
+            rng = stable_rng(symbol, _years[b], seed=seed)
+            z[j, k] = rng.standard_normal(_BLOCK_DAYS)
+            u[:, j, k] = rng.random((4, _BLOCK_DAYS))
+    if correlation:
+        market = np.stack([stable_rng(MARKET_FACTOR_KEY, _years[b], seed=seed).standard_normal(_BLOCK_DAYS)
+                           for b in blocks])
+        z = np.sqrt(correlation) * market + np.sqrt(1.0 - correlation) * z
+
+    # Daily log steps (zero past the end of shorter years), shifted so each year ends at the next boundary
+    lengths = _year_lengths[blocks]
+    in_year = np.arange(_BLOCK_DAYS) < lengths[:, None]
+    steps = np.log1p(DAILY_DRIFT + DAILY_VOLATILITY * z) * in_year
+    steps += ((np.diff(boundaries, axis=1) - steps.sum(axis=2)) / lengths)[:, :, None] * in_year
+    paths = boundaries[:, :-1, None] + np.cumsum(steps, axis=2)
+
+    block_pos = year_index - blocks[0]
+    log_close = paths[:, block_pos, offsets]
+    u = u[:, :, block_pos, offsets]
+
+    base = np.array([base_prices.get(s, DEFAULT_BASE_PRICE) for s in symbols], dtype=float)
+    close = np.maximum(base[:, None] * np.exp(log_close), PRICE_FLOOR)
+
+    # Fields laid out as (date, symbol, field) so the result reshapes without copying columns around
+    data = np.empty((n, m, len(FIELDS)))
+    open_ = close * (0.99 + 0.02 * u[0])
+    data[:, :, 0] = open_.T
+    data[:, :, 1] = np.maximum(close * (1.00 + 0.03 * u[1]), np.maximum(open_, close)).T
+    data[:, :, 2] = np.minimum(close * (0.97 + 0.03 * u[2]), np.minimum(open_, close)).T
+    data[:, :, 3] = close.T
+    data[:, :, 4] = (100000 + np.floor(u[3] * 4900001)).T
+
+    data = data.reshape(n, m * len(FIELDS))
+    columns = pd.MultiIndex.from_product([symbols, FIELDS], names=["symbol", "field"])
+    return pd.DataFrame(data, index=dates, columns=columns)
+
+
+def split_panel(panel: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Per-symbol OHLCV frames (integer Volume) from a panel, without MultiIndex lookups."""
+    values = panel.to_numpy()
+    width = len(FIELDS)
+    frames = {}
+    for j, symbol in enumerate(panel.columns.get_level_values(0)[::width]):
+        block = values[:, j * width:(j + 1) * width]
+        columns = {field: block[:, k] for k, field in enumerate(FIELDS)}
+        columns['Volume'] = columns['Volume'].astype(np.int64)
+        frames[symbol] = pd.DataFrame(columns, index=panel.index)
+    return frames
@@ -0,0 +1,170 @@
+"""
+In-process feed of newly ingested live trades.
+
+The feed tails `live_trades` with a localTS watermark and hands every new batch
+to its subscribers, so incremental services (leaderboards, valuations, alerts, ...)
+can update their state per trade instead of rescanning the table per request.
+
+Only completed seconds are read: the upper bound is the start of the current
+second, so rows still being written for that second are picked up by the next
+poll rather than skipped.
+
+localTS is stamped by the producer's clock and rows are inserted asynchronously
+(with retries), so a row for second T can become visible after the watermark has
+passed T. Each poll therefore re-reads the last TRADE_FEED_LAG_SECONDS before the
+watermark as well, and drops the rows it already delivered by their unique `seq`
+(schema migration 4). A batch can thus contain rows older than the previous
+batch's newest one, by up to the lag; rows later than that are still lost.
+
+Subscribers are plain callables taking a DataFrame with columns
+localTS (datetime64), seq, ticker, price and size. They run on the event loop,
+so they must be cheap and must not block; state they own needs no locking
+as long as it is only read from async routes.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import pandas as pd
+import singlestoredb as s2
+
+from app.core.concurrency import bulkheads
+from app.core.config import settings, DATABASE_CONFIG
+
+FEED_QUERY = """
+SELECT localTS, seq, ticker, price, size
+  FROM live_trades
+ WHERE localTS >= %s
+   AND localTS < DATE_TRUNC('second', CONVERT_TZ(NOW(), @@session.time_zone, 'America/New_York'))
+ ORDER BY localTS
+"""
+
+BACKFILL_QUERY = """
+SELECT localTS, seq, ticker, price, size
+  FROM live_trades
+ WHERE localTS >= CONVERT_TZ(NOW(), @@session.time_zone, 'America/New_York') - INTERVAL %s SECOND
+   AND localTS < DATE_TRUNC('second', CONVERT_TZ(NOW(), @@session.time_zone, 'America/New_York'))
+ ORDER BY localTS
+"""
+
+
+class TradeFeed:
+    """Polls live_trades past a watermark and dispatches new trades to subscribers."""
+
+    def __init__(self, poll_interval: float = 1.0, backfill_seconds: int = 300, lag_seconds: int = 30):
+        self.poll_interval = poll_interval
+        self.backfill_seconds = backfill_seconds
+        self.lag = pd.Timedelta(seconds=lag_seconds)
+        self.watermark: Optional[pd.Timestamp] = None  # newest localTS delivered
+        # seqs delivered within the re-read window, and (newest localTS, seqs) per batch to expire them
+        self._seen: set = set()
+        self._seen_batches: Deque[Tuple[pd.Timestamp, List[int]]] = deque()
+        self._subscribers: List[Callable[[pd.DataFrame], None]] = []
+        self._conn = None
+        self.batches = 0
+        self.trades = 0
+        self.errors = 0
+        self.duplicates = 0    # re-read rows dropped because they were already delivered
+        self.late_trades = 0   # delivered rows older than the watermark at the time
+        self.last_poll_ms = 0.0
+        self.last_success: Optional[float] = None  # time.time() of the last successful poll
+
+    def subscribe(self, callback: Callable[[pd.DataFrame], None]):
+        """Register a callable to receive every new trade batch."""
+        self._subscribers.append(callback)
+
+    def _fetch(self) -> pd.DataFrame:
+        """Read trades newer than the watermark (blocking; run through the db bulkhead)."""
+        if self._conn is None:
+            self._conn = s2.connect(**DATABASE_CONFIG)
+        try:
+            if self.watermark is None:
+                df = pd.read_sql(BACKFILL_QUERY, self._conn, params=(self.backfill_seconds,))
+            else:
+                since = (self.watermark - self.lag).to_pydatetime()
+                df = pd.read_sql(FEED_QUERY, self._conn, params=(since,))
+        except Exception:
+            # Drop the connection so the next poll reconnects
+            try:
+                self._conn.close()
+            finally:
+                self._conn = None
+            raise
+        if not df.empty:
+            df['localTS'] = pd.to_datetime(df['localTS'])
+            df['price'] = df['price'].astype(float)
+            df['size'] = df['size'].astype(float)
+        return df
+
+    def _drop_delivered(self, batch: pd.DataFrame) -> pd.DataFrame:
+        """Rows of a (re-read) batch not delivered yet; remembers their seqs for the lag window."""
+        delivered = batch['seq'].isin(self._seen)
+        self.duplicates += int(delivered.sum())
+        batch = batch[~delivered]
+        if batch.empty:
+            return batch
+        seqs = batch['seq'].tolist()
+        self._seen.update(seqs)
+        self._seen_batches.append((batch['localTS'].max(), seqs))
+        horizon = max(self.watermark, batch['localTS'].max()) - self.lag if self.watermark is not None else None
+        # A batch whose newest row is before the re-read window can never be read again
+        while horizon is not None and self._seen_batches and self._seen_batches[0][0] < horizon:
+            self._seen.difference_update(self._seen_batches.popleft()[1])
+        return batch
+
+    def publish(self, batch: pd.DataFrame):
+        """Drop rows already delivered, advance the watermark and hand the rest to every subscriber."""
+        if batch.empty:
+            return
+        batch = self._drop_delivered(batch)
+        if batch.empty:
+            return
+        if self.watermark is not None:
+            self.late_trades += int((batch['localTS'] < self.watermark).sum())
+            self.watermark = max(self.watermark, batch['localTS'].iloc[-1])
+        else:
+            self.watermark = batch['localTS'].iloc[-1]
+        self.batches += 1
+        self.trades += len(batch)
+        for callback in self._subscribers:
+            try:
+                callback(batch)
+            except Exception as e:
+                print(f"Trade feed subscriber {getattr(callback, '__qualname__', callback)} failed: {e}")
+
+    async def run(self):
+        """Poll forever until cancelled."""
+        while True:
+            started = time.perf_counter()
+            try:
+                batch = await bulkheads["db"].run(self._fetch)
+                self.publish(batch)
+                self.last_success = time.time()
+            except Exception as e:
+                self.errors += 1
+                print(f"Trade feed poll failed: {e}")
+            self.last_poll_ms = (time.perf_counter() - started) * 1000
+            await asyncio.sleep(self.poll_interval)
+
+    def stats(self) -> Dict:
+        return {
+            "watermark": self.watermark.isoformat() if self.watermark is not None else None,
+            "lag_seconds": self.lag.total_seconds(),
+            "batches": self.batches,
+            "trades": self.trades,
+            "late_trades": self.late_trades,
+            "duplicates": self.duplicates,
+            "errors": self.errors,
+            "subscribers": len(self._subscribers),
+            "last_poll_ms": round(self.last_poll_ms, 3),
+            "last_success": self.last_success,
+            "seconds_since_success": round(time.time() - self.last_success, 3) if self.last_success else None,
+        }
+
+
+trade_feed = TradeFeed(
+    poll_interval=settings.TRADE_FEED_POLL_SECONDS,
+    backfill_seconds=settings.TRADE_FEED_BACKFILL_SECONDS,
+    lag_seconds=settings.TRADE_FEED_LAG_SECONDS,
+)
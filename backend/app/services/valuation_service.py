@@ -0,0 +1,188 @@
+"""
+Mark-to-market portfolio valuation driven by the trade feed.
+
+An inverted index maps each symbol to the users holding it (built from
+`optimized_portfolio`). When a trade batch arrives, only the portfolios holding
+a traded symbol are touched: each holder's value moves by quantity * price delta,
+and the new valuation is pushed to the "portfolio:<user_id>" broadcast topic.
+
+Prices of symbols that trade in `live_trades` come from the shared price index
+(app.services.price_index), which must see each batch first; other symbols are
+priced from StockService quotes. The daily change is measured against the
+previous close (the index's, else the day's first live trade, else the quote's).
+Holdings are reloaded periodically, which also re-baselines the incrementally
+maintained totals and re-prices the symbols without live trades from fresh quotes.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from app.core.broadcast import broadcaster
+from app.core.concurrency import bulkheads
+from app.core.config import settings
+from app.db.database import get_db_connection
+from app.services.price_index import price_index
+from app.services.stock_service import StockService
+
+ALL_HOLDINGS_QUERY = "SELECT user_id, symbol, quantity FROM optimized_portfolio"
+
+
+def portfolio_topic(user_id: str) -> str:
+    return f"portfolio:{user_id}"
+
+
+class LiveValuation:
+    """Per-user portfolio value and daily change, updated per trade batch."""
+
+    def __init__(self):
+        self.holdings: Dict[str, Dict[str, float]] = {}      # user -> symbol -> quantity
+        self.holders: Dict[str, Dict[str, float]] = {}       # symbol -> user -> quantity
+        self.price: Dict[str, float] = {}
+        self.reference_price: Dict[str, float] = {}
+        self.live: Set[str] = set()                          # symbols priced from live trades
+        self.value: Dict[str, float] = {}
+        self.reference_value: Dict[str, float] = {}
+        self.as_of: Dict[str, Optional[str]] = {}
+        self.batches = 0
+        self.updates_pushed = 0
+
+    # ---- holdings ----
+
+    @staticmethod
+    def fetch_holdings() -> Tuple[List[Tuple[str, str, float]], Dict[str, Dict[str, Any]]]:
+        """Read every portfolio row plus fallback quotes (blocking; run through the db bulkhead)."""
+        with get_db_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(ALL_HOLDINGS_QUERY)
+                rows = [(user_id, symbol, float(quantity)) for user_id, symbol, quantity in cursor.fetchall()]
+        return rows, LiveValuation.fetch_quotes({symbol for _, symbol, _ in rows})
+
+    @staticmethod
+    def fetch_quotes(symbols) -> Dict[str, Dict[str, Any]]:
+        """Quotes for every held symbol in one batched market-data call (index prices where they trade)."""
+        symbols = list(symbols)
+        quotes = StockService.get_quotes(symbols)
+        return {
+            symbol: {'regularMarketPrice': float(price), 'previousClose': float(previous_close)}
+            for symbol, price, previous_close in zip(symbols, quotes["price"], quotes["previous_close"])
+            if price == price  # skip NaN (no quote)
+        }
+
+    def load_holdings(self, rows: List[Tuple[str, str, float]], quotes: Dict[str, Dict[str, Any]]):
+        """Rebuild the holdings and inverted index, then re-value every portfolio."""
+        holdings: Dict[str, Dict[str, float]] = {}
+        for user_id, symbol, quantity in rows:
+            positions = holdings.setdefault(user_id, {})
+            positions[symbol] = positions.get(symbol, 0.0) + quantity
+        self.holdings = holdings
+        self.holders = {}
+        for user_id, positions in holdings.items():
+            for symbol, quantity in positions.items():
+                self.holders.setdefault(symbol, {})[user_id] = quantity
+        self._seed_quotes(quotes)
+        self.value, self.reference_value = {}, {}
+        for user_id in holdings:
+            self._revalue(user_id)
+
+    def set_user_holdings(self, user_id: str, positions: List[Dict[str, Any]], quotes: Dict[str, Dict[str, Any]]):
+        """Replace one user's holdings (e.g. right after a new plan is saved)."""
+        for symbol in self.holdings.get(user_id, {}):
+            self.holders.get(symbol, {}).pop(user_id, None)
+        self.holdings[user_id] = {}
+        for position in positions:
+            symbol, quantity = position["symbol"], float(position["quantity"])
+            self.holdings[user_id][symbol] = self.holdings[user_id].get(symbol, 0.0) + quantity
+            self.holders.setdefault(symbol, {})[user_id] = self.holdings[user_id][symbol]
+        self._seed_quotes(quotes)
+        self._revalue(user_id)
+        self._push(user_id)
+
+    def _seed_quotes(self, quotes: Dict[str, Dict[str, Any]]):
+        """Price symbols that have no live trades from their quotes, replacing older quotes."""
+        for symbol, info in quotes.items():
+            if symbol in self.live or not info:
+                continue
+            current = info.get('regularMarketPrice', 0.0)
+            self.price[symbol] = current
+            self.reference_price[symbol] = info.get('previousClose', current)
+
+    def _revalue(self, user_id: str):
+        positions = self.holdings.get(user_id, {})
+        self.value[user_id] = sum(q * self.price.get(s, 0.0) for s, q in positions.items())
+        self.reference_value[user_id] = sum(q * self.reference_price.get(s, 0.0) for s, q in positions.items())
+
+    # ---- trade feed ----
+
+    def on_trades(self, batch: pd.DataFrame):
+        """Trade feed subscriber: re-value only the portfolios holding a traded symbol."""
+        if batch.empty:
+            return
+        held = batch[batch['ticker'].isin(self.holders.keys())]
+        if held.empty:
+            return
+        self.batches += 1
+        as_of = held['localTS'].iloc[-1].isoformat()
+
+        affected = set()
+        for symbol in held['ticker'].unique():
+            entry = price_index.get(symbol)
+            if entry is None or entry.last_price is None:
+                continue
+            old_price = self.price.get(symbol, 0.0)
+            old_reference = self.reference_price.get(symbol, 0.0)
+            self.live.add(symbol)
+            self.price[symbol] = entry.last_price
+            self.reference_price[symbol] = entry.previous_close or entry.day_open or entry.last_price
+            price_delta = self.price[symbol] - old_price
+            reference_delta = self.reference_price[symbol] - old_reference
+            for user_id, quantity in self.holders[symbol].items():
+                self.value[user_id] += quantity * price_delta
+                self.reference_value[user_id] += quantity * reference_delta
+                affected.add(user_id)
+
+        for user_id in affected:
+            self.as_of[user_id] = as_of
+            self._push(user_id)
+
+    def snapshot(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Current valuation of one user's portfolio, or None if the user has no holdings."""
+        if user_id not in self.holdings:
+            return None
+        value = self.value.get(user_id, 0.0)
+        reference = self.reference_value.get(user_id, 0.0)
+        change = value - reference
+        return {
+            "user_id": user_id,
+            "total_value": round(value, 2),
+            "daily_change": round(change, 2),
+            "daily_change_percent": round(change / reference * 100, 2) if reference else 0.0,
+            "as_of": self.as_of.get(user_id),
+        }
+
+    def _push(self, user_id: str):
+        topic = portfolio_topic(user_id)
+        if broadcaster.has_subscribers(topic):
+            broadcaster.publish(topic, self.snapshot(user_id))
+            self.updates_pushed += 1
+
+    async def refresh_loop(self):
+        """Reload holdings every VALUATION_REFRESH_SECONDS until cancelled."""
+        while True:
+            try:
+                rows, quotes = await bulkheads["db"].run(self.fetch_holdings)
+                self.load_holdings(rows, quotes)
+            except Exception as e:
+                print(f"Loading portfolio holdings for live valuation failed: {e}")
+            await asyncio.sleep(settings.VALUATION_REFRESH_SECONDS)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "portfolios": len(self.holdings),
+            "symbols": len(self.holders),
+            "batches": self.batches,
+            "updates_pushed": self.updates_pushed,
+        }
+
+
+live_valuation = LiveValuation()
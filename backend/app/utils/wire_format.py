@@ -0,0 +1,129 @@
+"""
+Compact wire formats for live trades responses.
+
+The default `/api/live-trades/data` payload is a list of row dicts. These helpers
+encode the same trades DataFrame column-wise instead:
+
+- "columnar": JSON struct-of-arrays. `localTS` is sent as epoch-millisecond
+  integers and `ticker` is dictionary-encoded (a `tickers` list plus integer codes).
+- "arrow": Arrow IPC stream (requires the optional `pyarrow` package).
+- "f64": a packed little-endian float64 buffer, column-major, one column after
+  another. Column names and the ticker dictionary travel in response headers.
+"""
+import json
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow is optional; the "arrow" format is disabled without it
+    pa = None
+
+RECORDS = "records"
+COLUMNAR = "columnar"
+ARROW = "arrow"
+F64 = "f64"
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.trades.columnar+json"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+F64_MEDIA_TYPE = "application/octet-stream"
+
+# Media types recognised in the Accept header, mapped to their format name
+_ACCEPT_FORMATS = {
+    COLUMNAR_MEDIA_TYPE: COLUMNAR,
+    ARROW_MEDIA_TYPE: ARROW,
+    F64_MEDIA_TYPE: F64,
+}
+
+
+def negotiate_format(fmt: Optional[str], accept: Optional[str]) -> str:
+    """Pick the wire format from an explicit `format` query value or the Accept header."""
+    if fmt:
+        fmt = fmt.lower()
+        if fmt not in (RECORDS, COLUMNAR, ARROW, F64):
+            raise ValueError(f"Unsupported format '{fmt}'")
+        if fmt == ARROW and pa is None:
+            raise ValueError("The 'arrow' format requires pyarrow, which is not installed")
+        return fmt
+    if accept:
+        for media_range in accept.split(","):
+            media_type = media_range.split(";")[0].strip().lower()
+            if media_type == ARROW_MEDIA_TYPE and pa is None:
+                continue
+            if media_type in _ACCEPT_FORMATS:
+                return _ACCEPT_FORMATS[media_type]
+    return RECORDS
+
+
+def _epoch_ms(series: pd.Series) -> np.ndarray:
+    """Convert a datetime series to int64 epoch milliseconds."""
+    return pd.to_datetime(series).to_numpy(dtype="datetime64[ms]").astype(np.int64)
+
+
+def _encode_tickers(series: pd.Series) -> Tuple[List[str], np.ndarray]:
+    """Dictionary-encode ticker symbols into (dictionary, int32 codes)."""
+    codes, uniques = pd.factorize(series, sort=True)
+    return [str(t) for t in uniques], codes.astype(np.int32)
+
+
+def _value_columns(df: pd.DataFrame) -> List[str]:
+    """Numeric columns carried besides localTS/ticker, in a stable order."""
+    return [c for c in ("price", "size", "sma") if c in df.columns]
+
+
+def to_columnar_json(df: pd.DataFrame) -> bytes:
+    """Encode trades as a JSON struct-of-arrays."""
+    tickers, codes = _encode_tickers(df["ticker"]) if not df.empty else ([], np.array([], dtype=np.int32))
+    payload = {
+        "status": "success",
+        "count": len(df),
+        "tickers": tickers,
+        "localTS": _epoch_ms(df["localTS"]).tolist() if not df.empty else [],
+        "ticker": codes.tolist(),
+    }
+    for col in _value_columns(df):
+        payload[col] = df[col].astype(float).tolist()
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def to_arrow_ipc(df: pd.DataFrame) -> bytes:
+    """Encode trades as an Arrow IPC stream with a dictionary-encoded ticker column."""
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed; the 'arrow' format is unavailable")
+    arrays = [
+        pa.array(_epoch_ms(df["localTS"]) if not df.empty else [], type=pa.int64()),
+        pa.array(df["ticker"].astype(str), type=pa.string()).dictionary_encode(),
+    ]
+    names = ["localTS", "ticker"]
+    for col in _value_columns(df):
+        arrays.append(pa.array(df[col].to_numpy(dtype=np.float64), type=pa.float64()))
+        names.append(col)
+    batch = pa.RecordBatch.from_arrays(arrays, names=names)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def to_packed_f64(df: pd.DataFrame) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Encode trades as a column-major float64 buffer.
+    Returns the buffer and the headers describing its layout.
+    """
+    tickers, codes = _encode_tickers(df["ticker"]) if not df.empty else ([], np.array([], dtype=np.int32))
+    columns = ["localTS", "ticker"] + _value_columns(df)
+    matrix = np.empty((len(columns), len(df)), dtype="<f8")
+    if not df.empty:
+        # Epoch milliseconds fit exactly in a float64 mantissa
+        matrix[0] = _epoch_ms(df["localTS"])
+        matrix[1] = codes
+        for i, col in enumerate(columns[2:], start=2):
+            matrix[i] = df[col].to_numpy(dtype=np.float64)
+    headers = {
+        "X-Columns": ",".join(columns),
+        "X-Row-Count": str(len(df)),
+        "X-Tickers": ",".join(tickers),
+    }
+    return matrix.tobytes(), headers
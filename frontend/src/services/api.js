@@ -48,6 +48,11 @@ export const getLiveTradesStats = () => {
   return apiClient.get('/live-trades/stats');
 };
 
+export const getLiveTradesHistory = ({ ticker, start, end, limit, cursor } = {}) => {
+  // Pass the previous response's next_cursor as `cursor` to fetch the following page
+  return apiClient.get('/live-trades/history', { params: { ticker, start, end, limit, cursor } });
+};
+
 // Add other API functions here as needed for other pages
 // e.g., for portfolio, news, AI insights etc.
 
@@ -1,58 +1,69 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
 
+from services.yahoo_fetcher import fetcher
+
 class StockService:
     @staticmethod
     def get_stock_data(symbol: str, period: str = "1y") -> pd.DataFrame:
         """Fetch stock data from Yahoo Finance"""
-        try:
-            stock = yf.Ticker(symbol)
-            hist = stock.history(period=period)
-            return hist
-        except Exception as e:
-            raise Exception(f"Failed to fetch stock data for {symbol}: {e}")
+        hist = fetcher.download_history([symbol], period=period).get(symbol)
+        if hist is None:
+            raise Exception(f"Failed to fetch stock data for {symbol}")
+        return hist
+
+    @staticmethod
+    def get_stock_data_many(symbols: list, period: str = "1y") -> dict:
+        """Fetch stock data for many symbols with one batched request; failed symbols are omitted"""
+        return fetcher.download_history(symbols, period=period)
+
+    @staticmethod
+    def get_quotes(symbols: list) -> dict:
+        """
+        Current price and previous close for many symbols with one batched Yahoo Finance
+        history request, as arrays aligned with `symbols` (NaN where no quote is available).
+        """
+        price = np.full(len(symbols), np.nan)
+        previous_close = np.full(len(symbols), np.nan)
+        if not symbols:
+            return {"symbols": symbols, "price": price, "previous_close": previous_close}
+        histories = fetcher.download_history(symbols, period="5d")
+        for i, symbol in enumerate(symbols):
+            if symbol in histories:
+                history = histories[symbol]["Close"].dropna().to_numpy()
+                if len(history):
+                    price[i] = history[-1]
+                    previous_close[i] = history[-2] if len(history) > 1 else history[-1]
+        return {"symbols": symbols, "price": price, "previous_close": previous_close}
 
     @staticmethod
     def get_portfolio_performance(positions: dict) -> dict:
-        """Calculate portfolio performance"""
-        performance = {
-            'total_value': 0,
-            'daily_change': 0,
-            'holdings': []
+        """Calculate portfolio performance for all positions in one vectorized pass"""
+        symbols = list(positions)
+        quantities = np.array([positions[symbol] for symbol in symbols], dtype=float)
+        quotes = StockService.get_quotes(symbols)
+        price, previous_close = quotes["price"], quotes["previous_close"]
+
+        valid = ~np.isnan(price)
+        for symbol in np.asarray(symbols, dtype=object)[~valid]:
+            print(f"Warning: Could not get price data for {symbol}, skipping...")
+
+        value = price * quantities
+        daily_change = (price - previous_close) * quantities
+        holdings = [
+            {
+                'symbol': symbols[i],
+                'quantity': positions[symbols[i]],
+                'value': float(value[i]),
+                'daily_change': float(daily_change[i])
+            }
+            for i in np.flatnonzero(valid)
+        ]
+        return {
+            'total_value': float(value[valid].sum()),
+            'daily_change': float(daily_change[valid].sum()),
+            'holdings': holdings
         }
-        
-        for symbol, quantity in positions.items():
-            try:
-                stock = yf.Ticker(symbol)
-                info = stock.info
-                
-                # Check if we got valid data
-                if not info or 'regularMarketPrice' not in info:
-                    print(f"Warning: Could not get price data for {symbol}, skipping...")
-                    continue
-                    
-                current_price = info.get('regularMarketPrice', 0)
-                prev_close = info.get('previousClose', current_price)  # Default to current if no prev
-                
-                position_value = current_price * quantity
-                daily_change = (current_price - prev_close) * quantity
-                
-                performance['holdings'].append({
-                    'symbol': symbol,
-                    'quantity': quantity,
-                    'value': position_value,
-                    'daily_change': daily_change
-                })
-                
-                performance['total_value'] += position_value
-                performance['daily_change'] += daily_change
-            except Exception as e:
-                print(f"Error processing {symbol}: {e}")
-                # Continue with other stocks if one fails
-                continue
-        
-        return performance
 
     @staticmethod
     def get_market_summary() -> dict:
@@ -60,9 +71,13 @@ class StockService:
         indices = ['^GSPC', '^DJI', '^IXIC']  # S&P 500, Dow Jones, NASDAQ
         summary = {}
         
+        # Fetched concurrently; indices that fail or time out get placeholder data
+        infos = fetcher.fetch_infos(indices)
         for index in indices:
-            idx = yf.Ticker(index)
-            info = idx.info
+            info = infos.get(index)
+            if info is None:
+                summary[index] = {'name': index, 'price': 0, 'change': 0}
+                continue
             summary[index] = {
                 'name': info.get('shortName', ''),
                 'price': info.get('regularMarketPrice', 0),
@@ -82,12 +97,13 @@ class StockService:
         try:
             # Get 1 year historical data for each position
             portfolio_value = pd.DataFrame()
+            # One batched download for every position
+            histories = self.get_stock_data_many(list(positions), period="1y")
             
             for symbol, quantity in positions.items():
                 try:
                     print(f"Processing historical data for {symbol} with quantity {quantity}")
-                    # Get historical data for this symbol
-                    df = self.get_stock_data(symbol, period="1y")
+                    df = histories.get(symbol)
                     
                     # Skip if no data
                     if df is None or df.empty:
@@ -0,0 +1,208 @@
+"""
+Batched, concurrent Yahoo Finance fetch layer for the Dash app.
+
+- History for many symbols is fetched with one multi-symbol `download` call.
+- Calls that only exist per symbol (`Ticker(symbol).info`) run concurrently on
+  a bounded thread pool. Each call gets its own `timeout` deadline from when it
+  starts; whatever completed is returned (partial results), and failures and
+  timeouts are logged. A running thread can't be stopped, so a call past its
+  deadline keeps its slot until it returns: at most `max_workers` calls are ever
+  in flight, and when hung calls hold every slot the rest are skipped at once
+  instead of queueing behind them.
+
+The client is the `yfinance` module by default. For offline runs, point
+YF_REPLAY_DIR at a directory of recorded responses and a ReplayClient serves
+them instead; set YF_RECORD_DIR to record live responses into such a directory.
+"""
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List
+
+import pandas as pd
+import yfinance as yf
+
+
+def _safe_name(symbol: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]", "_", symbol)
+
+
+def _split_download(data: pd.DataFrame, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+    """Split a (ticker, field) column download into one frame per symbol, dropping empty ones."""
+    histories = {}
+    if data is None or data.empty:
+        return histories
+    multi = isinstance(data.columns, pd.MultiIndex)
+    for symbol in symbols:
+        if multi:
+            if symbol not in data.columns.get_level_values(0):
+                continue
+            frame = data[symbol]
+        elif len(symbols) == 1:
+            frame = data
+        else:
+            continue
+        frame = frame.dropna(how="all")
+        if not frame.empty:
+            histories[symbol] = frame
+    return histories
+
+
+class ReplayClient:
+    """Serves recorded Yahoo Finance responses from disk, with the yfinance call signatures used here."""
+
+    class _Ticker:
+        def __init__(self, client: "ReplayClient", symbol: str):
+            self._client = client
+            self.symbol = symbol
+
+        @property
+        def info(self) -> dict:
+            path = os.path.join(self._client.directory, "info", f"{_safe_name(self.symbol)}.json")
+            if not os.path.exists(path):
+                raise KeyError(f"No recorded info for {self.symbol}")
+            with open(path) as f:
+                return json.load(f)
+
+        def history(self, period: str = "1mo", interval: str = "1d", **kwargs) -> pd.DataFrame:
+            return self._client._history(self.symbol, period, interval)
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _history(self, symbol: str, period: str, interval: str) -> pd.DataFrame:
+        path = os.path.join(self.directory, "history", f"{_safe_name(symbol)}_{period}_{interval}.json")
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        return pd.read_json(path, orient="split", convert_dates=True)
+
+    def Ticker(self, symbol: str) -> "ReplayClient._Ticker":
+        return ReplayClient._Ticker(self, symbol)
+
+    def download(self, tickers, period: str = "1mo", interval: str = "1d", **kwargs) -> pd.DataFrame:
+        symbols = [tickers] if isinstance(tickers, str) else list(tickers)
+        frames = {s: self._history(s, period, interval) for s in symbols}
+        frames = {s: f for s, f in frames.items() if not f.empty}
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1)
+
+
+class RecordingClient:
+    """Wraps a live client and writes every response where a ReplayClient can read it."""
+
+    def __init__(self, client, directory: str):
+        self.client = client
+        self.directory = directory
+        os.makedirs(os.path.join(directory, "info"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "history"), exist_ok=True)
+
+    def Ticker(self, symbol: str):
+        ticker = self.client.Ticker(symbol)
+        recorder = self
+
+        class _RecordingTicker:
+            @property
+            def info(self) -> dict:
+                info = ticker.info
+                with open(os.path.join(recorder.directory, "info", f"{_safe_name(symbol)}.json"), "w") as f:
+                    json.dump(info, f, default=str)
+                return info
+
+            def history(self, period: str = "1mo", interval: str = "1d", **kwargs) -> pd.DataFrame:
+                frame = ticker.history(period=period, interval=interval, **kwargs)
+                recorder._save_history(symbol, period, interval, frame)
+                return frame
+
+        return _RecordingTicker()
+
+    def download(self, tickers, period: str = "1mo", interval: str = "1d", **kwargs) -> pd.DataFrame:
+        data = self.client.download(tickers, period=period, interval=interval, **kwargs)
+        symbols = [tickers] if isinstance(tickers, str) else list(tickers)
+        for symbol, frame in _split_download(data, symbols).items():
+            self._save_history(symbol, period, interval, frame)
+        return data
+
+    def _save_history(self, symbol: str, period: str, interval: str, frame: pd.DataFrame):
+        path = os.path.join(self.directory, "history", f"{_safe_name(symbol)}_{period}_{interval}.json")
+        frame.to_json(path, orient="split", date_format="iso")
+
+
+def default_client():
+    """yfinance, or a replay/recording client when YF_REPLAY_DIR / YF_RECORD_DIR is set."""
+    if os.getenv("YF_REPLAY_DIR"):
+        return ReplayClient(os.getenv("YF_REPLAY_DIR"))
+    if os.getenv("YF_RECORD_DIR"):
+        return RecordingClient(yf, os.getenv("YF_RECORD_DIR"))
+    return yf
+
+
+class YahooFetcher:
+    """Multi-symbol downloads plus bounded, time-limited concurrent per-symbol calls."""
+
+    def __init__(self, client=None, max_workers: int = None, timeout: float = None):
+        self.client = client or default_client()
+        self.max_workers = max_workers or int(os.getenv("YF_MAX_WORKERS", 8))
+        self.timeout = timeout or float(os.getenv("YF_TIMEOUT_SECONDS", 10))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="yahoo")
+        # One slot per in-flight call, released only when the call returns (even after its deadline)
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+
+    def download_history(self, symbols: List[str], period: str = "1y", interval: str = "1d") -> Dict[str, pd.DataFrame]:
+        """Daily (auto-adjusted) OHLCV per symbol from a single batched request; failed symbols are omitted."""
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+        try:
+            data = self.client.download(symbols, period=period, interval=interval, group_by="ticker",
+                                        auto_adjust=True, progress=False, threads=True, timeout=self.timeout)
+        except Exception as e:
+            print(f"Batched history download for {len(symbols)} symbols failed: {e}")
+            return {}
+        histories = _split_download(data, symbols)
+        missing = [s for s in symbols if s not in histories]
+        if missing:
+            print(f"No history returned for: {', '.join(missing)}")
+        return histories
+
+    def fetch_infos(self, symbols: List[str]) -> Dict[str, dict]:
+        """`Ticker(symbol).info` for every symbol concurrently; returns the ones that finished in time."""
+        pending = list(dict.fromkeys(symbols))
+        running = {}  # future -> (symbol, deadline)
+        infos = {}
+        while pending or running:
+            # Start a call per free slot; its deadline runs from now, not from the batch start
+            while pending and self._slots.acquire(blocking=False):
+                symbol = pending.pop(0)
+                running[self._executor.submit(self._info, symbol)] = (symbol, time.monotonic() + self.timeout)
+            if not running:
+                print(f"Skipped info for {len(pending)} symbols: {self.max_workers} earlier calls still in flight")
+                break
+            nearest = min(deadline for _, deadline in running.values())
+            done, _ = wait(running, timeout=max(0.0, nearest - time.monotonic()), return_when=FIRST_COMPLETED)
+            for future in done:
+                symbol, _ = running.pop(future)
+                try:
+                    info = future.result()
+                    if info:
+                        infos[symbol] = info
+                except Exception as e:
+                    print(f"Error fetching info for {symbol}: {e}")
+            now = time.monotonic()
+            for future, (symbol, deadline) in list(running.items()):
+                if deadline <= now:
+                    del running[future]  # left running; its slot frees when it returns
+                    print(f"Timed out fetching info for {symbol} after {self.timeout}s")
+        return infos
+
+    def _info(self, symbol: str) -> dict:
+        try:
+            return self.client.Ticker(symbol).info
+        finally:
+            self._slots.release()
+
+
+fetcher = YahooFetcher()
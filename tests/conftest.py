@@ -0,0 +1,7 @@
+"""Make the backend package (`app`) importable for tests run from the repository root."""
+import os
+import sys
+
+BACKEND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
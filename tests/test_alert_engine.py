@@ -0,0 +1,216 @@
+"""
+Tests for app.services.alert_service: the sorted threshold book and the alert
+engine's matching, claiming and loading, against an in-memory price_alerts table.
+
+Run from the repository root: python -m pytest -q
+"""
+import asyncio
+import datetime
+import threading
+
+import pandas as pd
+import pytest
+
+from app.core.broadcast import broadcaster
+from app.services import alert_service
+from app.services.alert_service import AlertEngine, _SortedThresholds
+
+
+class FakeAlertsTable:
+    """price_alerts rows by id, served through AlertEngine's blocking persistence hooks."""
+
+    def __init__(self):
+        self.rows = {}
+        self.load_started = threading.Event()
+        self.release_load = None  # threading.Event the active-alerts read waits on
+
+    def add(self, alert_id, condition, threshold, user_id="u", ticker="AAA"):
+        self.rows[alert_id] = (alert_id, user_id, ticker, condition, threshold,
+                               datetime.datetime(2024, 1, 2, 9, 30), None, None)
+
+    def fetch_alerts(self, query, params=()):
+        if query == alert_service.ACTIVE_ALERTS_QUERY:
+            rows = [row for row in self.rows.values() if row[6] is None]  # snapshot before waiting
+            self.load_started.set()
+            if self.release_load is not None:
+                self.release_load.wait(5)
+            return rows
+        if query == alert_service.ALERT_BY_ID_QUERY:
+            return [self.rows[params[0]]] if params[0] in self.rows else []
+        if query == alert_service.ALERTS_BY_USER_QUERY:
+            return [row for row in self.rows.values() if row[1] == params[0]]
+        if query == alert_service.RECENTLY_TRIGGERED_QUERY:
+            return [row for row in self.rows.values() if row[6] is not None and row[6] >= params[0]]
+        raise AssertionError(query)
+
+    def claim_triggered(self, rows):
+        claimed = []
+        for triggered_at, price, alert_id in rows:
+            row = self.rows.get(alert_id)
+            if row is not None and row[6] is None:
+                self.rows[alert_id] = row[:6] + (triggered_at, price)
+                claimed.append(alert_id)
+        return claimed
+
+    def delete_alert(self, alert_id):
+        return self.rows.pop(alert_id, None) is not None
+
+
+@pytest.fixture
+def table(monkeypatch):
+    table = FakeAlertsTable()
+    for name in ("fetch_alerts", "claim_triggered", "delete_alert"):
+        monkeypatch.setattr(AlertEngine, name, staticmethod(getattr(table, name)))
+    return table
+
+
+@pytest.fixture
+def pushes():
+    queue = broadcaster.subscribe(["alerts:u"])
+    yield queue
+    broadcaster.unsubscribe(queue)
+
+
+def trades(*prices, ticker="AAA"):
+    return pd.DataFrame({
+        "localTS": pd.date_range("2024-01-02 09:30", periods=len(prices), freq="s"),
+        "seq": range(len(prices)),
+        "ticker": ticker,
+        "price": [float(p) for p in prices],
+        "size": 100.0,
+    })
+
+
+def pushed_ids(queue):
+    ids = []
+    while not queue.empty():
+        ids.append(queue.get_nowait()[1]["alert"]["id"])
+    return sorted(ids)
+
+
+async def feed(engine, *batches):
+    """Deliver batches to the engine and let its claim tasks finish."""
+    for batch in batches:
+        engine.on_trades(batch)
+    while engine._tasks:
+        await asyncio.gather(*list(engine._tasks))
+
+
+async def loaded_engine():
+    engine = AlertEngine()
+    await engine.load()
+    return engine
+
+
+def test_sorted_thresholds_pop_from_and_between():
+    book = _SortedThresholds()
+    book.extend([(3.0, 3), (1.0, 1), (2.0, 2), (2.0, 4)])
+    book.add(5.0, 5)
+
+    assert book.pop_from(4.0) == [5]
+    assert book.pop_between(2.0, 3.0) == [2, 4, 3]  # both ends inclusive, ties included
+    assert book.keys == [(1.0, 1)]
+    book.remove(1.0, 1)
+    book.remove(1.0, 1)  # removing a missing entry is a no-op
+    assert len(book) == 0
+
+
+def test_above_and_below_trigger_once(table, pushes):
+    table.add(1, "above", 101.0)
+    table.add(2, "below", 99.0)
+    table.add(3, "above", 105.0)
+
+    async def run():
+        engine = await loaded_engine()
+        await feed(engine, trades(100, 101))
+        assert pushed_ids(pushes) == [1]
+        await feed(engine, trades(98.5), trades(102))  # 1 is gone from the index
+        assert pushed_ids(pushes) == [2]
+        return engine
+
+    engine = asyncio.run(run())
+    assert table.rows[1][7] == 101.0
+    assert table.rows[2][7] == 98.5
+    assert table.rows[3][6] is None
+    assert engine.stats()["active"] == 1
+
+
+@pytest.mark.parametrize("prices", [(99, 101), (101, 99)], ids=["rising", "falling"])
+def test_cross_triggers_in_both_directions(table, pushes, prices):
+    table.add(1, "cross", 100.0)
+
+    async def run():
+        engine = await loaded_engine()
+        await feed(engine, trades(prices[0]))
+        assert pushed_ids(pushes) == []
+        await feed(engine, trades(prices[1]))  # jumps over 100 between batches
+        assert pushed_ids(pushes) == [1]
+
+    asyncio.run(run())
+    assert table.rows[1][7] == prices[1]  # the batch's price nearest the threshold
+
+
+def test_cross_triggers_on_first_batch_at_threshold(table, pushes):
+    table.add(1, "cross", 100.0)
+
+    async def run():
+        engine = await loaded_engine()
+        await feed(engine, trades(100, 100))
+        assert pushed_ids(pushes) == [1]
+
+    asyncio.run(run())
+
+
+def test_alert_deleted_during_load_is_not_indexed(table, pushes):
+    table.add(1, "above", 101.0)
+    table.add(2, "above", 101.0)
+    table.release_load = threading.Event()
+
+    async def run():
+        engine = AlertEngine()
+        loading = asyncio.ensure_future(engine.load())
+        while not table.load_started.is_set():
+            await asyncio.sleep(0.01)
+        assert await engine.delete(1)  # the load has already read the row
+        table.release_load.set()
+        await loading
+        assert sorted(engine.alerts) == [2]
+        await feed(engine, trades(102))
+        assert pushed_ids(pushes) == [2]
+
+    asyncio.run(run())
+
+
+def test_only_one_worker_pushes_and_deletes_reach_every_worker(table, pushes):
+    table.add(1, "above", 101.0)
+    table.add(2, "below", 99.0)
+
+    async def run():
+        a, b = await loaded_engine(), await loaded_engine()
+        assert await b.delete(2)  # a still has 2 in its index
+        batch = trades(98, 102)
+        await feed(a, batch)
+        await feed(b, batch)
+        # One push for 1 (by a); 2 fails its claim in a and never fires
+        assert pushed_ids(pushes) == [1]
+        assert a.stats()["lost_claims"] == 1 and b.stats()["lost_claims"] == 1
+        assert a.stats()["alerts"] == 0 and b.stats()["alerts"] == 0
+
+    asyncio.run(run())
+
+
+def test_sync_pushes_alerts_another_worker_triggered(table, pushes):
+    table.add(1, "above", 101.0)
+
+    async def run():
+        a, b = await loaded_engine(), await loaded_engine()
+        await feed(a, trades(102))
+        assert pushed_ids(pushes) == [1]
+        await b.push_recently_triggered()  # b's own subscribers get it once
+        await b.push_recently_triggered()
+        assert pushed_ids(pushes) == [1]
+        assert b.stats()["alerts"] == 0  # its stale copy is dropped too
+        await a.push_recently_triggered()  # a pushed it already
+        assert pushed_ids(pushes) == []
+
+    asyncio.run(run())
@@ -0,0 +1,101 @@
+"""
+Tests for app.services.correlation_service: the incrementally updated sums behind
+the rolling correlation matrix, checked against np.corrcoef over the same returns.
+
+Run from the repository root: python -m pytest -q
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.correlation_service import RollingCorrelation
+
+T0 = pd.Timestamp("2024-01-02 09:30:00")
+TICKERS = ["AAA", "BBB", "CCC"]
+
+
+def bucket_batch(second, prices, tickers=TICKERS):
+    """One trade per ticker at T0 + `second`."""
+    return pd.DataFrame({
+        "localTS": [T0 + pd.Timedelta(seconds=second)] * len(tickers),
+        "seq": range(len(tickers)),
+        "ticker": tickers,
+        "price": prices,
+        "size": 1.0,
+    })
+
+
+def random_prices(buckets, seed=7):
+    rng = np.random.default_rng(seed)
+    common = rng.normal(0, 0.01, size=(buckets, 1))
+    returns = common + rng.normal(0, 0.01, size=(buckets, len(TICKERS)))
+    return 100 * np.exp(np.cumsum(returns, axis=0))
+
+
+def expected(prices, window):
+    """np.corrcoef over the returns of the last `window` closed buckets."""
+    closed = prices[:-1]  # the last bucket is still open
+    returns = np.vstack([np.zeros(len(TICKERS)), np.diff(np.log(closed), axis=0)])
+    return np.corrcoef(returns[-window:].T), min(len(returns), window)
+
+
+@pytest.mark.parametrize("buckets", [5, 11, 25, 40], ids=["partial", "full", "wrapped", "rebuilt"])
+def test_matches_corrcoef(buckets):
+    # initial_capacity=2 also makes the third ticker grow the matrices
+    corr = RollingCorrelation(bucket_seconds=1, window=10, initial_capacity=2)
+    prices = random_prices(buckets)
+    for second, row in enumerate(prices):
+        corr.on_trades(bucket_batch(second, row))
+
+    want, observations = expected(prices, 10)
+    got = corr.correlation()
+    assert got["tickers"] == TICKERS
+    assert got["observations"] == observations
+    np.testing.assert_allclose(np.array(got["correlation"], dtype=float), want, atol=1e-6)
+
+
+def test_empty_buckets_push_zero_returns():
+    corr = RollingCorrelation(bucket_seconds=1, window=10)
+    prices = random_prices(4)
+    for second, row in zip([0, 1, 4, 5], prices):  # buckets 2 and 3 have no trades
+        corr.on_trades(bucket_batch(second, row))
+
+    closed = prices[:3]
+    r = np.diff(np.log(closed), axis=0)
+    returns = np.vstack([np.zeros(3), r[0], np.zeros(3), np.zeros(3), r[1]])
+    assert corr.count == 5
+    np.testing.assert_allclose(np.array(corr.correlation()["correlation"], dtype=float),
+                               np.corrcoef(returns.T), atol=1e-6)
+
+
+def test_late_trades_for_closed_buckets_are_ignored():
+    corr = RollingCorrelation(bucket_seconds=1, window=10)
+    prices = random_prices(6)
+    for second, row in enumerate(prices):
+        corr.on_trades(bucket_batch(second, row))
+    before = corr.correlation()
+
+    corr.on_trades(bucket_batch(2, [1.0, 1.0, 1.0]))  # bucket 2 closed long ago
+    assert corr.correlation() == before
+
+
+def test_subset_and_unknown_tickers():
+    corr = RollingCorrelation(bucket_seconds=1, window=10)
+    prices = random_prices(12)
+    for second, row in enumerate(prices):
+        corr.on_trades(bucket_batch(second, row))
+
+    full = np.array(corr.correlation()["correlation"], dtype=float)
+    subset = corr.correlation(["CCC", "NOPE", "AAA"])
+    assert subset["tickers"] == ["CCC", "AAA"]
+    np.testing.assert_allclose(np.array(subset["correlation"], dtype=float), full[np.ix_([2, 0], [2, 0])])
+
+
+def test_rebuild_keeps_sums_equal_to_the_buffer():
+    corr = RollingCorrelation(bucket_seconds=1, window=4)
+    prices = random_prices(23)
+    for second, row in enumerate(prices):
+        corr.on_trades(bucket_batch(second, row))
+        filled = corr._returns[:corr.count]
+        np.testing.assert_allclose(corr._sum, filled.sum(axis=0), atol=1e-12)
+        np.testing.assert_allclose(corr._sum_outer, filled.T @ filled, atol=1e-12)
@@ -0,0 +1,103 @@
+"""
+Tests for app.services.trade_feed: the lag-window re-read and the seq dedupe that
+keeps re-read rows from being delivered twice.
+
+Run from the repository root: python -m pytest -q
+"""
+import pandas as pd
+import pytest
+
+from app.services import trade_feed as trade_feed_module
+from app.services.trade_feed import TradeFeed
+
+T0 = pd.Timestamp("2024-01-02 09:30:00")
+
+
+def rows(*trades):
+    """A feed batch from (seconds after T0, seq) pairs, ordered by localTS like FEED_QUERY."""
+    trades = sorted(trades)
+    return pd.DataFrame({
+        "localTS": [T0 + pd.Timedelta(seconds=s) for s, _ in trades],
+        "seq": [seq for _, seq in trades],
+        "ticker": "AAA",
+        "price": 100.0,
+        "size": 10.0,
+    })
+
+
+@pytest.fixture
+def feed():
+    feed = TradeFeed(lag_seconds=30)
+    feed.delivered = []
+    feed.subscribe(lambda batch: feed.delivered.append(batch['seq'].tolist()))
+    return feed
+
+
+def test_rows_re_read_in_the_lag_window_are_delivered_once(feed):
+    feed.publish(rows((0, 1), (1, 2), (2, 3)))
+    feed.publish(rows((0, 1), (1, 2), (2, 3), (3, 4)))  # next poll re-reads the window
+    feed.publish(rows((1, 2), (2, 3), (3, 4)))          # nothing new
+
+    assert feed.delivered == [[1, 2, 3], [4]]
+    assert feed.duplicates == 6
+    assert feed.trades == 4 and feed.batches == 2
+    assert feed.watermark == T0 + pd.Timedelta(seconds=3)
+
+
+def test_late_rows_within_the_lag_are_delivered(feed):
+    feed.publish(rows((0, 1), (10, 2)))
+    # seq 3 was stamped at T0+5s but committed after the T0+10s row was delivered
+    feed.publish(rows((0, 1), (5, 3), (10, 2), (11, 4)))
+
+    assert feed.delivered == [[1, 2], [3, 4]]
+    assert feed.late_trades == 1
+    assert feed.watermark == T0 + pd.Timedelta(seconds=11)  # never moves backwards
+
+
+def test_watermark_does_not_move_back_on_a_late_only_batch(feed):
+    feed.publish(rows((10, 1)))
+    feed.publish(rows((4, 2), (10, 1)))
+
+    assert feed.delivered == [[1], [2]]
+    assert feed.watermark == T0 + pd.Timedelta(seconds=10)
+
+
+def test_seen_seqs_expire_behind_the_window(feed):
+    feed.publish(rows((0, 1)))
+    feed.publish(rows((10, 2)))
+    feed.publish(rows((45, 3)))  # window now starts at T0+15s
+
+    assert feed._seen == {3}
+    assert [seqs for _, seqs in feed._seen_batches] == [[3]]
+
+
+def test_poll_re_reads_from_watermark_minus_lag(feed, monkeypatch):
+    queries = []
+
+    def read_sql(query, conn, params=None):
+        queries.append((query, params))
+        return rows((20, 5), (40, 6))
+
+    monkeypatch.setattr(trade_feed_module.pd, "read_sql", read_sql)
+    feed._conn = object()  # skip connecting
+    feed.publish(rows((40, 6)))
+    feed.publish(feed._fetch())
+
+    assert queries == [(trade_feed_module.FEED_QUERY, ((T0 + pd.Timedelta(seconds=10)).to_pydatetime(),))]
+    assert feed.delivered == [[6], [5]]
+    assert feed.late_trades == 1
+
+
+def test_first_poll_backfills(feed, monkeypatch):
+    queries = []
+
+    def read_sql(query, conn, params=None):
+        queries.append((query, params))
+        return rows((0, 1))
+
+    monkeypatch.setattr(trade_feed_module.pd, "read_sql", read_sql)
+    feed._conn = object()
+    feed.publish(feed._fetch())
+
+    assert queries == [(trade_feed_module.BACKFILL_QUERY, (feed.backfill_seconds,))]
+    assert feed.delivered == [[1]]
@@ -0,0 +1,120 @@
+"""
+Offline tests for services.yahoo_fetcher, driven by ReplayClient over the small
+recording in tests/fixtures/yahoo (5 daily bars and info for AAPL and MSFT).
+
+Run from the repository root: python -m pytest -q
+"""
+import os
+import threading
+import time
+
+import pytest
+
+from services.yahoo_fetcher import ReplayClient, YahooFetcher
+
+RECORDING = os.path.join(os.path.dirname(__file__), "fixtures", "yahoo")
+
+
+class CountingClient(ReplayClient):
+    """Replay client that counts batched downloads and can fail or stall chosen symbols."""
+
+    def __init__(self, directory, delays=None, hang=None):
+        super().__init__(directory)
+        self.downloads = []
+        self.delays = delays or {}
+        self.hang = hang or {}  # symbol -> threading.Event released by the test
+
+    def download(self, tickers, period="1mo", interval="1d", **kwargs):
+        self.downloads.append(list(tickers))
+        return super().download(tickers, period=period, interval=interval, **kwargs)
+
+    def Ticker(self, symbol):
+        ticker = super().Ticker(symbol)
+        client = self
+
+        class _Slow:
+            @property
+            def info(self):
+                if symbol in client.hang:
+                    client.hang[symbol].wait(5)
+                time.sleep(client.delays.get(symbol, 0))
+                return ticker.info
+
+        return _Slow()
+
+
+@pytest.fixture
+def client():
+    return CountingClient(RECORDING)
+
+
+def test_download_history_is_one_batched_request(client):
+    fetcher = YahooFetcher(client=client, max_workers=2, timeout=1)
+    histories = fetcher.download_history(["AAPL", "MSFT", "AAPL"], period="5d")
+
+    assert client.downloads == [["AAPL", "MSFT"]]
+    assert sorted(histories) == ["AAPL", "MSFT"]
+    assert list(histories["AAPL"].columns) == ["Open", "High", "Low", "Close", "Volume"]
+    assert len(histories["MSFT"]) == 5
+    assert histories["AAPL"]["Close"].iloc[-1] == pytest.approx(177.62)
+
+
+def test_download_history_omits_symbols_without_data(client):
+    fetcher = YahooFetcher(client=client, max_workers=2, timeout=1)
+    histories = fetcher.download_history(["AAPL", "NOPE"], period="5d")
+    assert sorted(histories) == ["AAPL"]
+
+
+def test_download_history_failure_returns_empty(client):
+    def fail(*args, **kwargs):
+        raise ConnectionError("offline")
+
+    client.download = fail
+    fetcher = YahooFetcher(client=client, max_workers=2, timeout=1)
+    assert fetcher.download_history(["AAPL", "MSFT"], period="5d") == {}
+
+
+def test_fetch_infos_returns_partial_results_on_failure(client):
+    fetcher = YahooFetcher(client=client, max_workers=4, timeout=1)
+    infos = fetcher.fetch_infos(["AAPL", "NOPE", "MSFT"])  # no recording for NOPE: KeyError
+    assert sorted(infos) == ["AAPL", "MSFT"]
+    assert infos["MSFT"]["shortName"] == "Microsoft Corporation"
+
+
+def test_fetch_infos_times_out_hung_calls():
+    release = threading.Event()
+    client = CountingClient(RECORDING, hang={"AAPL": release})
+    fetcher = YahooFetcher(client=client, max_workers=2, timeout=0.2)
+    try:
+        started = time.monotonic()
+        infos = fetcher.fetch_infos(["AAPL", "MSFT"])
+        assert time.monotonic() - started < 1
+        assert sorted(infos) == ["MSFT"]
+    finally:
+        release.set()
+
+
+def test_deadline_is_per_call_not_per_batch():
+    # One worker: MSFT only starts after AAPL returns. Each takes 0.15s, within the 0.25s
+    # per-call deadline, though the batch as a whole takes longer than that.
+    client = CountingClient(RECORDING, delays={"AAPL": 0.15, "MSFT": 0.15})
+    fetcher = YahooFetcher(client=client, max_workers=1, timeout=0.25)
+    assert sorted(fetcher.fetch_infos(["AAPL", "MSFT"])) == ["AAPL", "MSFT"]
+
+
+def test_hung_calls_cap_in_flight_work():
+    release = threading.Event()
+    client = CountingClient(RECORDING, hang={"AAPL": release})
+    fetcher = YahooFetcher(client=client, max_workers=1, timeout=0.1)
+    try:
+        assert fetcher.fetch_infos(["AAPL"]) == {}
+        # The hung call still holds the only slot: fail fast instead of queueing behind it
+        started = time.monotonic()
+        assert fetcher.fetch_infos(["MSFT"]) == {}
+        assert time.monotonic() - started < 0.1
+    finally:
+        release.set()
+    deadline = time.monotonic() + 2
+    while time.monotonic() < deadline and not fetcher.fetch_infos(["MSFT"]):
+        time.sleep(0.05)
+    assert "MSFT" in fetcher.fetch_infos(["MSFT"])